@@ -15,6 +15,8 @@ _logging.getLogger(__name__).addHandler(_logging.NullHandler())
 
 # The order of these is somewhat significant, e.g. User has to be imported after Thread!
 from . import _common, _util
+from ._json import set_backend as set_json_backend
+from ._util import LazyDatetime
 from ._exception import (
     FacebookError,
     HTTPError,
@@ -24,8 +26,14 @@ from ._exception import (
     InvalidParameters,
     NotLoggedIn,
     PleaseRefresh,
+    RequestTimeout,
+    ConnectionFailed,
 )
-from ._session import Session
+from ._timeouts import Timeout, Deadline
+from ._retry import RetryPolicy, RetryBudget
+from ._ratelimit import RateLimiter, TokenBucket
+from ._pool import PoolConfig, PoolStats
+from ._session import Session, RequestStats
 from ._threads import (
     ThreadABC,
     Thread,
@@ -83,6 +91,7 @@ from ._events import (
     LiveLocationEvent,
     UnsendEvent,
     MessageReplyEvent,
+    register_client_payload,
     # _delta_class
     PeopleAdded,
     PersonRemoved,
@@ -92,6 +101,7 @@ from ._events import (
     ThreadsRead,
     MessageEvent,
     ThreadFolder,
+    register_delta_class,
     # _delta_type
     ColorSet,
     EmojiSet,
@@ -109,13 +119,22 @@ from ._events import (
     PlanEdited,
     PlanDeleted,
     PlanResponded,
+    register_delta_type,
     # __init__
     Typing,
     FriendRequest,
     Presence,
+    EventFilter,
 )
-from ._listen import Listener
+from ._checkpoint import (
+    Checkpoint,
+    CheckpointStore,
+    FileCheckpointStore,
+    SQLiteCheckpointStore,
+)
+from ._listen import Listener, TopicPreset, OverflowPolicy, ListenerStats
 
+from ._cache import ThreadCache, CacheStats
 from ._client import Client
 
 __version__ = "2.0.0a5"
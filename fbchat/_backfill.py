@@ -0,0 +1,114 @@
+import concurrent.futures
+import datetime
+from ._common import log
+from . import _session, _client, _threads, _models, _events
+
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence
+
+#: How often to call ``poll`` while waiting for requests, in seconds
+POLL_INTERVAL = 1.0
+
+
+def to_thread(session: _session.Session, thread: _threads.ThreadABC):
+    """Convert fetched thread data to the thread type used in events."""
+    if isinstance(thread, _threads.GroupData):
+        return _threads.intern_thread(_threads.Group, session, thread.id)
+    return _threads.intern_thread(_threads.User, session, thread.id)
+
+
+def is_changed(thread: _threads.ThreadABC, since: datetime.datetime) -> bool:
+    return thread.last_active is not None and thread.last_active > since
+
+
+def is_new(message: _models.MessageData, since: datetime.datetime) -> bool:
+    return message.created_at is not None and message.created_at > since
+
+
+def to_events(
+    session: _session.Session,
+    thread: _threads.ThreadABC,
+    messages: Iterable[_models.MessageData],
+) -> List[_events.MessageEvent]:
+    return [
+        _events.MessageEvent(
+            author=_threads.intern_thread(_threads.User, session, message.author),
+            thread=thread,
+            message=message,
+            at=message.created_at,
+            recovered=True,
+        )
+        for message in messages
+    ]
+
+
+def merge_batch(
+    batch: Sequence[Sequence[_events.MessageEvent]],
+) -> List[_events.MessageEvent]:
+    """Merge the events of a batch of threads, oldest first."""
+    return sorted((e for events in batch for e in events), key=lambda e: e.at)
+
+
+def fetch_changed_threads(
+    client: _client.Client, since: datetime.datetime
+) -> Iterator[_threads.ThreadABC]:
+    # `Client.fetch_threads` only fetches a single location
+    for location in _models.ThreadLocation:
+        # Threads are ordered by last active first
+        for thread in client.fetch_threads(limit=None, location=location):
+            if not is_changed(thread, since):
+                break
+            yield thread
+
+
+def fetch_new_events(
+    session: _session.Session, thread: _threads.ThreadABC, since: datetime.datetime
+) -> List[_events.MessageEvent]:
+    thread = to_thread(session, thread)
+    messages = []
+    # Messages are ordered by last sent first
+    for message in thread.fetch_messages(limit=None):
+        if not is_new(message, since):
+            break
+        messages.append(message)
+    messages.reverse()
+    return to_events(session, thread, messages)
+
+
+def wait(
+    future: concurrent.futures.Future, poll: Optional[Callable[[], None]]
+) -> concurrent.futures.Future:
+    while poll is not None:
+        done, _ = concurrent.futures.wait([future], timeout=POLL_INTERVAL)
+        if done:
+            break
+        poll()
+    return future
+
+
+def backfill(
+    session: _session.Session,
+    since: datetime.datetime,
+    concurrency: int,
+    poll: Callable[[], None] = None,
+) -> Iterator[_events.MessageEvent]:
+    """Fetch messages sent after ``since``, as recovered `MessageEvent` objects.
+
+    The messages of at most ``concurrency`` threads are fetched concurrently, and
+    the events of each such batch are yielded ordered by when they were sent.
+
+    The requests are sent from worker threads, while ``poll`` is called regularly
+    from the calling thread, e.g. to keep the MQTT connection alive.
+    """
+    log.info("Backfilling messages sent since %s", since)
+    client = _client.Client(session=session)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        future = executor.submit(lambda: list(fetch_changed_threads(client, since)))
+        threads = wait(future, poll).result()
+
+        for i in range(0, len(threads), concurrency):
+            futures = [
+                executor.submit(fetch_new_events, session, thread, since)
+                for thread in threads[i : i + concurrency]
+            ]
+            yield from merge_batch([wait(f, poll).result() for f in futures])
@@ -0,0 +1,136 @@
+import attr
+import threading
+import concurrent.futures
+from ._common import log, kw_only
+from . import _exception, _graphql
+
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Set, Tuple
+
+#: A query waiting to be sent, where to put its result, and how often it was retried
+Pending = Tuple[Any, Any, int]
+
+
+def take_batch(pending: List[Pending], max_size: int) -> List[Pending]:
+    """Remove and return the first queries waiting to be sent."""
+    batch = pending[:max_size]
+    del pending[:max_size]
+    return batch
+
+
+def set_result(future, result: _graphql.QueryResult) -> None:
+    # The caller may have given up on the result, e.g. if it was cancelled
+    if future.done():
+        return
+    if result.error is not None:
+        future.set_exception(result.error)
+    else:
+        future.set_result(result.data)
+
+
+def set_missing(
+    batch: Sequence[Pending], exception: Optional[Exception], retried: Set[int]
+) -> None:
+    """Fail the queries in the batch that didn't get a result, or aren't retried."""
+    for i, (_, future, _) in enumerate(batch):
+        if future.done() or i in retried:
+            continue
+        if exception is None:
+            exception = _exception.ParseError("Missing result for query", data=None)
+        future.set_exception(exception)
+
+
+@attr.s(slots=True, kw_only=kw_only, eq=False)
+class Batcher:
+    """Combine GraphQL queries from multiple threads into fewer requests.
+
+    Queries are collected until ``max_size`` are waiting, or ``max_wait`` seconds have
+    passed since the first one, and then sent in a single ``/api/graphqlbatch/``
+    request. Each caller only receives the results of its own queries.
+
+    See `Session.enable_batching`.
+    """
+
+    #: Send queries, and return their results
+    _send = attr.ib(type=Callable[..., Iterable[_graphql.QueryResult]])
+    #: The maximum number of queries in a request
+    max_size = attr.ib(50, type=int)
+    #: The maximum time to wait for other queries, in seconds
+    max_wait = attr.ib(0.01, type=float)
+    #: Given a failed query's error, and how often it was retried, return the delay
+    #: before retrying it, or ``None`` to give up
+    _retry_delay = attr.ib(
+        None, type=Optional[Callable[[Exception, int], Optional[float]]]
+    )
+    _pending = attr.ib(factory=list, init=False, type=List[Pending])
+    _lock = attr.ib(factory=threading.Lock, init=False, type=threading.Lock)
+    _timer = attr.ib(None, init=False, type=Optional[threading.Timer])
+
+    def _retry(self, pending: Pending, result: _graphql.QueryResult) -> bool:
+        """Send the query again later if it failed temporarily."""
+        query, future, attempt = pending
+        if result.error is not None and self._retry_delay and not future.done():
+            # Only the failed query is retried, in a later batch
+            delay = self._retry_delay(result.error, attempt)
+            if delay is not None:
+                timer = threading.Timer(
+                    delay, self._add, [[(query, future, attempt + 1)]]
+                )
+                timer.daemon = True
+                timer.start()
+                return True
+        return False
+
+    def _send_batch(self, batch: Sequence[Pending]) -> None:
+        log.debug("Sending %d batched GraphQL queries", len(batch))
+        retried = set()  # type: Set[int]
+        try:
+            for result in self._send(*(query for query, _, _ in batch)):
+                if self._retry(batch[result.index], result):
+                    retried.add(result.index)
+                else:
+                    set_result(batch[result.index][1], result)
+        except Exception as e:
+            set_missing(batch, e, retried)
+        else:
+            set_missing(batch, None, retried)
+
+    def _flush(self) -> None:
+        with self._lock:
+            self._timer = None
+            batches = []
+            while self._pending:
+                batches.append(take_batch(self._pending, self.max_size))
+        for batch in batches:
+            self._send_batch(batch)
+
+    def _add(self, pending: Iterable[Pending]) -> None:
+        batches = []
+        with self._lock:
+            self._pending.extend(pending)
+            while len(self._pending) >= self.max_size:
+                batches.append(take_batch(self._pending, self.max_size))
+            if self._pending and self._timer is None:
+                self._timer = threading.Timer(self.max_wait, self._flush)
+                # Don't keep the interpreter alive because of this
+                self._timer.daemon = True
+                self._timer.start()
+            elif not self._pending and self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        # Full batches are sent right away, by the thread that filled them
+        for batch in batches:
+            self._send_batch(batch)
+
+    def submit(self, queries: Iterable[Any]) -> Sequence[concurrent.futures.Future]:
+        """Add queries to the next batch, and return futures for their results."""
+        pending = [(query, concurrent.futures.Future(), 0) for query in queries]
+        self._add(pending)
+        return [future for _, future, _ in pending]
+
+    def request(self, *queries: Any) -> Sequence[Any]:
+        """Send queries in the next batch, and wait for their results.
+
+        Raises:
+            GraphQLError: If one of the queries failed
+        """
+        return [future.result() for future in self.submit(queries)]
@@ -0,0 +1,245 @@
+import attr
+import collections
+import datetime
+import threading
+import time
+from ._common import kw_only
+from . import _threads, _events
+
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
+
+
+def _set_title(thread, event):
+    if isinstance(thread, _threads.GroupData):
+        return attr.evolve(thread, name=event.title)
+    return thread
+
+
+def _set_color(thread, event):
+    if isinstance(thread, (_threads.GroupData, _threads.UserData)):
+        return attr.evolve(thread, color=event.color)
+    return thread
+
+
+def _set_emoji(thread, event):
+    if isinstance(thread, (_threads.GroupData, _threads.UserData)):
+        return attr.evolve(thread, emoji=event.emoji)
+    return thread
+
+
+def _set_nickname(thread, event):
+    if isinstance(thread, _threads.GroupData):
+        nicknames = dict(thread.nicknames or {})
+        if event.nickname is None:
+            nicknames.pop(event.subject.id, None)
+        else:
+            nicknames[event.subject.id] = event.nickname
+        return attr.evolve(thread, nicknames=nicknames)
+    if isinstance(thread, _threads.UserData):
+        # In one-to-one threads, the thread ID is the other user's ID
+        if event.subject.id == thread.id:
+            return attr.evolve(thread, nickname=event.nickname)
+        return attr.evolve(thread, own_nickname=event.nickname)
+    return thread
+
+
+def _add_people(thread, event):
+    if isinstance(thread, _threads.GroupData):
+        ids = {user.id for user in thread.participants}
+        added = [user for user in event.added if user.id not in ids]
+        return attr.evolve(thread, participants=list(thread.participants) + added)
+    return thread
+
+
+def _remove_person(thread, event):
+    if isinstance(thread, _threads.GroupData):
+        removed = event.removed.id
+        nicknames = dict(thread.nicknames or {})
+        nicknames.pop(removed, None)
+        return attr.evolve(
+            thread,
+            participants=[u for u in thread.participants if u.id != removed],
+            nicknames=nicknames,
+            admins=set(thread.admins or ()) - {removed},
+        )
+    return thread
+
+
+def _add_admins(thread, event):
+    if isinstance(thread, _threads.GroupData):
+        added = {user.id for user in event.added}
+        return attr.evolve(thread, admins=set(thread.admins or ()) | added)
+    return thread
+
+
+def _remove_admins(thread, event):
+    if isinstance(thread, _threads.GroupData):
+        removed = {user.id for user in event.removed}
+        return attr.evolve(thread, admins=set(thread.admins or ()) - removed)
+    return thread
+
+
+def _set_approval_mode(thread, event):
+    if isinstance(thread, _threads.GroupData):
+        return attr.evolve(thread, approval_mode=event.require_admin_approval)
+    return thread
+
+
+def _invalidate(thread, event):
+    return None
+
+
+#: Functions updating cached thread data from an event. Returning ``None`` removes
+#: the thread from the cache, so that it's fetched again.
+EVENT_PATCHES = {
+    _events.TitleSet: _set_title,
+    _events.ColorSet: _set_color,
+    _events.EmojiSet: _set_emoji,
+    _events.NicknameSet: _set_nickname,
+    _events.PeopleAdded: _add_people,
+    _events.PersonRemoved: _remove_person,
+    _events.AdminsAdded: _add_admins,
+    _events.AdminsRemoved: _remove_admins,
+    _events.ApprovalModeSet: _set_approval_mode,
+    # Usually the group's photo changed, which isn't included in the event
+    _events.UnfetchedThreadEvent: _invalidate,
+}  # type: Dict[Type, Callable[..., Optional[_threads.ThreadABC]]]
+
+
+@attr.s(slots=True, kw_only=kw_only)
+class CacheStats:
+    """Counters describing how well a `ThreadCache` is working."""
+
+    #: Number of lookups that were answered by the cache
+    hits = attr.ib(0, type=int)
+    #: Number of lookups that had to be fetched from Facebook
+    misses = attr.ib(0, type=int)
+    #: Number of threads removed because the cache was full
+    evictions = attr.ib(0, type=int)
+    #: Number of threads removed because they were too old
+    expirations = attr.ib(0, type=int)
+
+
+@attr.s(slots=True, kw_only=kw_only, eq=False)
+class ThreadCache:
+    """Cache of thread data, e.g. `GroupData` and `UserData`.
+
+    Used by `Client.fetch_thread_info`, to avoid fetching the same threads repeatedly.
+    Cached users and pages also skip the extra ``/chat/user_info/`` request.
+    Threads are kept for ``ttl``, and when there's more than ``max_size`` of them, the
+    least recently used are evicted.
+
+    Example:
+        >>> cache = fbchat.ThreadCache(max_size=500, ttl=datetime.timedelta(hours=1))
+        >>> client = fbchat.Client(session=session, cache=cache)
+        >>> (user,) = client.fetch_thread_info(["4"])  # Fetched from Facebook
+        >>> (user,) = client.fetch_thread_info(["4"])  # Returned from the cache
+    """
+
+    #: The maximum number of threads to keep
+    max_size = attr.ib(1000, type=int)
+    #: How long a thread is kept before it's fetched again
+    ttl = attr.ib(datetime.timedelta(minutes=10), type=datetime.timedelta)
+    _entries = attr.ib(
+        factory=collections.OrderedDict,
+        init=False,
+        type=MutableMapping[str, Tuple[float, _threads.ThreadABC]],
+    )
+    _stats = attr.ib(factory=CacheStats, init=False, type=CacheStats)
+    _lock = attr.ib(factory=threading.Lock, init=False, type=threading.Lock)
+
+    @property
+    def stats(self) -> CacheStats:
+        """Counters for the cache's hits and misses."""
+        return self._stats
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, thread_id: str) -> Optional[_threads.ThreadABC]:
+        """Return the cached thread, or ``None`` if it's missing or expired."""
+        with self._lock:
+            entry = self._entries.get(thread_id)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[thread_id]
+                self._stats.expirations += 1
+                entry = None
+            if entry is None:
+                self._stats.misses += 1
+                return None
+            self._entries.move_to_end(thread_id)
+            self._stats.hits += 1
+            return entry[1]
+
+    def lookup(
+        self, ids: Iterable[str]
+    ) -> Tuple[Sequence[_threads.ThreadABC], Sequence[str]]:
+        """Split thread IDs into the cached threads, and the IDs that are missing."""
+        found = []  # type: List[_threads.ThreadABC]
+        missing = []  # type: List[str]
+        for thread_id in ids:
+            thread = self.get(thread_id)
+            if thread is None:
+                missing.append(thread_id)
+            else:
+                found.append(thread)
+        return found, missing
+
+    def put(self, thread: _threads.ThreadABC) -> None:
+        """Add or replace a thread in the cache."""
+        expires = time.monotonic() + self.ttl.total_seconds()
+        with self._lock:
+            self._entries[thread.id] = (expires, thread)
+            self._entries.move_to_end(thread.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats.evictions += 1
+
+    def handle_event(self, event: _events.Event) -> bool:
+        """Update the cached thread affected by an event from `Listener.listen`.
+
+        Changes like a new title, emoji or participants are applied directly to the
+        cached data, so it stays current without being fetched again.
+
+        Returns:
+            Whether a cached thread was updated or removed
+
+        Example:
+            >>> for event in listener.listen():
+            ...     client.cache.handle_event(event)
+        """
+        patch = EVENT_PATCHES.get(type(event))
+        if patch is None:
+            return False
+        with self._lock:
+            entry = self._entries.get(event.thread.id)
+            if entry is None:
+                return False
+            expires, thread = entry
+            thread = patch(thread, event)
+            if thread is None:
+                del self._entries[event.thread.id]
+            else:
+                # Keep the expiry, since the rest of the data hasn't been refreshed
+                self._entries[event.thread.id] = (expires, thread)
+        return True
+
+    def invalidate(self, thread_id: str) -> None:
+        """Remove a thread from the cache, so it's fetched again next time."""
+        with self._lock:
+            self._entries.pop(thread_id, None)
+
+    def clear(self) -> None:
+        """Remove all threads from the cache."""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,161 @@
+import abc
+import attr
+import datetime
+import json
+import os
+import sqlite3
+from ._common import log, attrs_default, kw_only
+from . import _util
+
+from typing import Optional
+
+
+@attrs_default
+class Checkpoint:
+    """The position in the MQTT messenger queue, used to resume listening."""
+
+    #: Token identifying the messenger sync queue
+    sync_token = attr.ib(type=str)
+    #: The last sequence ID that was received
+    sequence_id = attr.ib(type=int)
+    #: When the last handled event happened, used when backfilling lost events
+    at = attr.ib(None, type=Optional[datetime.datetime])
+
+
+def _at_to_millis(checkpoint):
+    return _util.datetime_to_millis(checkpoint.at) if checkpoint.at else None
+
+
+def _millis_to_at(value):
+    return _util.millis_to_datetime(value) if value is not None else None
+
+
+class CheckpointStore(metaclass=abc.ABCMeta):
+    """Persists the `Listener`'s position, so that it can resume after a restart.
+
+    Implement this to store checkpoints elsewhere, e.g. in a shared database.
+    """
+
+    @abc.abstractmethod
+    def load(self) -> Optional[Checkpoint]:
+        """Load the stored checkpoint, or ``None`` if there is none."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def save(self, checkpoint: Checkpoint) -> None:
+        """Store the checkpoint, replacing the previous one."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def clear(self) -> None:
+        """Remove the stored checkpoint, e.g. because it's no longer valid."""
+        raise NotImplementedError
+
+
+@attr.s(slots=True, kw_only=kw_only, eq=False)
+class FileCheckpointStore(CheckpointStore):
+    """Store the checkpoint as JSON in a file.
+
+    The file is replaced atomically, so it's never left half-written.
+
+    Example:
+        >>> store = fbchat.FileCheckpointStore(path="checkpoint.json")
+        >>> listener = fbchat.Listener(..., checkpoint_store=store)
+    """
+
+    #: Path to the file
+    path = attr.ib(type=str)
+
+    def load(self) -> Optional[Checkpoint]:
+        try:
+            with open(self.path, "r") as f:
+                j = json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            log.exception("Invalid checkpoint in %s, ignoring", self.path)
+            return None
+        return Checkpoint(
+            sync_token=j["sync_token"],
+            sequence_id=j["sequence_id"],
+            at=_millis_to_at(j.get("at")),
+        )
+
+    def save(self, checkpoint: Checkpoint) -> None:
+        j = {
+            "sync_token": checkpoint.sync_token,
+            "sequence_id": checkpoint.sequence_id,
+            "at": _at_to_millis(checkpoint),
+        }
+        tmp_path = "{}.tmp".format(self.path)
+        with open(tmp_path, "w") as f:
+            json.dump(j, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+@attr.s(slots=True, kw_only=kw_only, eq=False)
+class SQLiteCheckpointStore(CheckpointStore):
+    """Store the checkpoint in an SQLite database.
+
+    Several listeners can share the same database, by using different keys.
+
+    Example:
+        >>> store = fbchat.SQLiteCheckpointStore(path="fbchat.db", key=session.user.id)
+        >>> listener = fbchat.Listener(..., checkpoint_store=store)
+    """
+
+    #: Path to the database
+    path = attr.ib(type=str)
+    #: Identifies the checkpoint in the database
+    key = attr.ib("default", type=str)
+    _connection = attr.ib(init=False, type=sqlite3.Connection)
+
+    @_connection.default
+    def _connection_default(self):
+        # The listener may run in another thread than the one creating the store
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        with connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS fbchat_checkpoints ("
+                "key TEXT PRIMARY KEY, sync_token TEXT, sequence_id INTEGER, at INTEGER)"
+            )
+        return connection
+
+    def load(self) -> Optional[Checkpoint]:
+        row = self._connection.execute(
+            "SELECT sync_token, sequence_id, at FROM fbchat_checkpoints WHERE key = ?",
+            (self.key,),
+        ).fetchone()
+        if row is None:
+            return None
+        return Checkpoint(
+            sync_token=row[0], sequence_id=row[1], at=_millis_to_at(row[2])
+        )
+
+    def save(self, checkpoint: Checkpoint) -> None:
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO fbchat_checkpoints VALUES (?, ?, ?, ?)",
+                (
+                    self.key,
+                    checkpoint.sync_token,
+                    checkpoint.sequence_id,
+                    _at_to_millis(checkpoint),
+                ),
+            )
+
+    def clear(self) -> None:
+        with self._connection:
+            self._connection.execute(
+                "DELETE FROM fbchat_checkpoints WHERE key = ?", (self.key,)
+            )
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._connection.close()
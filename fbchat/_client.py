@@ -1,10 +1,196 @@
 import attr
 import datetime
+import functools
+import time
 
 from ._common import log, attrs_default
-from . import _exception, _util, _graphql, _session, _threads, _models
+from . import _cache, _exception, _util, _graphql, _session, _threads, _models
+from . import _timeouts, _retry
+
+from typing import (
+    Sequence,
+    Iterable,
+    Tuple,
+    Optional,
+    Set,
+    BinaryIO,
+    Mapping,
+    Any,
+    Callable,
+    Dict,
+    List,
+)
+
+
+def parse_search_threads(session, nodes) -> Iterable[_threads.ThreadABC]:
+    for node in nodes:
+        if node["__typename"] == "User":
+            yield _threads.UserData._from_graphql(session, node)
+        elif node["__typename"] == "MessageThread":
+            # MessageThread => Group thread
+            yield _threads.GroupData._from_graphql(session, node)
+        elif node["__typename"] == "Page":
+            yield _threads.PageData._from_graphql(session, node)
+        elif node["__typename"] == "Group":
+            # We don't handle Facebook "Groups"
+            pass
+        else:
+            log.warning("Unknown type {} in {}".format(repr(node["__typename"]), node))
+
+
+def parse_user_info(j) -> Mapping[str, Mapping[str, Any]]:
+    """Parse the response of ``/chat/user_info/`` into GraphQL-like entries."""
+    if j.get("profiles") is None:
+        raise _exception.ParseError("No users/pages returned", data=j)
+
+    entries = {}
+    for _id in j["profiles"]:
+        k = j["profiles"][_id]
+        if k["type"] in ["user", "friend"]:
+            entries[_id] = {
+                "id": _id,
+                "url": k.get("uri"),
+                "first_name": k.get("firstName"),
+                "is_viewer_friend": k.get("is_friend"),
+                "gender": k.get("gender"),
+                "profile_picture": {"uri": k.get("thumbSrc")},
+                "name": k.get("name"),
+            }
+        elif k["type"] == "page":
+            entries[_id] = {
+                "id": _id,
+                "url": k.get("uri"),
+                "profile_picture": {"uri": k.get("thumbSrc")},
+                "name": k.get("name"),
+            }
+        else:
+            raise _exception.ParseError("Unknown thread type", data=k)
+
+    log.debug(entries)
+    return entries
+
+
+def thread_info_query(thread_id: str):
+    params = {
+        "id": thread_id,
+        "message_limit": 0,
+        "load_messages": False,
+        "load_read_receipts": False,
+        "before": None,
+    }
+    return _graphql.from_doc_id("2147762685294928", params)
+
+
+#: The number of threads fetched in each request by `Client.fetch_thread_info`
+THREAD_INFO_CHUNK_SIZE = 50
+
+
+def get_thread_info_chunks(ids: Iterable[str], chunk_size: int) -> Sequence[List[str]]:
+    """Remove duplicate IDs, and split the rest into chunks of ``chunk_size``."""
+    ids = list(dict.fromkeys(ids))
+    return [ids[i : i + chunk_size] for i in range(0, len(ids), chunk_size)]
+
+
+def get_thread_info_entry(thread_id: str, entry) -> Mapping[str, Any]:
+    """Extract the ``message_thread`` entry from a `thread_info_query` result."""
+    if entry.get("message_thread") is None:
+        # If you don't have an existing thread with this person, attempt to retrieve user data anyways
+        entry["message_thread"] = {
+            "thread_key": {"other_user_id": thread_id},
+            "thread_type": "ONE_TO_ONE",
+        }
+    return entry["message_thread"]
 
-from typing import Sequence, Iterable, Tuple, Optional, Set, BinaryIO
+
+def get_thread_info_retries(
+    session, errors, failed, attempt: int, retries: int
+) -> Tuple[Sequence[str], Optional[float]]:
+    """Decide which threads that failed to be fetched should be retried.
+
+    Only temporary errors are retried, using the session's `RetryPolicy` and its
+    budget. The other threads are added to ``failed``.
+
+    Returns:
+        The thread IDs to retry, and the delay before retrying them
+    """
+    pending = [
+        thread_id for thread_id, error in errors.items() if _retry.is_retryable(error)
+    ]
+    delay = None
+    if pending and attempt < retries:
+        # The threads are retried in a single request
+        delay = session._retry_delay(errors[pending[0]], attempt, None)
+    if delay is None:
+        failed.update(errors)
+        return [], None
+    failed.update(
+        (thread_id, error)
+        for thread_id, error in errors.items()
+        if thread_id not in pending
+    )
+    return pending, delay
+
+
+def parse_thread_info(session, entry, pages_and_users) -> _threads.ThreadABC:
+    if entry.get("thread_type") == "GROUP":
+        return _threads.GroupData._from_graphql(session, entry)
+    elif entry.get("thread_type") == "ONE_TO_ONE":
+        _id = entry["thread_key"]["other_user_id"]
+        if pages_and_users.get(_id) is None:
+            raise _exception.ParseError(
+                "Could not fetch thread {}".format(_id), data=pages_and_users
+            )
+        entry.update(pages_and_users[_id])
+        if "first_name" in entry:
+            return _threads.UserData._from_graphql(session, entry)
+        else:
+            return _threads.PageData._from_graphql(session, entry)
+    else:
+        raise _exception.ParseError("Unknown thread type", data=entry)
+
+
+def handle_thread_info_errors(failed, on_error) -> None:
+    """Report threads that `Client.fetch_thread_info` failed to fetch."""
+    for thread_id, error in failed.items():
+        if on_error is None:
+            raise error
+        on_error(thread_id, error)
+
+
+def parse_threads(session, j) -> Sequence[Optional[_threads.ThreadABC]]:
+    rtn = []
+    for node in j["viewer"]["message_threads"]["nodes"]:
+        _type = node.get("thread_type")
+        if _type == "GROUP":
+            rtn.append(_threads.GroupData._from_graphql(session, node))
+        elif _type == "ONE_TO_ONE":
+            rtn.append(_threads.UserData._from_thread_fetch(session, node))
+        else:
+            rtn.append(None)
+            log.warning("Unknown thread type: %s, data: %s", _type, node)
+    return rtn
+
+
+def parse_image_url(j) -> str:
+    _exception.handle_payload_error(j)
+
+    if "jsmods" not in j:
+        raise _exception.ParseError("No jsmods when fetching image URL", data=j)
+    require = _util.get_jsmods_require(j["jsmods"]["require"])
+    if "ServerRedirect.redirectPageTo" not in require:
+        raise _exception.ParseError("Could not fetch image URL", data=j)
+    # Return the first argument
+    return require["ServerRedirect.redirectPageTo"][0]
+
+
+def parse_uploads(j, count: int) -> Sequence[Tuple[str, str]]:
+    if len(j["metadata"]) != count:
+        raise _exception.ParseError("Some files could not be uploaded", data=j)
+
+    return [
+        (str(item[_util.mimetype_to_key(item["filetype"])]), item["filetype"])
+        for item in j["metadata"]
+    ]
 
 
 @attrs_default
@@ -21,6 +207,8 @@ class Client:
 
     #: The session to use when making requests.
     session = attr.ib(type=_session.Session)
+    #: Cache of thread data, used by `fetch_thread_info`
+    cache = attr.ib(None, type=Optional[_cache.ThreadCache])
 
     def fetch_users(self) -> Sequence[_threads.UserData]:
         """Fetch users the client is currently chatting with.
@@ -153,21 +341,7 @@ class Client:
             _graphql.from_query(_graphql.SEARCH_THREAD, params)
         )
 
-        for node in j[name]["threads"]["nodes"]:
-            if node["__typename"] == "User":
-                yield _threads.UserData._from_graphql(self.session, node)
-            elif node["__typename"] == "MessageThread":
-                # MessageThread => Group thread
-                yield _threads.GroupData._from_graphql(self.session, node)
-            elif node["__typename"] == "Page":
-                yield _threads.PageData._from_graphql(self.session, node)
-            elif node["__typename"] == "Group":
-                # We don't handle Facebook "Groups"
-                pass
-            else:
-                log.warning(
-                    "Unknown type {} in {}".format(repr(node["__typename"]), node)
-                )
+        yield from parse_search_threads(self.session, j[name]["threads"]["nodes"])
 
     def _search_messages(self, query, offset, limit):
         data = {"query": query, "offset": offset, "limit": limit}
@@ -242,46 +416,99 @@ class Client:
             offset += limit
 
     def _fetch_info(self, *ids):
+        # Not cached separately, the profiles lack the thread's data, like nicknames.
+        # Users in `cache` are returned by `fetch_thread_info` before reaching this.
         data = {"ids[{}]".format(i): _id for i, _id in enumerate(ids)}
         j = self.session._payload_post("/chat/user_info/", data)
+        return parse_user_info(j)
+
+    def _fetch_thread_info(self, ids, retries, failed):
+        pending = ids
+
+        # Groups are yielded as soon as they're received, while users and pages need
+        # another request once the batch has finished
+        entries = []
+        for attempt in range(retries + 1):
+            queries = [thread_info_query(thread_id) for thread_id in pending]
+            errors = {}
+            for result in self.session._graphql_stream(*queries):
+                thread_id = pending[result.index]
+                if result.error is not None:
+                    errors[thread_id] = result.error
+                    continue
+                entry = get_thread_info_entry(thread_id, result.data)
+                if entry.get("thread_type") == "ONE_TO_ONE":
+                    entries.append(entry)
+                    continue
+                try:
+                    thread = parse_thread_info(self.session, entry, {})
+                except _exception.ParseError as e:
+                    failed[thread_id] = e
+                    continue
+                yield thread
+
+            pending, delay = get_thread_info_retries(
+                self.session, errors, failed, attempt, retries
+            )
+            if not pending:
+                break
+            log.warning("Failed fetching %d thread(s), retrying", len(pending))
+            time.sleep(delay)
 
-        if j.get("profiles") is None:
-            raise _exception.ParseError("No users/pages returned", data=j)
-
-        entries = {}
-        for _id in j["profiles"]:
-            k = j["profiles"][_id]
-            if k["type"] in ["user", "friend"]:
-                entries[_id] = {
-                    "id": _id,
-                    "url": k.get("uri"),
-                    "first_name": k.get("firstName"),
-                    "is_viewer_friend": k.get("is_friend"),
-                    "gender": k.get("gender"),
-                    "profile_picture": {"uri": k.get("thumbSrc")},
-                    "name": k.get("name"),
-                }
-            elif k["type"] == "page":
-                entries[_id] = {
-                    "id": _id,
-                    "url": k.get("uri"),
-                    "profile_picture": {"uri": k.get("thumbSrc")},
-                    "name": k.get("name"),
-                }
-            else:
-                raise _exception.ParseError("Unknown thread type", data=k)
+        pages_and_user_ids = [entry["thread_key"]["other_user_id"] for entry in entries]
+        pages_and_users = {}
+        if len(pages_and_user_ids) != 0:
+            try:
+                pages_and_users = self._fetch_info(*pages_and_user_ids)
+            except _exception.FacebookError as e:
+                failed.update(dict.fromkeys(pages_and_user_ids, e))
+                return
+
+        for thread_id, entry in zip(pages_and_user_ids, entries):
+            # Parsed here, so a user missing from the response doesn't stop the rest
+            try:
+                thread = parse_thread_info(self.session, entry, pages_and_users)
+            except _exception.ParseError as e:
+                failed[thread_id] = e
+                continue
+            yield thread
+
+    def fetch_thread_info(
+        self,
+        ids: Iterable[str],
+        retries: int = 1,
+        on_error: Callable[[str, _exception.FacebookError], None] = None,
+        chunk_size: int = THREAD_INFO_CHUNK_SIZE,
+        workers: int = 4,
+    ) -> Iterable[_threads.ThreadABC]:
+        """Fetch threads' info from IDs, unordered.
 
-        log.debug(entries)
-        return entries
+        Threads in the client's `cache` are returned without being fetched, and fetched
+        threads are added to it.
 
-    def fetch_thread_info(self, ids: Iterable[str]) -> Iterable[_threads.ThreadABC]:
-        """Fetch threads' info from IDs, unordered.
+        Duplicate IDs are only fetched once. Long lists of IDs are split into chunks,
+        which are fetched concurrently, and threads are returned as soon as they
+        arrive.
+
+        A thread that fails to be fetched doesn't affect the others, and only the
+        failed threads are retried.
+
+        The chunks are fetched from a thread pool, sharing the client's `Session`, which
+        is safe to use from multiple threads. Use ``workers=1`` to send every request
+        from the calling thread, e.g. with a session that isn't.
 
         Warning:
-            Sends two requests if users or pages are present, to fetch all available info!
+            Sends two requests per chunk if users or pages are present, to fetch all
+            available info!
 
         Args:
             ids: Thread ids to query
+            retries: How many times to retry threads that failed to be fetched
+            on_error: Called with the thread ID and the error for each thread that
+                could not be fetched. If not given, the error is raised once the other
+                threads have been returned.
+            chunk_size: The maximum number of threads to fetch in each request
+            workers: The maximum number of chunks to fetch at the same time
 
         Example:
             Get data about the user with id "4".
@@ -289,58 +516,32 @@ class Client:
             >>> (user,) = client.fetch_thread_info(["4"])
             >>> user.name
             "Mark Zuckerberg"
-        """
-        ids = list(ids)
-        queries = []
-        for thread_id in ids:
-            params = {
-                "id": thread_id,
-                "message_limit": 0,
-                "load_messages": False,
-                "load_read_receipts": False,
-                "before": None,
-            }
-            queries.append(_graphql.from_doc_id("2147762685294928", params))
-
-        j = self.session._graphql_requests(*queries)
-
-        for i, entry in enumerate(j):
-            if entry.get("message_thread") is None:
-                # If you don't have an existing thread with this person, attempt to retrieve user data anyways
-                j[i]["message_thread"] = {
-                    "thread_key": {"other_user_id": ids[i]},
-                    "thread_type": "ONE_TO_ONE",
-                }
-
-        pages_and_user_ids = [
-            k["message_thread"]["thread_key"]["other_user_id"]
-            for k in j
-            if k["message_thread"].get("thread_type") == "ONE_TO_ONE"
-        ]
-        pages_and_users = {}
-        if len(pages_and_user_ids) != 0:
-            pages_and_users = self._fetch_info(*pages_and_user_ids)
-
-        for i, entry in enumerate(j):
-            entry = entry["message_thread"]
-            if entry.get("thread_type") == "GROUP":
-                _id = entry["thread_key"]["thread_fbid"]
-                yield _threads.GroupData._from_graphql(self.session, entry)
-            elif entry.get("thread_type") == "ONE_TO_ONE":
-                _id = entry["thread_key"]["other_user_id"]
-                if pages_and_users.get(_id) is None:
-                    raise _exception.ParseError(
-                        "Could not fetch thread {}".format(_id), data=pages_and_users
-                    )
-                entry.update(pages_and_users[_id])
-                if "first_name" in entry:
-                    yield _threads.UserData._from_graphql(self.session, entry)
-                else:
-                    yield _threads.PageData._from_graphql(self.session, entry)
-            else:
-                raise _exception.ParseError("Unknown thread type", data=entry)
 
-    def _fetch_threads(self, limit, before, folders):
+            Skip threads that could not be fetched.
+
+            >>> failed = {}
+            >>> threads = list(client.fetch_thread_info(ids, on_error=failed.__setitem__))
+        """
+        failed = {}  # type: Dict[str, _exception.FacebookError]
+        ids = list(dict.fromkeys(ids))
+        if self.cache is not None:
+            cached, ids = self.cache.lookup(ids)
+            yield from cached
+
+        chunks = get_thread_info_chunks(ids, chunk_size)
+        for thread in _util.iter_concurrently(
+            (
+                functools.partial(self._fetch_thread_info, chunk, retries, failed)
+                for chunk in chunks
+            ),
+            workers=workers,
+        ):
+            if self.cache is not None:
+                self.cache.put(thread)
+            yield thread
+        handle_thread_info_errors(failed, on_error)
+
+    def _fetch_threads(self, limit, before, folders, deadline=None):
         params = {
             "limit": limit,
             "tags": folders,
@@ -349,25 +550,15 @@ class Client:
             "includeSeqID": False,
         }
         (j,) = self.session._graphql_requests(
-            _graphql.from_doc_id("1349387578499440", params)
+            _graphql.from_doc_id("1349387578499440", params), deadline=deadline
         )
-
-        rtn = []
-        for node in j["viewer"]["message_threads"]["nodes"]:
-            _type = node.get("thread_type")
-            if _type == "GROUP":
-                rtn.append(_threads.GroupData._from_graphql(self.session, node))
-            elif _type == "ONE_TO_ONE":
-                rtn.append(_threads.UserData._from_thread_fetch(self.session, node))
-            else:
-                rtn.append(None)
-                log.warning("Unknown thread type: %s, data: %s", _type, node)
-        return rtn
+        return parse_threads(self.session, j)
 
     def fetch_threads(
         self,
         limit: Optional[int],
         location: _models.ThreadLocation = _models.ThreadLocation.INBOX,
+        deadline: _timeouts.Deadline = None,
     ) -> Iterable[_threads.ThreadABC]:
         """Fetch the client's thread list.
 
@@ -377,6 +568,7 @@ class Client:
             limit: Max. number of threads to retrieve. If ``None``, all threads will be
                 retrieved.
             location: INBOX, PENDING, ARCHIVED or OTHER
+            deadline: Stop fetching, by raising `RequestTimeout`, once this has passed
 
         Example:
             Fetch the last three threads that the user chatted with.
@@ -395,7 +587,7 @@ class Client:
         seen_ids = set()  # type: Set[str]
         before = None
         for limit in _util.get_limits(limit, MAX_BATCH_LIMIT):
-            threads = self._fetch_threads(limit, before, [location.value])
+            threads = self._fetch_threads(limit, before, [location.value], deadline)
 
             before = None
             for thread in threads:
@@ -472,15 +664,7 @@ class Client:
         image_id = str(image_id)
         data = {"photo_id": str(image_id)}
         j = self.session._post("/mercury/attachments/photo/", data)
-        _exception.handle_payload_error(j)
-
-        if "jsmods" not in j:
-            raise _exception.ParseError("No jsmods when fetching image URL", data=j)
-        require = _util.get_jsmods_require(j["jsmods"]["require"])
-        if "ServerRedirect.redirectPageTo" not in require:
-            raise _exception.ParseError("Could not fetch image URL", data=j)
-        # Return the first argument
-        return require["ServerRedirect.redirectPageTo"][0]
+        return parse_image_url(j)
 
     def _get_private_data(self):
         (j,) = self.session._graphql_requests(
@@ -529,13 +713,7 @@ class Client:
             files=file_dict,
         )
 
-        if len(j["metadata"]) != len(file_dict):
-            raise _exception.ParseError("Some files could not be uploaded", data=j)
-
-        return [
-            (str(item[_util.mimetype_to_key(item["filetype"])]), item["filetype"])
-            for item in j["metadata"]
-        ]
+        return parse_uploads(j, len(file_dict))
 
     def mark_as_delivered(self, message: _models.Message):
         """Mark a message as delivered.
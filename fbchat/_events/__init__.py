@@ -5,9 +5,10 @@ from ._client_payload import *
 from ._delta_class import *
 from ._delta_type import *
 
+from .._common import attrs_default
 from .. import _exception, _threads, _models
 
-from typing import Mapping
+from typing import Mapping, Optional, Iterable, Tuple, Type, FrozenSet
 
 
 @attrs_event
@@ -19,14 +20,18 @@ class Typing(ThreadEvent):
 
     @classmethod
     def _parse_orca(cls, session, data):
-        author = _threads.User(session=session, id=str(data["sender_fbid"]))
+        author = _threads.intern_thread(
+            _threads.User, session, str(data["sender_fbid"])
+        )
         status = data["state"] == 1
         return cls(author=author, thread=author, status=status)
 
     @classmethod
     def _parse_thread_typing(cls, session, data):
-        author = _threads.User(session=session, id=str(data["sender_fbid"]))
-        thread = _threads.Group(session=session, id=str(data["thread"]))
+        author = _threads.intern_thread(
+            _threads.User, session, str(data["sender_fbid"])
+        )
+        thread = _threads.intern_thread(_threads.Group, session, str(data["thread"]))
         status = data["state"] == 1
         return cls(author=author, thread=thread, status=status)
 
@@ -40,7 +45,7 @@ class FriendRequest(Event):
 
     @classmethod
     def _parse(cls, session, data):
-        author = _threads.User(session=session, id=str(data["from"]))
+        author = _threads.intern_thread(_threads.User, session, str(data["from"]))
         return cls(author=author)
 
 
@@ -86,15 +91,116 @@ class Disconnect(Event):
     reason = attr.ib(type=str)
 
 
-def parse_events(session, topic, data):
+#: The events that the MQTT topics may be parsed to, besides ``/t_ms``
+TOPIC_EVENTS = {
+    "/thread_typing": (Typing,),
+    "/orca_typing_notifications": (Typing,),
+    "/legacy_web": (FriendRequest, UnknownEvent),
+    "/orca_presence": (Presence,),
+}  # type: Mapping[str, Tuple[Type[Event], ...]]
+
+
+def _to_tuple(value):
+    return None if value is None else tuple(value)
+
+
+def _to_frozenset(value):
+    return None if value is None else frozenset(value)
+
+
+def _raw_thread_ids(data) -> Optional[Iterable[str]]:
+    """Extract the thread IDs from an unparsed delta, or ``None`` if unknown."""
+    key = data.get("messageMetadata", data).get("threadKey")
+    if key is not None:
+        keys = [key]
+    elif "threadKeys" in data:
+        keys = data["threadKeys"]
+    else:
+        return None
+    return [str(key.get("threadFbId", key.get("otherUserFbId"))) for key in keys]
+
+
+def _thread_ids(event: Event) -> Optional[Iterable[str]]:
+    if hasattr(event, "thread"):
+        return [event.thread.id]
+    if hasattr(event, "threads"):
+        return [thread.id for thread in event.threads]
+    return None
+
+
+@attrs_default
+class EventFilter:
+    """Select which events to parse.
+
+    The filter is checked on the raw data, before any events are created, so
+    skipping frequent events like `Presence` and `ThreadsRead` saves a lot of work.
+
+    Each criteria is optional, an event must match all of those given.
+
+    Example:
+        Only parse messages and reactions in a specific thread.
+
+        >>> event_filter = fbchat.EventFilter(
+        ...     events=[fbchat.MessageEvent, fbchat.ReactionEvent],
+        ...     thread_ids=["1234"],
+        ... )
+        >>> for event in listener.listen(filter=event_filter):
+        ...     print(event)
+    """
+
+    #: Event classes to select, including their subclasses
+    events = attr.ib(None, converter=_to_tuple, type=Optional[Tuple[type, ...]])
+    #: MQTT topics to select, e.g. ``/t_ms`` or ``/orca_presence``
+    topics = attr.ib(None, converter=_to_frozenset, type=Optional[FrozenSet[str]])
+    #: IDs of threads to select. Events not related to a thread are skipped
+    thread_ids = attr.ib(None, converter=_to_frozenset, type=Optional[FrozenSet[str]])
+
+    def _accepts_types(self, types: Optional[Iterable[type]]) -> bool:
+        if self.events is None or types is None:
+            return True
+        return any(issubclass(type_, self.events) for type_ in types)
+
+    def _accepts_topic(self, topic: str) -> bool:
+        if self.topics is not None and topic not in self.topics:
+            return False
+        if topic == "/t_ms":
+            return True  # Checked per delta
+        return self._accepts_types(TOPIC_EVENTS.get(topic, (UnknownEvent,)))
+
+    def _accepts_delta(self, data, types: Optional[Iterable[type]]) -> bool:
+        if not self._accepts_types(types):
+            return False
+        if self.thread_ids is not None:
+            thread_ids = _raw_thread_ids(data)
+            if thread_ids is not None:
+                return any(id_ in self.thread_ids for id_ in thread_ids)
+        return True
+
+    def _accepts_event(self, event: Event) -> bool:
+        if self.events is not None and not isinstance(event, self.events):
+            return False
+        if self.thread_ids is not None:
+            thread_ids = _thread_ids(event)
+            if thread_ids is None:
+                return False
+            return any(id_ in self.thread_ids for id_ in thread_ids)
+        return True
+
+
+def _parse_events(session, topic, data, filter):
     # See Mqtt._configure_connect_options for information about these topics
     try:
+        if filter and not filter._accepts_topic(topic):
+            return
+
         if topic == "/t_ms":
             # `deltas` will always be available, since we're filtering out the things
             # that don't have it earlier in the MQTT listener
             for delta in data["deltas"]:
                 if delta["class"] == "ClientPayload":
-                    yield from parse_client_payloads(session, delta)
+                    yield from parse_client_payloads(session, delta, filter=filter)
+                    continue
+                if filter and not filter._accepts_delta(delta, delta_events(delta)):
                     continue
                 try:
                     event = parse_delta(session, delta)
@@ -130,3 +236,11 @@ def parse_events(session, topic, data):
         raise _exception.ParseError(
             "Error parsing MQTT topic {}".format(topic), data=data
         ) from e
+
+
+def parse_events(session, topic, data, filter: EventFilter = None):
+    events = _parse_events(session, topic, data, filter)
+    if filter is None:
+        return events
+    # Deltas that may contain selected events still need to be checked afterwards
+    return (event for event in events if event and filter._accepts_event(event))
@@ -1,9 +1,10 @@
 import attr
 import datetime
-from ._common import attrs_event, UnknownEvent, ThreadEvent
+from ._common import attrs_event, Event, UnknownEvent, ThreadEvent, Parser
+from ._common import register_parser
 from .. import _exception, _util, _threads, _models
 
-from typing import Optional
+from typing import Optional, MutableMapping, Iterable, Tuple, Type
 
 
 @attrs_event
@@ -25,7 +26,7 @@ class ReactionEvent(ThreadEvent):
     def _parse(cls, session, data):
         thread = cls._get_thread(session, data)
         return cls(
-            author=_threads.User(session=session, id=str(data["userId"])),
+            author=_threads.intern_thread(_threads.User, session, str(data["userId"])),
             thread=thread,
             message=_models.Message(thread=thread, id=data["messageId"]),
             reaction=data["reaction"] if data["action"] == 0 else None,
@@ -40,7 +41,9 @@ class UserStatusEvent(ThreadEvent):
     @classmethod
     def _parse(cls, session, data):
         return cls(
-            author=_threads.User(session=session, id=str(data["actorFbid"])),
+            author=_threads.intern_thread(
+                _threads.User, session, str(data["actorFbid"])
+            ),
             thread=cls._get_thread(session, data),
             blocked=not data["canViewerReply"],
         )
@@ -59,7 +62,9 @@ class LiveLocationEvent(ThreadEvent):
         thread = cls._get_thread(session, data)
         for location_data in data["messageLiveLocations"]:
             message = _models.Message(thread=thread, id=data["messageId"])
-            author = _threads.User(session=session, id=str(location_data["senderId"]))
+            author = _threads.intern_thread(
+                _threads.User, session, str(location_data["senderId"])
+            )
             location = _location.LiveLocationAttachment._from_pull(location_data)
 
         return None
@@ -78,10 +83,12 @@ class UnsendEvent(ThreadEvent):
     def _parse(cls, session, data):
         thread = cls._get_thread(session, data)
         return cls(
-            author=_threads.User(session=session, id=str(data["senderID"])),
+            author=_threads.intern_thread(
+                _threads.User, session, str(data["senderID"])
+            ),
             thread=thread,
             message=_models.Message(thread=thread, id=data["messageID"]),
-            at=_util.millis_to_datetime(data["deletionTimestamp"]),
+            at=_util.millis_to_datetime(data["deletionTimestamp"], session),
         )
 
 
@@ -99,7 +106,9 @@ class MessageReplyEvent(ThreadEvent):
         metadata = data["message"]["messageMetadata"]
         thread = cls._get_thread(session, metadata)
         return cls(
-            author=_threads.User(session=session, id=str(metadata["actorFbId"])),
+            author=_threads.intern_thread(
+                _threads.User, session, str(metadata["actorFbId"])
+            ),
             thread=thread,
             message=_models.MessageData._from_reply(thread, data["message"]),
             replied_to=_models.MessageData._from_reply(
@@ -108,27 +117,97 @@ class MessageReplyEvent(ThreadEvent):
         )
 
 
-def parse_client_delta(session, data):
-    if "deltaMessageReaction" in data:
-        return ReactionEvent._parse(session, data["deltaMessageReaction"])
-    elif "deltaChangeViewerStatus" in data:
-        # TODO: Parse all `reason`
-        if data["deltaChangeViewerStatus"]["reason"] == 2:
-            return UserStatusEvent._parse(session, data["deltaChangeViewerStatus"])
-    elif "liveLocationData" in data:
-        return LiveLocationEvent._parse(session, data["liveLocationData"])
-    elif "deltaRecallMessageData" in data:
-        return UnsendEvent._parse(session, data["deltaRecallMessageData"])
-    elif "deltaMessageReply" in data:
-        return MessageReplyEvent._parse(session, data["deltaMessageReply"])
+def _parse_viewer_status(session, data):
+    # TODO: Parse all `reason`
+    if data["deltaChangeViewerStatus"]["reason"] == 2:
+        return UserStatusEvent._parse(session, data["deltaChangeViewerStatus"])
     return UnknownEvent(source="client payload", data=data)
 
 
-def parse_client_payloads(session, data):
-    payload = _util.parse_json("".join(chr(z) for z in data["payload"]))
+#: Parsers for client payload deltas, keyed by the delta's data key
+CLIENT_PAYLOAD_PARSERS = {
+    "deltaMessageReaction": lambda session, data: ReactionEvent._parse(
+        session, data["deltaMessageReaction"]
+    ),
+    "deltaChangeViewerStatus": _parse_viewer_status,
+    "liveLocationData": lambda session, data: LiveLocationEvent._parse(
+        session, data["liveLocationData"]
+    ),
+    "deltaRecallMessageData": lambda session, data: UnsendEvent._parse(
+        session, data["deltaRecallMessageData"]
+    ),
+    "deltaMessageReply": lambda session, data: MessageReplyEvent._parse(
+        session, data["deltaMessageReply"]
+    ),
+}  # type: MutableMapping[str, Parser]
+
+
+#: The events returned by the parsers in `CLIENT_PAYLOAD_PARSERS`
+CLIENT_PAYLOAD_EVENTS = {
+    "deltaMessageReaction": (ReactionEvent,),
+    "deltaChangeViewerStatus": (UserStatusEvent, UnknownEvent),
+    "liveLocationData": (LiveLocationEvent,),
+    "deltaRecallMessageData": (UnsendEvent,),
+    "deltaMessageReply": (MessageReplyEvent,),
+}  # type: MutableMapping[str, Tuple[Type[Event], ...]]
+
+
+def register_client_payload(
+    key: str, parser: Parser = None, events: Iterable[Type[Event]] = None
+):
+    """Register a parser for client payload deltas containing the given key.
+
+    This replaces the builtin parser for that key, if any. If ``parser`` is not
+    given, this can be used as a decorator.
+
+    Args:
+        key: The key identifying the delta, e.g. ``"deltaMessageReaction"``
+        parser: Function taking the session and the whole delta, and returning an
+            event, or ``None`` to skip the delta
+        events: The event classes ``parser`` may return. Used by `EventFilter` to
+            skip deltas without parsing them, if not given they're always parsed
+
+    Example:
+        >>> @fbchat.register_client_payload("deltaNewThing", events=[UnknownEvent])
+        ... def parse_new_thing(session, data):
+        ...     return fbchat.UnknownEvent(source="New thing", data=data["deltaNewThing"])
+    """
+    return register_parser(
+        CLIENT_PAYLOAD_PARSERS, CLIENT_PAYLOAD_EVENTS, key, parser, events=events
+    )
+
+
+def client_delta_key(data) -> Optional[str]:
+    # Deltas contain a single key identifying them, besides some metadata
+    for key in data:
+        if key in CLIENT_PAYLOAD_PARSERS:
+            return key
+    return None
+
+
+def client_delta_events(data) -> Optional[Tuple[Type[Event], ...]]:
+    """The event classes a client payload delta may be parsed to."""
+    key = client_delta_key(data)
+    if key is None:
+        return (UnknownEvent,)
+    return CLIENT_PAYLOAD_EVENTS.get(key)
+
+
+def parse_client_delta(session, data):
+    key = client_delta_key(data)
+    if key is None:
+        return UnknownEvent(source="client payload", data=data)
+    return CLIENT_PAYLOAD_PARSERS[key](session, data)
+
+
+def parse_client_payloads(session, data, filter=None):
+    # The payload is a list of UTF-8 encoded bytes, so convert it to bytes in bulk
+    payload = _util.parse_json(bytes(data["payload"]))
 
     try:
         for delta in payload["deltas"]:
+            if filter and not filter._accepts_delta(delta, client_delta_events(delta)):
+                continue
             yield parse_client_delta(session, delta)
     except _exception.ParseError:
         raise
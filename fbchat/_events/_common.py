@@ -1,16 +1,49 @@
 import attr
+import functools
 from .._common import kw_only
 from .. import _exception, _util, _threads
 
-from typing import Any
+from typing import Any, Callable, MutableMapping, Mapping, Optional, Iterable
+from typing import Tuple, Type
 
 #: Default attrs settings for events
 attrs_event = attr.s(slots=True, kw_only=kw_only, frozen=True)
 
+#: Signature of delta parsers, taking a session and the raw delta
+Parser = Callable[[Any, Mapping[str, Any]], Optional["Event"]]
+
+
+def register_parser(
+    parsers: MutableMapping[str, Parser],
+    event_types: MutableMapping[str, Tuple[Type["Event"], ...]],
+    key: str,
+    parser: Optional[Parser] = None,
+    events: Optional[Iterable[Type["Event"]]] = None,
+):
+    """Add ``parser`` to the dispatch table ``parsers``.
+
+    The event classes the parser may return are stored in ``event_types``. If
+    ``parser`` is not given, return a decorator that registers it.
+    """
+    if parser is None:
+        return functools.partial(
+            register_parser, parsers, event_types, key, events=events
+        )
+    parsers[key] = parser
+    if events is None:
+        event_types.pop(key, None)
+    else:
+        event_types[key] = tuple(events)
+    return parser
+
 
 @attrs_event
 class Event:
-    """Base class for all events."""
+    """Base class for all events.
+
+    Timestamps of events, like ``at``, are `LazyDatetime` objects if the session has
+    lazy timestamps enabled, see `Session.enable_lazy_timestamps`.
+    """
 
     @staticmethod
     def _get_thread(session, data):
@@ -18,9 +51,13 @@ class Event:
         key = data["threadKey"]
 
         if "threadFbId" in key:
-            return _threads.Group(session=session, id=str(key["threadFbId"]))
+            return _threads.intern_thread(
+                _threads.Group, session, str(key["threadFbId"])
+            )
         elif "otherUserFbId" in key:
-            return _threads.User(session=session, id=str(key["otherUserFbId"]))
+            return _threads.intern_thread(
+                _threads.User, session, str(key["otherUserFbId"])
+            )
         raise _exception.ParseError("Could not find thread data", data=data)
 
 
@@ -50,13 +87,15 @@ class ThreadEvent(Event):
     @classmethod
     def _parse_metadata(cls, session, data):
         metadata = data["messageMetadata"]
-        author = _threads.User(session=session, id=metadata["actorFbId"])
+        author = _threads.intern_thread(_threads.User, session, metadata["actorFbId"])
         thread = cls._get_thread(session, metadata)
-        at = _util.millis_to_datetime(int(metadata["timestamp"]))
+        at = _util.millis_to_datetime(int(metadata["timestamp"]), session)
         return author, thread, at
 
     @classmethod
     def _parse_fetch(cls, session, data):
-        author = _threads.User(session=session, id=data["message_sender"]["id"])
-        at = _util.millis_to_datetime(int(data["timestamp_precise"]))
+        author = _threads.intern_thread(
+            _threads.User, session, data["message_sender"]["id"]
+        )
+        at = _util.millis_to_datetime(int(data["timestamp_precise"]), session)
         return author, at
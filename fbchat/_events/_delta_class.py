@@ -1,10 +1,11 @@
 import attr
 import datetime
-from ._common import attrs_event, Event, UnknownEvent, ThreadEvent
+from ._common import attrs_event, Event, UnknownEvent, ThreadEvent, Parser
+from ._common import register_parser
 from . import _delta_type
 from .. import _util, _threads, _models
 
-from typing import Sequence, Optional
+from typing import Sequence, Optional, MutableMapping, Iterable, Tuple, Type
 
 
 @attrs_event
@@ -24,7 +25,7 @@ class PeopleAdded(ThreadEvent):
         author, thread, at = cls._parse_metadata(session, data)
         added = [
             # TODO: Parse user name
-            _threads.User(session=session, id=x["userFbId"])
+            _threads.intern_thread(_threads.User, session, x["userFbId"])
             for x in data["addedParticipants"]
         ]
         return cls(author=author, thread=thread, added=added, at=at)
@@ -45,7 +46,9 @@ class PersonRemoved(ThreadEvent):
     @classmethod
     def _parse(cls, session, data):
         author, thread, at = cls._parse_metadata(session, data)
-        removed = _threads.User(session=session, id=data["leftParticipantFbId"])
+        removed = _threads.intern_thread(
+            _threads.User, session, data["leftParticipantFbId"]
+        )
         return cls(author=author, thread=thread, removed=removed, at=at)
 
 
@@ -104,11 +107,13 @@ class MessagesDelivered(ThreadEvent):
     def _parse(cls, session, data):
         thread = cls._get_thread(session, data)
         if "actorFbId" in data:
-            author = _threads.User(session=session, id=data["actorFbId"])
+            author = _threads.intern_thread(_threads.User, session, data["actorFbId"])
         else:
             author = thread
         messages = [_models.Message(thread=thread, id=x) for x in data["messageIds"]]
-        at = _util.millis_to_datetime(int(data["deliveredWatermarkTimestampMs"]))
+        at = _util.millis_to_datetime(
+            int(data["deliveredWatermarkTimestampMs"]), session
+        )
         return cls(author=author, thread=thread, messages=messages, at=at)
 
 
@@ -125,9 +130,9 @@ class ThreadsRead(Event):
 
     @classmethod
     def _parse_read_receipt(cls, session, data):
-        author = _threads.User(session=session, id=data["actorFbId"])
+        author = _threads.intern_thread(_threads.User, session, data["actorFbId"])
         thread = cls._get_thread(session, data)
-        at = _util.millis_to_datetime(int(data["actionTimestampMs"]))
+        at = _util.millis_to_datetime(int(data["actionTimestampMs"]), session)
         return cls(author=author, threads=[thread], at=at)
 
     @classmethod
@@ -135,7 +140,7 @@ class ThreadsRead(Event):
         threads = [
             cls._get_thread(session, {"threadKey": x}) for x in data["threadKeys"]
         ]
-        at = _util.millis_to_datetime(int(data["actionTimestamp"]))
+        at = _util.millis_to_datetime(int(data["actionTimestamp"]), session)
         return cls(author=session.user, threads=threads, at=at)
 
 
@@ -147,6 +152,9 @@ class MessageEvent(ThreadEvent):
     message = attr.ib(type="_models.Message")
     #: When the threads were read
     at = attr.ib(type=datetime.datetime)
+    #: Whether the message was fetched after the listener lost events, see the
+    #: ``backfill`` argument of `Listener`
+    recovered = attr.ib(False, type=bool)
 
     @classmethod
     def _parse(cls, session, data):
@@ -179,36 +187,89 @@ class ThreadFolder(Event):
         return cls(thread=thread, folder=folder)
 
 
+def _parse_mark_folder_seen(session, data):
+    # TODO: Finish this
+    folders = [_models.ThreadLocation._parse(folder) for folder in data["folders"]]
+    at = _util.millis_to_datetime(int(data["timestamp"]), session)
+    return None
+
+
+def _parse_client_payload(session, data):
+    raise ValueError("This is implemented in `parse_events`")
+
+
+#: Parsers for deltas, keyed by their ``class``
+DELTA_CLASS_PARSERS = {
+    "AdminTextMessage": _delta_type.parse_admin_message,
+    "ParticipantsAddedToGroupThread": PeopleAdded._parse,
+    "ParticipantLeftGroupThread": PersonRemoved._parse,
+    "MarkFolderSeen": _parse_mark_folder_seen,
+    "ThreadName": TitleSet._parse,
+    "ForcedFetch": UnfetchedThreadEvent._parse,
+    "DeliveryReceipt": MessagesDelivered._parse,
+    "ReadReceipt": ThreadsRead._parse_read_receipt,
+    "MarkRead": ThreadsRead._parse,
+    # Skip "no operation" events
+    "NoOp": lambda session, data: None,
+    "NewMessage": MessageEvent._parse,
+    "ThreadFolder": ThreadFolder._parse,
+    "ClientPayload": _parse_client_payload,
+}  # type: MutableMapping[str, Parser]
+
+
+#: The events returned by the parsers in `DELTA_CLASS_PARSERS`
+DELTA_CLASS_EVENTS = {
+    "ParticipantsAddedToGroupThread": (PeopleAdded,),
+    "ParticipantLeftGroupThread": (PersonRemoved,),
+    "MarkFolderSeen": (),
+    "ThreadName": (TitleSet,),
+    "ForcedFetch": (UnfetchedThreadEvent,),
+    "DeliveryReceipt": (MessagesDelivered,),
+    "ReadReceipt": (ThreadsRead,),
+    "MarkRead": (ThreadsRead,),
+    "NoOp": (),
+    "NewMessage": (MessageEvent,),
+    "ThreadFolder": (ThreadFolder,),
+}  # type: MutableMapping[str, Tuple[Type[Event], ...]]
+
+
+def register_delta_class(
+    class_: str, parser: Parser = None, events: Iterable[Type[Event]] = None
+):
+    """Register a parser for deltas with the given ``class``.
+
+    This replaces the builtin parser for that class, if any. If ``parser`` is not
+    given, this can be used as a decorator.
+
+    Args:
+        class_: The delta's ``class``
+        parser: Function taking the session and the delta, and returning an event,
+            or ``None`` to skip the delta
+        events: The event classes ``parser`` may return. Used by `EventFilter` to
+            skip deltas without parsing them, if not given they're always parsed
+
+    Example:
+        >>> @fbchat.register_delta_class("NewDeltaClass", events=[UnknownEvent])
+        ... def parse_new_delta(session, data):
+        ...     return fbchat.UnknownEvent(source="New delta class", data=data)
+    """
+    return register_parser(
+        DELTA_CLASS_PARSERS, DELTA_CLASS_EVENTS, class_, parser, events=events
+    )
+
+
+def delta_events(data) -> Optional[Tuple[Type[Event], ...]]:
+    """The event classes a delta may be parsed to, or ``None`` if unknown."""
+    parser = DELTA_CLASS_PARSERS.get(data["class"])
+    if parser is None:
+        return (UnknownEvent,)
+    if parser is _delta_type.parse_admin_message:
+        return _delta_type.admin_message_events(data)
+    return DELTA_CLASS_EVENTS.get(data["class"])
+
+
 def parse_delta(session, data):
-    class_ = data["class"]
-    if class_ == "AdminTextMessage":
-        return _delta_type.parse_admin_message(session, data)
-    elif class_ == "ParticipantsAddedToGroupThread":
-        return PeopleAdded._parse(session, data)
-    elif class_ == "ParticipantLeftGroupThread":
-        return PersonRemoved._parse(session, data)
-    elif class_ == "MarkFolderSeen":
-        # TODO: Finish this
-        folders = [_models.ThreadLocation._parse(folder) for folder in data["folders"]]
-        at = _util.millis_to_datetime(int(data["timestamp"]))
-        return None
-    elif class_ == "ThreadName":
-        return TitleSet._parse(session, data)
-    elif class_ == "ForcedFetch":
-        return UnfetchedThreadEvent._parse(session, data)
-    elif class_ == "DeliveryReceipt":
-        return MessagesDelivered._parse(session, data)
-    elif class_ == "ReadReceipt":
-        return ThreadsRead._parse_read_receipt(session, data)
-    elif class_ == "MarkRead":
-        return ThreadsRead._parse(session, data)
-    elif class_ == "NoOp":
-        # Skip "no operation" events
-        return None
-    elif class_ == "NewMessage":
-        return MessageEvent._parse(session, data)
-    elif class_ == "ThreadFolder":
-        return ThreadFolder._parse(session, data)
-    elif class_ == "ClientPayload":
-        raise ValueError("This is implemented in `parse_events`")
-    return UnknownEvent(source="Delta class", data=data)
+    parser = DELTA_CLASS_PARSERS.get(data["class"])
+    if parser is None:
+        return UnknownEvent(source="Delta class", data=data)
+    return parser(session, data)
@@ -1,9 +1,10 @@
 import attr
 import datetime
-from ._common import attrs_event, Event, UnknownEvent, ThreadEvent
+from ._common import attrs_event, Event, UnknownEvent, ThreadEvent, Parser
+from ._common import register_parser
 from .. import _util, _threads, _models
 
-from typing import Sequence, Optional
+from typing import Sequence, Optional, Mapping, MutableMapping, Iterable, Tuple, Type
 
 
 @attrs_event
@@ -52,8 +53,8 @@ class NicknameSet(ThreadEvent):
     @classmethod
     def _parse(cls, session, data):
         author, thread, at = cls._parse_metadata(session, data)
-        subject = _threads.User(
-            session=session, id=data["untypedData"]["participant_id"]
+        subject = _threads.intern_thread(
+            _threads.User, session, data["untypedData"]["participant_id"]
         )
         nickname = data["untypedData"]["nickname"] or None  # None if ""
         return cls(
@@ -73,7 +74,9 @@ class AdminsAdded(ThreadEvent):
     @classmethod
     def _parse(cls, session, data):
         author, thread, at = cls._parse_metadata(session, data)
-        subject = _threads.User(session=session, id=data["untypedData"]["TARGET_ID"])
+        subject = _threads.intern_thread(
+            _threads.User, session, data["untypedData"]["TARGET_ID"]
+        )
         return cls(author=author, thread=thread, added=[subject], at=at)
 
 
@@ -89,7 +92,9 @@ class AdminsRemoved(ThreadEvent):
     @classmethod
     def _parse(cls, session, data):
         author, thread, at = cls._parse_metadata(session, data)
-        subject = _threads.User(session=session, id=data["untypedData"]["TARGET_ID"])
+        subject = _threads.intern_thread(
+            _threads.User, session, data["untypedData"]["TARGET_ID"]
+        )
         return cls(author=author, thread=thread, removed=[subject], at=at)
 
 
@@ -280,52 +285,104 @@ class PlanResponded(ThreadEvent):
         return cls(author=author, thread=thread, plan=plan, take_part=take_part, at=at)
 
 
+def _parse_untyped(field: str, parsers: Mapping[str, Parser]) -> Parser:
+    """Create a parser, dispatching on a field in ``untypedData``."""
+
+    def parse(session, data):
+        parser = parsers.get(data["untypedData"][field])
+        if parser is None:
+            return UnknownEvent(source="Delta type", data=data)
+        return parser(session, data)
+
+    return parse
+
+
+#: Parsers for ``AdminTextMessage`` deltas, keyed by their ``type``
+DELTA_TYPE_PARSERS = {
+    "change_thread_theme": ColorSet._parse,
+    "change_thread_icon": EmojiSet._parse,
+    "change_thread_nickname": NicknameSet._parse,
+    "change_thread_admins": _parse_untyped(
+        "ADMIN_EVENT",
+        {"add_admin": AdminsAdded._parse, "remove_admin": AdminsRemoved._parse},
+    ),
+    "change_thread_approval_mode": ApprovalModeSet._parse,
+    # TODO: "instant_game_update"
+    # Previously "rtc_call_log"
+    "messenger_call_log": _parse_untyped(
+        "event",
+        {
+            "group_call_started": CallStarted._parse,
+            "group_call_ended": CallEnded._parse,
+            "one_on_one_call_ended": CallEnded._parse,
+        },
+    ),
+    "participant_joined_group_call": CallJoined._parse,
+    "group_poll": _parse_untyped(
+        "event_type",
+        {"question_creation": PollCreated._parse, "update_vote": PollVoted._parse},
+    ),
+    "lightweight_event_create": PlanCreated._parse,
+    "lightweight_event_notify": PlanEnded._parse,
+    "lightweight_event_update": PlanEdited._parse,
+    "lightweight_event_delete": PlanDeleted._parse,
+    "lightweight_event_rsvp": PlanResponded._parse,
+}  # type: MutableMapping[str, Parser]
+
+
+#: The events returned by the parsers in `DELTA_TYPE_PARSERS`
+DELTA_TYPE_EVENTS = {
+    "change_thread_theme": (ColorSet,),
+    "change_thread_icon": (EmojiSet,),
+    "change_thread_nickname": (NicknameSet,),
+    "change_thread_admins": (AdminsAdded, AdminsRemoved, UnknownEvent),
+    "change_thread_approval_mode": (ApprovalModeSet,),
+    "messenger_call_log": (CallStarted, CallEnded, UnknownEvent),
+    "participant_joined_group_call": (CallJoined,),
+    "group_poll": (PollCreated, PollVoted, UnknownEvent),
+    "lightweight_event_create": (PlanCreated,),
+    "lightweight_event_notify": (PlanEnded,),
+    "lightweight_event_update": (PlanEdited,),
+    "lightweight_event_delete": (PlanDeleted,),
+    "lightweight_event_rsvp": (PlanResponded,),
+}  # type: MutableMapping[str, Tuple[Type[Event], ...]]
+
+
+def register_delta_type(
+    type_: str, parser: Parser = None, events: Iterable[Type[Event]] = None
+):
+    """Register a parser for ``AdminTextMessage`` deltas with the given ``type``.
+
+    This replaces the builtin parser for that type, if any. If ``parser`` is not
+    given, this can be used as a decorator.
+
+    Args:
+        type_: The delta's ``type``
+        parser: Function taking the session and the delta, and returning an event,
+            or ``None`` to skip the delta
+        events: The event classes ``parser`` may return. Used by `EventFilter` to
+            skip deltas without parsing them, if not given they're always parsed
+
+    Example:
+        >>> @fbchat.register_delta_type("instant_game_update", events=[UnknownEvent])
+        ... def parse_game_update(session, data):
+        ...     return fbchat.UnknownEvent(source="Game update", data=data)
+    """
+    return register_parser(
+        DELTA_TYPE_PARSERS, DELTA_TYPE_EVENTS, type_, parser, events=events
+    )
+
+
+def admin_message_events(data) -> Optional[Tuple[Type[Event], ...]]:
+    """The event classes an ``AdminTextMessage`` delta may be parsed to."""
+    type_ = data.get("type")
+    if type_ not in DELTA_TYPE_PARSERS:
+        return (UnknownEvent,)
+    return DELTA_TYPE_EVENTS.get(type_)
+
+
 def parse_admin_message(session, data):
-    type_ = data["type"]
-    if type_ == "change_thread_theme":
-        return ColorSet._parse(session, data)
-    elif type_ == "change_thread_icon":
-        return EmojiSet._parse(session, data)
-    elif type_ == "change_thread_nickname":
-        return NicknameSet._parse(session, data)
-    elif type_ == "change_thread_admins":
-        event_type = data["untypedData"]["ADMIN_EVENT"]
-        if event_type == "add_admin":
-            return AdminsAdded._parse(session, data)
-        elif event_type == "remove_admin":
-            return AdminsRemoved._parse(session, data)
-        else:
-            pass
-    elif type_ == "change_thread_approval_mode":
-        return ApprovalModeSet._parse(session, data)
-    elif type_ == "instant_game_update":
-        pass  # TODO: This
-    elif type_ == "messenger_call_log":  # Previously "rtc_call_log"
-        event_type = data["untypedData"]["event"]
-        if event_type == "group_call_started":
-            return CallStarted._parse(session, data)
-        elif event_type in ["group_call_ended", "one_on_one_call_ended"]:
-            return CallEnded._parse(session, data)
-        else:
-            pass
-    elif type_ == "participant_joined_group_call":
-        return CallJoined._parse(session, data)
-    elif type_ == "group_poll":
-        event_type = data["untypedData"]["event_type"]
-        if event_type == "question_creation":
-            return PollCreated._parse(session, data)
-        elif event_type == "update_vote":
-            return PollVoted._parse(session, data)
-        else:
-            pass
-    elif type_ == "lightweight_event_create":
-        return PlanCreated._parse(session, data)
-    elif type_ == "lightweight_event_notify":
-        return PlanEnded._parse(session, data)
-    elif type_ == "lightweight_event_update":
-        return PlanEdited._parse(session, data)
-    elif type_ == "lightweight_event_delete":
-        return PlanDeleted._parse(session, data)
-    elif type_ == "lightweight_event_rsvp":
-        return PlanResponded._parse(session, data)
-    return UnknownEvent(source="Delta type", data=data)
+    parser = DELTA_TYPE_PARSERS.get(data["type"])
+    if parser is None:
+        return UnknownEvent(source="Delta type", data=data)
+    return parser(session, data)
@@ -28,6 +28,16 @@ class HTTPError(FacebookError):
         return "Got {} response: {}".format(self.status_code, self.message)
 
 
+@attr.s(slots=True, auto_exc=True)
+class RequestTimeout(HTTPError):
+    """Raised when a request, or a `Deadline`, timed out."""
+
+
+@attr.s(slots=True, auto_exc=True)
+class ConnectionFailed(HTTPError):
+    """Raised when the connection to Facebook failed, e.g. it couldn't be opened."""
+
+
 @attr.s(slots=True, auto_exc=True)
 class ParseError(FacebookError):
     """Raised when we fail parsing a response from Facebook.
@@ -151,15 +161,16 @@ def handle_http_error(code):
 
 
 def handle_requests_error(e):
+    # Checked first, since connection timeouts are also connection errors
+    if isinstance(e, requests.Timeout):
+        raise RequestTimeout("Request timed out") from e
     if isinstance(e, requests.ConnectionError):
-        raise HTTPError("Connection error") from e
+        raise ConnectionFailed("Connection error") from e
     if isinstance(e, requests.HTTPError):
         pass  # Raised when using .raise_for_status, so should never happen
     if isinstance(e, requests.URLRequired):
         pass  # Should never happen, we always prove valid URLs
     if isinstance(e, requests.TooManyRedirects):
         pass  # TODO: Consider using allow_redirects=False to prevent this
-    if isinstance(e, requests.Timeout):
-        pass  # Should never happen, we don't set timeouts
 
     raise HTTPError("Requests error") from e
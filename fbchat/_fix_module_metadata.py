@@ -11,7 +11,7 @@ Having the public path in .__module__ attributes is important for:
 import os
 
 
-def fixup_module_metadata(namespace):
+def fixup_module_metadata(namespace, module="fbchat"):
     def fix_one(qualname, name, obj):
         # Custom extension, to handle classmethods, staticmethods and properties
         if isinstance(obj, (classmethod, staticmethod)):
@@ -20,8 +20,8 @@ def fixup_module_metadata(namespace):
             obj = obj.fget
 
         mod = getattr(obj, "__module__", None)
-        if mod is not None and mod.startswith("fbchat."):
-            obj.__module__ = "fbchat"
+        if mod is not None and mod.startswith(module + "."):
+            obj.__module__ = module
             # Modules, unlike everything else in Python, put fully-qualitied
             # names into their __name__ attribute. We check for "." to avoid
             # rewriting these.
@@ -42,4 +42,4 @@ def fixup_module_metadata(namespace):
 # This is done so that Sphinx autodoc can detect the file's source
 # TODO: Find a better way to detect when we're running Sphinx!
 if os.environ.get("_FBCHAT_DISABLE_FIX_MODULE_METADATA") == "1":
-    fixup_module_metadata = lambda namespace: None
+    fixup_module_metadata = lambda namespace, module="fbchat": None
@@ -1,27 +1,9 @@
-import json
-import re
-from ._common import log
-from . import _util, _exception
+import attr
+from ._common import log, attrs_default, kw_only
+from . import _util, _json, _exception
+from ._json import ConcatJSONDecoder
 
-# Shameless copy from https://stackoverflow.com/a/8730674
-FLAGS = re.VERBOSE | re.MULTILINE | re.DOTALL
-WHITESPACE = re.compile(r"[ \t\n\r]*", FLAGS)
-
-
-class ConcatJSONDecoder(json.JSONDecoder):
-    def decode(self, s, _w=WHITESPACE.match):
-        s_len = len(s)
-
-        objs = []
-        end = 0
-        while end != s_len:
-            obj, end = self.raw_decode(s, idx=_w(s, end).end())
-            end = _w(s, end).end()
-            objs.append(obj)
-        return objs
-
-
-# End shameless copy
+from typing import Any, Iterable, Iterator, Optional, Sequence, Tuple
 
 
 def queries_to_json(*queries):
@@ -34,25 +16,142 @@ def queries_to_json(*queries):
     return _util.json_minimal(rtn)
 
 
+def queries_to_data(*queries):
+    """Form data to send the queries to ``/api/graphqlbatch/``."""
+    return {
+        "method": "GET",
+        "response_format": "json",
+        "queries": queries_to_json(*queries),
+    }
+
+
+@attrs_default
+class QueryResult:
+    """The result of one of the queries in a ``/api/graphqlbatch/`` request.
+
+    Failed queries don't affect the rest of the batch, so only they need to be retried.
+    """
+
+    #: The index of the query in the batch
+    index = attr.ib(type=int)
+    #: The data returned by the query, if it succeeded
+    data = attr.ib(None, type=Any)
+    #: The error, if the query failed
+    error = attr.ib(None, type=Optional[_exception.GraphQLError])
+
+    def get(self) -> Any:
+        """Return the data, or raise the error if the query failed."""
+        if self.error is not None:
+            raise self.error
+        return self.data
+
+
+def parse_result(x) -> Optional[QueryResult]:
+    """Parse one of the objects in a ``/api/graphqlbatch/`` response.
+
+    Errors affecting the whole request, e.g. `NotLoggedIn`, are still raised.
+
+    Returns:
+        The query's result, or ``None`` for the trailing summary.
+    """
+    if "error_results" in x:
+        return None
+    _exception.handle_payload_error(x)
+    [(key, value)] = x.items()
+    index = int(key[1:])
+    try:
+        _exception.handle_graphql_errors(value)
+    except _exception.GraphQLError as e:
+        return QueryResult(index=index, error=e)
+    if "response" in value:
+        return QueryResult(index=index, data=value["response"])
+    else:
+        return QueryResult(index=index, data=value["data"])
+
+
+@attr.s(slots=True, kw_only=kw_only, eq=False)
+class ResponseParser:
+    """Incrementally parse a ``/api/graphqlbatch/`` response, while it's downloading.
+
+    Each query's result is returned as soon as it has been received, so it can be
+    handled before the rest of the batch arrives.
+    """
+
+    _parser = attr.ib(factory=_json.ConcatParser, init=False, type=_json.ConcatParser)
+    #: Whether any text has been received
+    _received = attr.ib(False, init=False, type=bool)
+    #: Whether the cruft preceeding the JSON has been stripped
+    _started = attr.ib(False, init=False, type=bool)
+
+    def _parse(self, values):
+        rtn = []
+        for x in values:
+            result = parse_result(x)
+            if result is not None:
+                rtn.append(result)
+        return rtn
+
+    def feed(self, text: str) -> Sequence[QueryResult]:
+        """Add text, and return the results completed by it."""
+        self._received = self._received or len(text) > 0
+        if not self._started:
+            # Usually only needed in some error cases
+            try:
+                text = text[text.index("{") :]
+            except ValueError:
+                return []
+            self._started = True
+        try:
+            values = self._parser.feed(text)
+        except ValueError as e:
+            raise _exception.ParseError("Error while parsing JSON", data=text) from e
+        return self._parse(values)
+
+    def close(self) -> Sequence[QueryResult]:
+        """Parse the remaining text, and return the last results."""
+        if not self._received:
+            raise _exception.HTTPError("Error when sending request: Got empty response")
+        if not self._started:
+            raise _exception.ParseError("No JSON object found", data=None)
+        try:
+            values = self._parser.close()
+        except ValueError as e:
+            raise _exception.ParseError("Error while parsing JSON", data=None) from e
+        return self._parse(values)
+
+
+def iter_results(chunks: Iterable[str]) -> Iterator[QueryResult]:
+    """Parse a ``/api/graphqlbatch/`` response from chunks of text as they arrive.
+
+    Yields:
+        Each query's result, in the order they're received
+    """
+    parser = ResponseParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+def iter_response(chunks: Iterable[str]) -> Iterator[Tuple[int, Any]]:
+    """Like `iter_results`, but yield ``(index, data)``, and raise failed queries."""
+    for result in iter_results(chunks):
+        yield result.index, result.get()
+
+
 def response_to_json(text):
     text = _util.strip_json_cruft(text)  # Usually only needed in some error cases
     try:
-        j = json.loads(text, cls=ConcatJSONDecoder)
+        j = _json.loads_concat(text)
     except Exception as e:
         raise _exception.ParseError("Error while parsing JSON", data=text) from e
 
     rtn = [None] * (len(j))
     for x in j:
-        if "error_results" in x:
+        result = parse_result(x)
+        if result is None:
             del rtn[-1]
             continue
-        _exception.handle_payload_error(x)
-        [(key, value)] = x.items()
-        _exception.handle_graphql_errors(value)
-        if "response" in value:
-            rtn[int(key[1:])] = value["response"]
-        else:
-            rtn[int(key[1:])] = value["data"]
+        rtn[result.index] = result.get()
 
     log.debug(rtn)
 
@@ -0,0 +1,252 @@
+"""JSON encoding and decoding, using the fastest available library.
+
+Facebook sends a lot of JSON, so decoding it is usually what fbchat spends most of
+its time on. `orjson <https://github.com/ijl/orjson>`__ or
+`ujson <https://github.com/ultrajson/ultrajson>`__ are used when installed, with a
+fallback to the standard library's `json` module.
+"""
+import attr
+import json
+import re
+from ._common import log, attrs_default, kw_only
+
+from typing import Any, Callable, List, Optional, Sequence, Tuple, Union
+
+
+# Shameless copy from https://stackoverflow.com/a/8730674
+FLAGS = re.VERBOSE | re.MULTILINE | re.DOTALL
+WHITESPACE = re.compile(r"[ \t\n\r]*", FLAGS)
+
+
+class ConcatJSONDecoder(json.JSONDecoder):
+    def decode(self, s, _w=WHITESPACE.match):
+        s_len = len(s)
+
+        objs = []
+        end = 0
+        while end != s_len:
+            obj, end = self.raw_decode(s, idx=_w(s, end).end())
+            end = _w(s, end).end()
+            objs.append(obj)
+        return objs
+
+
+# End shameless copy
+
+_DECODER = json.JSONDecoder()
+_CONCAT_DECODER = ConcatJSONDecoder()
+
+#: Pretty-printed values spanning more lines than this are left to the stdlib
+MAX_VALUE_LINES = 16
+
+
+@attrs_default
+class Backend:
+    """A library used to encode and decode JSON."""
+
+    #: Name of the library
+    name = attr.ib(type=str)
+    #: Parse JSON from a string or UTF-8 encoded bytes
+    loads = attr.ib(type=Callable[[Union[str, bytes]], Any])
+    #: Encode data as minimal JSON
+    dumps = attr.ib(type=Callable[[Any], str])
+
+
+def _stdlib_loads(data):
+    if isinstance(data, memoryview):
+        # The json module doesn't support memoryview objects
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def _stdlib_dumps(data):
+    return json.dumps(data, separators=(",", ":"))
+
+
+STDLIB = Backend(name="json", loads=_stdlib_loads, dumps=_stdlib_dumps)
+
+
+def _stdlib() -> Backend:
+    return STDLIB
+
+
+def _orjson() -> Backend:
+    import orjson
+
+    def dumps(data):
+        return orjson.dumps(data).decode("utf-8")
+
+    return Backend(name="orjson", loads=orjson.loads, dumps=dumps)
+
+
+def _ujson() -> Backend:
+    import ujson
+
+    def loads(data):
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return ujson.loads(data)
+
+    def dumps(data):
+        return ujson.dumps(data, escape_forward_slashes=False)
+
+    return Backend(name="ujson", loads=loads, dumps=dumps)
+
+
+#: Supported backends, in order of preference
+BACKENDS = {"orjson": _orjson, "ujson": _ujson, "json": _stdlib}
+
+_backend = STDLIB
+
+
+def get_backend() -> Backend:
+    """The backend currently in use."""
+    return _backend
+
+
+def set_backend(name: Optional[str] = None) -> Backend:
+    """Select the library used to encode and decode JSON.
+
+    By default, the fastest installed library is used, so this is mostly useful to
+    force a specific one, e.g. when comparing their performance.
+
+    Args:
+        name: One of ``"orjson"``, ``"ujson"`` or ``"json"``. If ``None``, the first
+            of those that's installed will be used.
+
+    Example:
+        >>> fbchat.set_json_backend("json")
+    """
+    global _backend
+
+    if name is not None:
+        try:
+            factory = BACKENDS[name]
+        except KeyError:
+            raise ValueError("Unknown JSON backend: {}".format(name)) from None
+        _backend = factory()
+        return _backend
+
+    for name, factory in BACKENDS.items():
+        try:
+            _backend = factory()
+        except ImportError:
+            continue
+        log.debug("Using %s to handle JSON", name)
+        return _backend
+    raise RuntimeError("Unreachable, the json module is always available")
+
+
+def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+    """Parse JSON from a string or UTF-8 encoded bytes.
+
+    Raises:
+        ValueError: If the data is not valid JSON
+    """
+    try:
+        return _backend.loads(data)
+    except ValueError:
+        if _backend is STDLIB:
+            raise
+        # The faster libraries are stricter than the json module, e.g. they reject
+        # unpaired surrogates, so we let it have the final say
+        return _stdlib_loads(data)
+
+
+def dumps(data: Any) -> str:
+    """Encode data as minimal JSON."""
+    return _backend.dumps(data)
+
+
+def raw_decode(text: str, idx: int = 0) -> Tuple[Any, int]:
+    """Parse a JSON value at the start of ``text``, ignoring what follows it.
+
+    None of the faster libraries support this, so it always uses the json module.
+
+    Returns:
+        The parsed value, and the index where it ended
+    """
+    return _DECODER.raw_decode(text, idx)
+
+
+@attr.s(slots=True, kw_only=kw_only, eq=False)
+class ConcatParser:
+    """Incrementally parse several concatenated JSON values, e.g. while downloading.
+
+    Facebook puts each value on a separate line, so values are parsed as soon as their
+    last line has been received. A line can't end in the middle of a JSON string, and
+    a value's first lines are never valid JSON by themselves, so the result is the same
+    as with `ConcatJSONDecoder`, which is used for anything that's formatted otherwise.
+    """
+
+    #: Chunks of the unfinished last line, joined once the line is complete
+    _partial = attr.ib(factory=list, init=False, type=List[str])
+    #: Lines of a value that's pretty-printed across multiple lines
+    _lines = attr.ib(factory=list, init=False, type=List[str])
+    #: The remaining text, if it's not one value per line
+    _rest = attr.ib(None, init=False, type=Optional[List[str]])
+
+    def feed(self, text: str) -> Sequence[Any]:
+        """Add text, and return the values that were completed by it.
+
+        Raises:
+            ValueError: If the data is not valid JSON
+        """
+        if self._rest is not None:
+            self._rest.append(text)
+            return []
+
+        if "\n" not in text:
+            self._partial.append(text)
+            return []
+        # Only the new text is split, so long lines aren't copied for every chunk
+        lines = text.split("\n")
+        self._partial.append(lines[0])
+        lines[0] = "".join(self._partial)
+        self._partial = [lines.pop()]
+        values = []
+        for i, line in enumerate(lines):
+            if not self._lines and not line.strip():
+                continue
+            self._lines.append(line)
+            try:
+                value = _backend.loads("\n".join(self._lines))
+            except ValueError:
+                if len(self._lines) >= MAX_VALUE_LINES:
+                    self._rest = ["\n".join(self._lines + lines[i + 1 :] + [""])]
+                    self._lines = []
+                    break
+                # The value is pretty-printed across multiple lines, add the next one
+                continue
+            values.append(value)
+            self._lines = []
+        return values
+
+    def close(self) -> Sequence[Any]:
+        """Parse the remaining text, after all of it has been added.
+
+        Raises:
+            ValueError: If the data is not valid JSON
+        """
+        partial = "".join(self._partial)
+        if self._rest is not None:
+            text = "".join(self._rest + [partial])
+        else:
+            text = "\n".join(self._lines + [partial])
+        self._partial, self._lines, self._rest = [], [], None
+        return _CONCAT_DECODER.decode(text)
+
+
+def loads_concat(text: str) -> Sequence[Any]:
+    """Parse several concatenated JSON values, e.g. a ``graphqlbatch`` response.
+
+    Raises:
+        ValueError: If the data is not valid JSON
+    """
+    if _backend is STDLIB:
+        return _CONCAT_DECODER.decode(text)
+    parser = ConcatParser()
+    return [*parser.feed(text), *parser.close()]
+
+
+set_backend()
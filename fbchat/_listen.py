@@ -1,11 +1,14 @@
 import attr
+import collections
+import datetime
+import enum
 import random
 import paho.mqtt.client
 import requests
 from ._common import log, kw_only
-from . import _util, _exception, _session, _graphql, _events
+from . import _util, _exception, _session, _graphql, _events, _checkpoint, _backfill
 
-from typing import Iterable, Optional, Mapping, List
+from typing import Iterable, Optional, Mapping, List, Tuple, Deque, Union, Any
 
 
 HOST = "edge-chat.messenger.com"
@@ -48,6 +51,139 @@ TOPICS = [
 ]
 
 
+class TopicPreset(enum.Enum):
+    """Common sets of MQTT topics, see the ``topics`` argument of `Listener`."""
+
+    #: Only things that happen in chats, like messages and reactions
+    MESSAGES = ("/t_ms",)
+    #: Messages, and typing notifications
+    MESSAGES_AND_TYPING = ("/t_ms", "/thread_typing", "/orca_typing_notifications")
+    #: Every known topic, including presence updates and old, inactive topics
+    ALL = tuple(TOPICS)
+
+
+#: Topics whose payloads only describe a passing state, like typing and presence, so
+#: losing some of them is harmless. Other payloads are only dropped as a last resort
+LOSSY_TOPICS = frozenset(
+    ["/thread_typing", "/orca_typing_notifications", "/orca_presence"]
+)
+
+
+def to_topics(value) -> Tuple[str, ...]:
+    if isinstance(value, TopicPreset):
+        return value.value
+    return tuple(value)
+
+
+class OverflowPolicy(enum.Enum):
+    """What the `Listener` does when its queue of unparsed payloads is full.
+
+    The drop policies only discard typing and presence payloads, if there are any.
+    If a ``/t_ms`` payload has to be discarded, the listener resynchronizes, like
+    after losing its connection for too long, and backfills the lost messages if
+    ``backfill`` is set.
+    """
+
+    #: Stop reading from the connection until the queue has room again
+    PAUSE = "pause"
+    #: Discard the oldest payload in the queue
+    DROP_OLDEST = "drop_oldest"
+    #: Discard the newly received payload
+    DROP_NEWEST = "drop_newest"
+
+
+@attr.s(slots=True, kw_only=kw_only)
+class ListenerStats:
+    """Counters describing the `Listener`'s queue of unparsed payloads.
+
+    Useful for sizing the queue, see the ``max_queue_size`` argument of `Listener`.
+    """
+
+    #: Number of payloads received from the MQTT connection
+    received = attr.ib(0, type=int)
+    #: Number of payloads that have been parsed
+    parsed = attr.ib(0, type=int)
+    #: Number of payloads discarded because the queue was full
+    dropped = attr.ib(0, type=int)
+    #: Number of times reading was paused because the queue was full
+    paused = attr.ib(0, type=int)
+    #: Number of payloads currently waiting to be parsed
+    queue_depth = attr.ib(0, type=int)
+    #: The highest number of payloads that have been waiting at once
+    max_queue_depth = attr.ib(0, type=int)
+
+
+@attr.s(slots=True, kw_only=kw_only, eq=False)
+class PayloadQueue:
+    """Bounded FIFO queue of raw MQTT payloads, waiting to be parsed."""
+
+    maxsize = attr.ib(type=int)
+    policy = attr.ib(type=OverflowPolicy)
+    stats = attr.ib(factory=ListenerStats, type=ListenerStats)
+    _items = attr.ib(factory=collections.deque, type=Deque[Tuple[str, bytes]])
+    #: Set when a ``/t_ms`` payload was dropped, so the listener must resynchronize
+    overflowed = attr.ib(False, init=False, type=bool)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def full(self) -> bool:
+        return len(self._items) >= self.maxsize
+
+    def _drop(self, index: int) -> None:
+        topic, _ = self._items[index]
+        del self._items[index]
+        self._dropped(topic)
+
+    def _dropped(self, topic: str) -> None:
+        self.stats.dropped += 1
+        log.warning("Listener queue full, dropping payload on %s", topic)
+        if topic == "/t_ms":
+            self.overflowed = True
+
+    def _find_lossy(self, newest: bool) -> Optional[int]:
+        indexes = range(len(self._items))
+        for i in reversed(indexes) if newest else indexes:
+            if self._items[i][0] in LOSSY_TOPICS:
+                return i
+        return None
+
+    def put(self, topic: str, payload: bytes) -> None:
+        self.stats.received += 1
+        if self.full() and self.policy != OverflowPolicy.PAUSE:
+            newest = self.policy == OverflowPolicy.DROP_NEWEST
+            if newest and topic in LOSSY_TOPICS:
+                self._dropped(topic)
+                return
+            index = self._find_lossy(newest)
+            if index is not None:
+                self._drop(index)
+            elif topic in LOSSY_TOPICS or newest:
+                self._dropped(topic)
+                return
+            else:
+                self._drop(0)
+        # With OverflowPolicy.PAUSE, the payload has already been read from the
+        # connection, so it's kept, and the reader stops before reading more
+
+        self._items.append((topic, payload))
+        self.stats.queue_depth = len(self._items)
+        if self.policy == OverflowPolicy.PAUSE and len(self._items) == self.maxsize:
+            self.stats.paused += 1
+        self.stats.max_queue_depth = max(
+            self.stats.max_queue_depth, self.stats.queue_depth
+        )
+
+    def get(self) -> Optional[Tuple[str, bytes]]:
+        """Pop the oldest payload, or return ``None`` if the queue is empty."""
+        if not self._items:
+            return None
+        item = self._items.popleft()
+        self.stats.queue_depth = len(self._items)
+        self.stats.parsed += 1
+        return item
+
+
 def get_cookie_header(session: requests.Session, url: str) -> str:
     """Extract a cookie header from a requests session."""
     # The cookies are extracted this way to make sure they're escaped correctly
@@ -79,8 +215,17 @@ def mqtt_factory() -> paho.mqtt.client.Client:
     return mqtt
 
 
-def fetch_sequence_id(session: _session.Session) -> int:
-    """Fetch sequence ID."""
+def parse_payload(topic: str, payload: Union[bytes, memoryview]) -> Any:
+    """Parse an MQTT payload as JSON, without decoding it to a string first."""
+    try:
+        return _util.parse_json(payload)
+    except _exception.ParseError as e:
+        raise _exception.ParseError(
+            "Failed parsing MQTT data on {} as JSON".format(topic), data=payload
+        ) from e
+
+
+def sequence_id_query():
     params = {
         "limit": 0,
         "tags": ["INBOX"],
@@ -88,25 +233,49 @@ def fetch_sequence_id(session: _session.Session) -> int:
         "includeDeliveryReceipts": False,
         "includeSeqID": True,
     }
-    log.debug("Fetching MQTT sequence ID")
     # Same doc id as in `Client.fetch_threads`
-    (j,) = session._graphql_requests(_graphql.from_doc_id("1349387578499440", params))
+    return _graphql.from_doc_id("1349387578499440", params)
+
+
+def parse_sequence_id(j) -> int:
     sequence_id = j["viewer"]["message_threads"]["sync_sequence_id"]
     if not sequence_id:
         raise _exception.NotLoggedIn("Failed fetching sequence id")
     return int(sequence_id)
 
 
+def fetch_sequence_id(session: _session.Session) -> int:
+    """Fetch sequence ID."""
+    log.debug("Fetching MQTT sequence ID")
+    (j,) = session._graphql_requests(sequence_id_query())
+    return parse_sequence_id(j)
+
+
 @attr.s(slots=True, kw_only=kw_only, eq=False)
 class Listener:
     """Listen to incoming Facebook events.
 
     Initialize a connection to the Facebook MQTT service.
 
+    Received payloads are put in a bounded queue, and parsed in order while
+    listening, so a slow parse or a slow consumer doesn't stall the connection.
+
     Args:
         session: The session to use when making requests.
         chat_on: Whether ...
         foreground: Whether ...
+        topics: The MQTT topics to subscribe to, either a `TopicPreset` or a list
+            of topics. Facebook won't send data on other topics, which saves
+            bandwidth. ``/t_ms`` is required to receive messages.
+        max_queue_size: The maximum number of payloads waiting to be parsed.
+        overflow_policy: What to do when more payloads are waiting.
+        checkpoint_store: Where to persist the listener's position, so that it can
+            resume from there after a restart, without missing events.
+        backfill: Whether to fetch the messages that were sent while the listener
+            lost its connection for too long. These are yielded as `MessageEvent`
+            objects, with ``recovered`` set. Messages sent while backfilling may be
+            yielded twice.
+        backfill_concurrency: How many threads to fetch messages from at once.
 
     Example:
         >>> listener = fbchat.Listener(session, chat_on=True, foreground=True)
@@ -118,13 +287,68 @@ class Listener:
     _mqtt = attr.ib(factory=mqtt_factory, type=paho.mqtt.client.Client)
     _sync_token = attr.ib(None, type=Optional[str])
     _sequence_id = attr.ib(None, type=Optional[int])
-    _tmp_events = attr.ib(factory=list, type=List[_events.Event])
+    _topics = attr.ib(TopicPreset.ALL, converter=to_topics, type=Tuple[str, ...])
+    _max_queue_size = attr.ib(1000, type=int)
+    _overflow_policy = attr.ib(OverflowPolicy.PAUSE, type=OverflowPolicy)
+    _checkpoint_store = attr.ib(None, type=Optional[_checkpoint.CheckpointStore])
+    _backfill = attr.ib(False, type=bool)
+    _backfill_concurrency = attr.ib(4, type=int)
+    _payloads = attr.ib(init=False, type=PayloadQueue)
+    _checkpoint = attr.ib(None, init=False, type=Optional[_checkpoint.Checkpoint])
+    #: When the last handled event happened
+    _watermark = attr.ib(None, init=False, type=Optional[datetime.datetime])
+    #: Set when events were lost, and should be backfilled
+    _backfill_since = attr.ib(None, init=False, type=Optional[datetime.datetime])
+    _filter = attr.ib(None, init=False, type=Optional[_events.EventFilter])
+
+    @_payloads.default
+    def _payloads_default(self):
+        return PayloadQueue(maxsize=self._max_queue_size, policy=self._overflow_policy)
+
+    @property
+    def stats(self) -> ListenerStats:
+        """Counters for the queue of payloads waiting to be parsed."""
+        return self._payloads.stats
 
     def __attrs_post_init__(self):
         # Configure callbacks
         self._mqtt.on_message = self._on_message_handler
         self._mqtt.on_connect = self._on_connect_handler
 
+    def _load_checkpoint(self) -> None:
+        if self._checkpoint_store is None or self._sync_token is not None:
+            return
+        self._checkpoint = self._checkpoint_store.load()
+        if self._checkpoint:
+            log.debug("Resuming MQTT listener from %s", self._checkpoint)
+            self._sync_token = self._checkpoint.sync_token
+            self._sequence_id = self._checkpoint.sequence_id
+            self._watermark = self._checkpoint.at
+
+    def _save_checkpoint(self) -> None:
+        if self._checkpoint_store is None:
+            return
+        if self._sync_token is None or self._sequence_id is None:
+            checkpoint = None
+        else:
+            checkpoint = _checkpoint.Checkpoint(
+                sync_token=self._sync_token,
+                sequence_id=self._sequence_id,
+                at=self._watermark,
+            )
+        if checkpoint == self._checkpoint:
+            return
+        if checkpoint:
+            self._checkpoint_store.save(checkpoint)
+        else:
+            self._checkpoint_store.clear()
+        self._checkpoint = checkpoint
+
+    def _handled(self, event: _events.Event) -> None:
+        at = getattr(event, "at", None)
+        if at is not None and (self._watermark is None or at > self._watermark):
+            self._watermark = at
+
     def _handle_ms(self, j):
         """Handle /t_ms special logic.
 
@@ -152,9 +376,7 @@ class Listener:
                     "The MQTT listener was disconnected for too long,"
                     " events may have been lost"
                 )
-                # TODO: Find a way to tell the user that they may now be missing events
-                self._sync_token = None
-                self._sequence_id = None
+                self._resync()
                 return False
             log.error("MQTT error code %s received", error)
             return False
@@ -164,28 +386,57 @@ class Listener:
         self._sequence_id = j["lastIssuedSeqId"]
         return True
 
-    def _on_message_handler(self, client, userdata, message):
-        # Parse payload JSON
+    def _resync(self) -> None:
+        """Create a new messenger queue, after events may have been lost."""
+        if self._backfill:
+            self._backfill_since = self._watermark
+        self._sync_token = None
+        self._sequence_id = None
+
+    def _check_overflow(self) -> None:
+        if self._payloads.overflowed:
+            self._payloads.overflowed = False
+            log.error("The listener's queue was full, events may have been lost")
+            self._resync()
+
+    def _parse_message(self, topic: str, payload: bytes) -> List[_events.Event]:
+        # /t_ms is always parsed, since it's needed to keep track of the sequence ID
+        if self._filter and topic != "/t_ms" and not self._filter._accepts_topic(topic):
+            return []
+
         try:
-            j = _util.parse_json(message.payload.decode("utf-8"))
-        except (_exception.FacebookError, UnicodeDecodeError):
-            log.debug(message.payload)
-            log.exception("Failed parsing MQTT data on %s as JSON", message.topic)
-            return
+            j = parse_payload(topic, payload)
+        except _exception.ParseError:
+            log.debug(payload)
+            log.exception("Failed parsing MQTT data")
+            return []
 
-        log.debug("MQTT payload: %s, %s", message.topic, j)
+        log.debug("MQTT payload: %s, %s", topic, j)
 
-        if message.topic == "/t_ms":
+        if topic == "/t_ms":
             if not self._handle_ms(j):
-                return
+                return []
 
         try:
-            # TODO: Don't handle this in a callback
-            self._tmp_events = list(
-                _events.parse_events(self.session, message.topic, j)
+            return list(
+                _events.parse_events(self.session, topic, j, filter=self._filter)
             )
         except _exception.ParseError:
             log.exception("Failed parsing MQTT data")
+            return []
+
+    def _on_message_handler(self, client, userdata, message):
+        # Parsing is done while listening, to keep the network callback fast
+        self._payloads.put(message.topic, message.payload)
+
+    def _paused(self) -> bool:
+        return self._overflow_policy == OverflowPolicy.PAUSE and self._payloads.full()
+
+    def _poll(self, timeout: float) -> int:
+        if self._paused():
+            # Don't read, but keep the connection alive
+            return self._mqtt.loop_misc()
+        return self._mqtt.loop(timeout=timeout)
 
     def _on_connect_handler(self, client, userdata, flags, rc):
         if rc == 21:
@@ -241,7 +492,7 @@ class Listener:
             # Application ID, taken from facebook.com
             "aid": 219994525426954,
             # MQTT extension by FB, allows making a SUBSCRIBE while CONNECTing
-            "st": TOPICS,
+            "st": list(self._topics),
             # MQTT extension by FB, allows making a PUBLISH while CONNECTing
             # Using this is more efficient, but the same can be acheived with:
             #     def on_connect(*args):
@@ -270,9 +521,7 @@ class Listener:
         self._mqtt.username_pw_set(_util.json_minimal(username))
 
         headers = {
-            "Cookie": get_cookie_header(
-                self.session._session, "https://edge-chat.messenger.com/chat"
-            ),
+            "Cookie": self._get_cookie_header("https://edge-chat.messenger.com/chat"),
             "User-Agent": self.session._session.headers["User-Agent"],
             "Origin": "https://www.messenger.com",
             "Host": HOST,
@@ -283,6 +532,9 @@ class Listener:
             path="/chat?sid={}".format(session_id), headers=headers
         )
 
+    def _get_cookie_header(self, url: str) -> str:
+        return get_cookie_header(self.session._session, url)
+
     def _reconnect(self) -> bool:
         # Try reconnecting
         self._configure_connect_options()
@@ -300,7 +552,7 @@ class Listener:
             self._mqtt._reconnect_wait()
             return False
 
-    def listen(self) -> Iterable[_events.Event]:
+    def listen(self, filter: _events.EventFilter = None) -> Iterable[_events.Event]:
         """Run the listening loop continually.
 
         This is a blocking call, that will yield events as they arrive.
@@ -308,12 +560,20 @@ class Listener:
         This will automatically reconnect on errors, except if the errors are one of
         `PleaseRefresh` or `NotLoggedIn`.
 
+        Args:
+            filter: Only parse and yield the selected events. `Connect` and
+                `Disconnect` events are always yielded.
+
         Example:
             Print events continually.
 
             >>> for event in listener.listen():
             ...     print(event)
         """
+        self._filter = filter
+        self._load_checkpoint()
+        if self._watermark is None:
+            self._watermark = _util.now()
         if self._sequence_id is None:
             self._sequence_id = fetch_sequence_id(self.session)
 
@@ -324,14 +584,30 @@ class Listener:
         yield _events.Connect()
 
         while True:
-            rc = self._mqtt.loop(timeout=1.0)
+            # Don't wait for network events if there are payloads to parse
+            rc = self._poll(timeout=0 if self._payloads else 1.0)
 
-            # The sequence ID was reset in _handle_ms
+            self._check_overflow()
+            # The sequence ID was reset in _handle_ms or _check_overflow
             # TODO: Signal to the user that they should reload their data!
             if self._sequence_id is None:
                 self._sequence_id = fetch_sequence_id(self.session)
                 self._messenger_queue_publish()
 
+                if self._backfill_since:
+                    since, self._backfill_since = self._backfill_since, None
+                    # Keep reading from the connection, so it isn't dropped while
+                    # the messages are fetched. Errors are handled afterwards
+                    for event in _backfill.backfill(
+                        self.session,
+                        since,
+                        self._backfill_concurrency,
+                        poll=lambda: self._poll(timeout=0),
+                    ):
+                        if self._filter is None or self._filter._accepts_event(event):
+                            yield event
+                        self._handled(event)
+
             # If disconnect() has been called
             # Beware, internal API, may have to change this to something more stable!
             if self._mqtt._state == paho.mqtt.client.mqtt_cs_disconnecting:
@@ -358,9 +634,16 @@ class Listener:
 
                 yield _events.Connect()
 
-            if self._tmp_events:
-                yield from self._tmp_events
-                self._tmp_events = []
+            # Parse one payload at a time, so that reading from the connection and
+            # sending keepalives are interleaved with parsing
+            item = self._payloads.get()
+            if item is not None:
+                for event in self._parse_message(*item):
+                    yield event
+                    self._handled(event)
+                # Only persist the position once the events have been handled
+                if item[0] == "/t_ms":
+                    self._save_checkpoint()
 
     def disconnect(self) -> None:
         """Disconnect the MQTT listener.
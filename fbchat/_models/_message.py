@@ -1,11 +1,12 @@
 import attr
+import bisect
 import datetime
 import enum
 from string import Formatter
 from . import _attachment, _location, _file, _quick_reply, _sticker
 from .._common import log, attrs_default
 from .. import _exception, _util
-from typing import Optional, Mapping, Sequence, Any
+from typing import Optional, Mapping, Sequence, Any, Iterable
 
 
 class EmojiSize(enum.Enum):
@@ -224,7 +225,8 @@ class MessageSnippet(Message):
 
     #: ID of the sender
     author = attr.ib(type=str)
-    #: When the message was sent
+    #: When the message was sent. A `LazyDatetime` if the session has lazy timestamps
+    #: enabled, see `Session.enable_lazy_timestamps`.
     created_at = attr.ib(type=datetime.datetime)
     #: The actual message
     text = attr.ib(type=str)
@@ -237,12 +239,40 @@ class MessageSnippet(Message):
             thread=thread,
             id=data["message_id"],
             author=data["author"].rstrip("fbid:"),
-            created_at=_util.millis_to_datetime(data["timestamp"]),
+            created_at=_util.millis_to_datetime(data["timestamp"], thread.session),
             text=data["body"],
             matched_keywords={int(k): v for k, v in data["matched_keywords"].items()},
         )
 
 
+@attrs_default
+class ReadReceipts:
+    """The read receipts of a page of messages, sorted by when they were read.
+
+    Parsed once per page, so each message's readers can be found with a binary search,
+    instead of comparing every receipt with every message.
+    """
+
+    #: When each user last read the thread, in milliseconds, in ascending order
+    watermarks = attr.ib(type=Sequence[int])
+    #: The IDs of the users, in the same order as ``watermarks``
+    user_ids = attr.ib(type=Sequence[str])
+
+    def read_by(self, timestamp: int) -> Sequence[str]:
+        """The IDs of the users who've read a message sent at ``timestamp``."""
+        return self.user_ids[bisect.bisect_left(self.watermarks, timestamp) :]
+
+    @classmethod
+    def _from_graphql(cls, data: Iterable[Any]):
+        receipts = sorted(
+            (int(receipt["watermark"]), receipt["actor"]["id"]) for receipt in data
+        )
+        return cls(
+            watermarks=[watermark for watermark, _ in receipts],
+            user_ids=[user_id for _, user_id in receipts],
+        )
+
+
 @attrs_default
 class MessageData(Message):
     """Represents data in a Facebook message.
@@ -252,7 +282,8 @@ class MessageData(Message):
 
     #: ID of the sender
     author = attr.ib(type=str)
-    #: When the message was sent
+    #: When the message was sent. A `LazyDatetime` if the session has lazy timestamps
+    #: enabled, see `Session.enable_lazy_timestamps`.
     created_at = attr.ib(type=datetime.datetime)
     #: The actual message
     text = attr.ib(None, type=Optional[str])
@@ -304,8 +335,11 @@ class MessageData(Message):
         if data.get("message") is None:
             data["message"] = {}
         tags = data.get("tags_list")
+        if read_receipts is not None and not isinstance(read_receipts, ReadReceipts):
+            read_receipts = ReadReceipts._from_graphql(read_receipts)
 
-        created_at = _util.millis_to_datetime(int(data.get("timestamp_precise")))
+        timestamp = int(data.get("timestamp_precise"))
+        created_at = _util.millis_to_datetime(timestamp, thread.session)
 
         attachments = [
             _file.graphql_to_attachment(attachment)
@@ -337,11 +371,7 @@ class MessageData(Message):
             ],
             emoji_size=EmojiSize._from_tags(tags),
             is_read=not data["unread"] if data.get("unread") is not None else None,
-            read_by=[
-                receipt["actor"]["id"]
-                for receipt in read_receipts or ()
-                if _util.millis_to_datetime(int(receipt["watermark"])) >= created_at
-            ],
+            read_by=read_receipts.read_by(timestamp) if read_receipts else [],
             reactions={
                 str(r["user"]["id"]): r["reaction"] for r in data["message_reactions"]
             },
@@ -385,7 +415,7 @@ class MessageData(Message):
             thread=thread,
             id=metadata.get("messageId"),
             author=str(metadata["actorFbId"]),
-            created_at=_util.millis_to_datetime(metadata["timestamp"]),
+            created_at=_util.millis_to_datetime(metadata["timestamp"], thread.session),
             text=data.get("body"),
             mentions=[
                 Mention._from_prng(m)
@@ -0,0 +1,88 @@
+import attr
+import requests
+from ._common import attrs_default
+
+from typing import List, Sequence
+
+#: Facebook hosts that get a separate connection pool by default, so they aren't
+#: affected by requests to other hosts, e.g. image downloads from the CDN
+POOL_HOSTS = ("www.messenger.com", "upload.messenger.com")
+
+
+@attrs_default
+class PoolConfig:
+    """Settings of a connection pool.
+
+    Example:
+        Keep up to 20 connections open to www.messenger.com, for use by many threads.
+
+        >>> config = fbchat.PoolConfig(size=20, block=True)
+        >>> session.set_pool_config(config, host="www.messenger.com")
+    """
+
+    #: The maximum number of connections kept open to each host
+    size = attr.ib(10, type=int)
+    #: Whether to wait for a connection to be returned to a full pool, instead of
+    #: opening a new one that's discarded after use. `fbchat.aio.Session` always waits.
+    block = attr.ib(False, type=bool)
+    #: Whether to reuse connections for several requests
+    keep_alive = attr.ib(True, type=bool)
+
+
+@attrs_default
+class PoolStats:
+    """Utilization of a connection pool to a host.
+
+    If ``connections`` keeps growing, connections aren't being reused, usually because
+    the pool is too small for the number of concurrent requests.
+    """
+
+    #: The host the pool connects to
+    host = attr.ib(type=str)
+    #: The maximum number of connections kept open
+    size = attr.ib(type=int)
+    #: Number of connections created. Connections closed by the server are reopened,
+    #: and not counted again.
+    connections = attr.ib(type=int)
+    #: Number of requests sent
+    requests = attr.ib(type=int)
+    #: Number of open connections waiting in the pool to be reused
+    idle = attr.ib(type=int)
+
+
+class PoolAdapter(requests.adapters.HTTPAdapter):
+    """A `requests` transport adapter, configured by a `PoolConfig`."""
+
+    __attrs__ = requests.adapters.HTTPAdapter.__attrs__ + ["pool_config"]
+
+    def __init__(self, pool_config: PoolConfig):
+        self.pool_config = pool_config
+        super().__init__(pool_maxsize=pool_config.size, pool_block=pool_config.block)
+
+    def add_headers(self, request, **kwargs):
+        if not self.pool_config.keep_alive:
+            request.headers["Connection"] = "close"
+
+    def get_stats(self) -> Sequence[PoolStats]:
+        """Utilization of the adapter's pools, one for each host it has connected to."""
+        rtn = []  # type: List[PoolStats]
+        for key in self.poolmanager.pools.keys():
+            pool = self.poolmanager.pools[key]
+            rtn.append(
+                PoolStats(
+                    host=pool.host,
+                    size=self.pool_config.size,
+                    connections=pool.num_connections,
+                    requests=pool.num_requests,
+                    # The queue is filled with `None` in place of unopened connections
+                    idle=sum(1 for conn in list(pool.pool.queue) if conn is not None),
+                )
+            )
+        return rtn
+
+
+def mount_adapters(session: requests.Session, pool_config: PoolConfig) -> None:
+    """Use separate connection pools for Facebook's hosts, and one for other hosts."""
+    session.mount("https://", PoolAdapter(pool_config))
+    for host in POOL_HOSTS:
+        session.mount("https://{}/".format(host), PoolAdapter(pool_config))
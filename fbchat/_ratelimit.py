@@ -0,0 +1,114 @@
+import attr
+import threading
+import time
+import urllib.parse
+from ._common import kw_only
+
+from typing import Dict, Mapping, Tuple
+
+#: Default limits of each endpoint family, as ``(requests per second, burst size)``
+DEFAULT_RATES = {
+    "send": (1.0, 5),
+    "graphql": (5.0, 20),
+    "mercury": (2.0, 10),
+    "other": (5.0, 20),
+}  # type: Mapping[str, Tuple[float, float]]
+
+
+def get_endpoint_family(url: str) -> str:
+    """Group endpoints that Facebook seems to throttle together."""
+    # Some endpoints, like uploads, are given as absolute URLs
+    path = urllib.parse.urlparse(url).path
+    if path.startswith("/messaging/send/"):
+        return "send"
+    if path.startswith("/api/graphqlbatch/"):
+        return "graphql"
+    if path.startswith(("/ajax/mercury/", "/mercury/")):
+        return "mercury"
+    return "other"
+
+
+@attr.s(slots=True, kw_only=kw_only, eq=False)
+class TokenBucket:
+    """Allows ``rate`` requests per second on average, in bursts of up to ``burst``.
+
+    Tokens can be reserved ahead of time, so callers waiting for the bucket to refill
+    are let through in the order they arrived.
+    """
+
+    #: The number of tokens added per second
+    rate = attr.ib(type=float)
+    #: The maximum number of tokens
+    burst = attr.ib(type=float)
+    _tokens = attr.ib(None, init=False, type=float)
+    _updated = attr.ib(None, init=False, type=float)
+    _lock = attr.ib(factory=threading.Lock, init=False, type=threading.Lock)
+
+    def __attrs_post_init__(self):
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+
+    def reserve(self, max_delay: float = None) -> float:
+        """Take a token, and return how long to wait before using it, in seconds.
+
+        If the wait would be ``max_delay`` or longer, the token isn't taken.
+        """
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._updated
+            self._tokens = min(self._tokens + elapsed * self.rate, self.burst)
+            self._updated = now
+            # Negative when others are already waiting, so we wait for them too
+            delay = max(1 - self._tokens, 0.0) / self.rate
+            if max_delay is None or delay < max_delay:
+                self._tokens -= 1
+            return delay
+
+
+@attr.s(slots=True, kw_only=kw_only, eq=False)
+class RateLimiter:
+    """Spreads out requests, to avoid being throttled by Facebook.
+
+    Requests are grouped into the endpoint families ``"send"``, ``"graphql"``,
+    ``"mercury"`` and ``"other"``, each limited by a separate `TokenBucket`. When a
+    bucket is empty, requests wait until it has refilled.
+
+    Example:
+        Send at most one message every two seconds, and use the default limits for
+        the other endpoints.
+
+        >>> limiter = fbchat.RateLimiter(rates={"send": (0.5, 1)})
+        >>> session.set_rate_limiter(limiter)
+    """
+
+    #: Limits of each endpoint family, as ``(requests per second, burst size)``. The
+    #: defaults are used for missing families, and unknown families raise `ValueError`.
+    rates = attr.ib(factory=dict, type=Mapping[str, Tuple[float, float]])
+    _buckets = attr.ib(init=False, type=Dict[str, TokenBucket])
+
+    @_buckets.default
+    def _create_buckets(self):
+        unknown = set(self.rates) - set(DEFAULT_RATES)
+        if unknown:
+            raise ValueError(
+                "Unknown endpoint families {}, expected some of {}".format(
+                    sorted(unknown), sorted(DEFAULT_RATES)
+                )
+            )
+        rates = dict(DEFAULT_RATES, **self.rates)
+        return {
+            family: TokenBucket(rate=rate, burst=burst)
+            for family, (rate, burst) in rates.items()
+        }
+
+    def reserve(self, url: str, max_delay: float = None) -> float:
+        """Reserve a request to ``url``, and return how long to wait before sending it.
+
+        Args:
+            url: The endpoint, e.g. ``"/messaging/send/"``
+            max_delay: Don't reserve the request if the delay would be this long
+
+        Returns:
+            The delay in seconds
+        """
+        return self._buckets[get_endpoint_family(url)].reserve(max_delay)
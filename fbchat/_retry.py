@@ -0,0 +1,129 @@
+import attr
+import random
+import threading
+from ._common import kw_only
+from . import _exception, _timeouts
+
+from typing import Optional
+
+#: HTTP status codes of requests that may succeed if they're sent again
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+#: Error codes returned by Facebook for requests that may succeed if they're sent again
+TRANSIENT_ERROR_CODES = frozenset(
+    {
+        1,  # An unknown error occurred
+        2,  # Service temporarily unavailable
+        4,  # Application request limit reached
+        17,  # User request limit reached
+        1545012,  # Temporary failure
+        1675004,  # Please try again later, we limit how often you can do this
+    }
+)
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether a failed request may succeed if it's sent again.
+
+    Connection errors, timeouts, server errors and errors that Facebook reports as
+    temporary, see `TRANSIENT_ERROR_CODES`, are retryable. Other errors returned by
+    Facebook, like `NotLoggedIn` or `InvalidParameters`, and other HTTP errors, like
+    ``404`` or too many redirects, will fail again.
+    """
+    if isinstance(error, (_exception.RequestTimeout, _exception.ConnectionFailed)):
+        return True
+    if isinstance(error, _exception.HTTPError):
+        return error.status_code in RETRYABLE_STATUS_CODES
+    if isinstance(error, _exception.ExternalError):
+        return error.code in TRANSIENT_ERROR_CODES
+    return False
+
+
+@attr.s(slots=True, kw_only=kw_only, eq=False)
+class RetryBudget:
+    """Limits retries to a fraction of all requests, so they can't amplify an outage.
+
+    Each request adds ``ratio`` to the budget, and each retry uses one. Up to
+    ``reserve`` retries are available after a period without failures.
+    """
+
+    #: The number of retries each request allows, e.g. ``0.1`` for one in ten
+    ratio = attr.ib(0.1, type=float)
+    #: The maximum number of retries that can be saved up
+    reserve = attr.ib(10.0, type=float)
+    _balance = attr.ib(None, init=False, type=float)
+    _lock = attr.ib(factory=threading.Lock, init=False, type=threading.Lock)
+
+    def __attrs_post_init__(self):
+        self._balance = self.reserve
+
+    @property
+    def balance(self) -> float:
+        """The number of retries currently available."""
+        return self._balance
+
+    def deposit(self) -> None:
+        """Add a request to the budget."""
+        with self._lock:
+            self._balance = min(self._balance + self.ratio, self.reserve)
+
+    def withdraw(self) -> bool:
+        """Use a retry from the budget, if one is available."""
+        with self._lock:
+            if self._balance < 1:
+                return False
+            self._balance -= 1
+            return True
+
+
+@attr.s(slots=True, kw_only=kw_only, eq=False)
+class RetryPolicy:
+    """Decides when and how failed requests are retried.
+
+    Retries are delayed by an exponential backoff, with full jitter, so clients that
+    failed at the same time don't retry at the same time.
+
+    Only requests that can safely be sent again, like fetching data with GraphQL, are
+    retried. Sending messages, and other actions, are not.
+
+    Sessions sharing a policy also share its `RetryBudget`.
+
+    Example:
+        >>> policy = fbchat.RetryPolicy(max_retries=5, max_delay=60)
+        >>> session.set_retry_policy(policy)
+    """
+
+    #: The maximum number of times a request is retried
+    max_retries = attr.ib(3, type=int)
+    #: The maximum delay before the first retry, in seconds
+    base_delay = attr.ib(0.5, type=float)
+    #: The maximum delay before any retry, in seconds
+    max_delay = attr.ib(30.0, type=float)
+    #: The retry budget, shared between all requests using this policy
+    budget = attr.ib(factory=RetryBudget, type=RetryBudget)
+
+    def get_delay(
+        self,
+        error: Exception,
+        attempt: int,
+        deadline: Optional[_timeouts.Deadline] = None,
+    ) -> Optional[float]:
+        """The time to wait before retrying a failed request.
+
+        Args:
+            error: The error the request failed with
+            attempt: The number of times the request has been retried
+            deadline: The deadline of the request, if any
+
+        Returns:
+            The delay in seconds, or ``None`` if the request shouldn't be retried
+        """
+        if attempt >= self.max_retries or not is_retryable(error):
+            return None
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if deadline is not None and deadline.remaining() <= delay:
+            return None
+        # Checked last, so the budget is only used when actually retrying
+        if not self.budget.withdraw():
+            return None
+        return delay
@@ -1,24 +1,32 @@
 import attr
+import contextlib
 import datetime
+import functools
+import itertools
 import requests
 import random
 import re
-import json
+import threading
+import time
+import weakref
 
 # TODO: Only import when required
 # Or maybe just replace usage with `html.parser`?
 import bs4
 
 from ._common import log, kw_only
-from . import _graphql, _util, _exception
+from . import _batch, _graphql, _json, _util, _exception, _timeouts, _retry
+from . import _ratelimit, _pool
 
-from typing import Optional, Mapping, Callable, Any
+from typing import Optional, Mapping, Callable, Any, Iterator, Sequence, Tuple
 
 
+#: Size of the chunks read from streamed responses, in bytes
+STREAM_CHUNK_SIZE = 16 * 1024
+
 SERVER_JS_DEFINE_REGEX = re.compile(
     r'(?:"ServerJS".{,100}\.handle\({.*"define":)|(?:require\("ServerJSDefine"\)\)?\.handleDefines\()'
 )
-SERVER_JS_DEFINE_JSON_DECODER = json.JSONDecoder()
 
 
 def parse_server_js_define(html: str) -> Mapping[str, Any]:
@@ -41,8 +49,8 @@ def parse_server_js_define(html: str) -> Mapping[str, Any]:
     # Parse entries (should be two)
     for entry in define_splits:
         try:
-            parsed, _ = SERVER_JS_DEFINE_JSON_DECODER.raw_decode(entry, idx=0)
-        except json.JSONDecodeError as e:
+            parsed, _ = _json.raw_decode(entry)
+        except ValueError as e:
             raise _exception.ParseError("Invalid ServerJSDefine", data=entry) from e
         if not isinstance(parsed, list):
             raise _exception.ParseError("Invalid ServerJSDefine", data=parsed)
@@ -89,10 +97,14 @@ def get_user_id(session: requests.Session) -> str:
     return str(rtn)
 
 
-def session_factory() -> requests.Session:
+def session_factory(pool: _pool.PoolConfig = None) -> requests.Session:
     from . import __version__
 
+    if pool is None:
+        pool = _pool.PoolConfig()
+
     session = requests.session()
+    _pool.mount_adapters(session, pool)
     # Override Facebook's locale detection during the login process.
     # The locale is only used when giving errors back to the user, so giving the errors
     # back in English makes it easier for users to report.
@@ -111,6 +123,15 @@ def login_cookies(at: datetime.datetime):
     return {"act": "{}/0".format(_util.datetime_to_millis(at))}
 
 
+def request_counter(start: int = 0) -> Iterator[int]:
+    """Count the requests made after the first ``start``.
+
+    Taking the next number from the counter is atomic, so threads making requests at
+    the same time will never get the same number.
+    """
+    return itertools.count(start + 1)
+
+
 def client_id_factory() -> str:
     return hex(int(random.random() * 2 ** 31))[2:]
 
@@ -139,7 +160,9 @@ def find_form_request(html: str):
     return url, data
 
 
-def two_factor_helper(session: requests.Session, r, on_2fa_callback):
+def two_factor_helper(
+    session: requests.Session, r, on_2fa_callback, timeout: _timeouts.Timeout
+):
     url, data = find_form_request(r.content.decode("utf-8"))
 
     # You don't have to type a code if your device is already saved
@@ -148,7 +171,11 @@ def two_factor_helper(session: requests.Session, r, on_2fa_callback):
         data["approvals_code"] = on_2fa_callback()
         log.info("Submitting 2FA code")
         r = session.post(
-            url, data=data, allow_redirects=False, cookies=login_cookies(_util.now())
+            url,
+            data=data,
+            allow_redirects=False,
+            cookies=login_cookies(_util.now()),
+            timeout=timeout._to_requests(),
         )
         log.debug("2FA location: %s", r.headers.get("Location"))
         url, data = find_form_request(r.content.decode("utf-8"))
@@ -158,7 +185,11 @@ def two_factor_helper(session: requests.Session, r, on_2fa_callback):
         data["name_action_selected"] = "save_device"
         log.info("Saving browser")
         r = session.post(
-            url, data=data, allow_redirects=False, cookies=login_cookies(_util.now())
+            url,
+            data=data,
+            allow_redirects=False,
+            cookies=login_cookies(_util.now()),
+            timeout=timeout._to_requests(),
         )
         log.debug("2FA location: %s", r.headers.get("Location"))
         url = r.headers.get("Location")
@@ -168,7 +199,11 @@ def two_factor_helper(session: requests.Session, r, on_2fa_callback):
 
     log.info("Starting Facebook checkup flow")
     r = session.post(
-        url, data=data, allow_redirects=False, cookies=login_cookies(_util.now())
+        url,
+        data=data,
+        allow_redirects=False,
+        cookies=login_cookies(_util.now()),
+        timeout=timeout._to_requests(),
     )
     log.debug("2FA location: %s", r.headers.get("Location"))
 
@@ -183,7 +218,11 @@ def two_factor_helper(session: requests.Session, r, on_2fa_callback):
     del data["submit[This wasn't me]"]
     log.info("Verifying login attempt")
     r = session.post(
-        url, data=data, allow_redirects=False, cookies=login_cookies(_util.now())
+        url,
+        data=data,
+        allow_redirects=False,
+        cookies=login_cookies(_util.now()),
+        timeout=timeout._to_requests(),
     )
     log.debug("2FA location: %s", r.headers.get("Location"))
 
@@ -193,7 +232,11 @@ def two_factor_helper(session: requests.Session, r, on_2fa_callback):
     data["name_action_selected"] = "save_device"
     log.info("Saving device again")
     r = session.post(
-        url, data=data, allow_redirects=False, cookies=login_cookies(_util.now())
+        url,
+        data=data,
+        allow_redirects=False,
+        cookies=login_cookies(_util.now()),
+        timeout=timeout._to_requests(),
     )
     log.debug("2FA location: %s", r.headers.get("Location"))
     return r.headers.get("Location")
@@ -216,19 +259,110 @@ def get_fb_dtsg(define) -> Optional[str]:
     return None
 
 
+def get_session_data(html: str) -> Tuple[str, int]:
+    """Extract ``fb_dtsg`` and the client revision from the main page."""
+    define = parse_server_js_define(html)
+
+    fb_dtsg = get_fb_dtsg(define)
+    if fb_dtsg is None:
+        raise _exception.ParseError("Could not find fb_dtsg", data=define)
+    if not fb_dtsg:
+        # Happens when the client is not actually logged in
+        raise _exception.NotLoggedIn(
+            "Found empty fb_dtsg, the session was probably invalid."
+        )
+
+    try:
+        revision = int(define["SiteData"]["client_revision"])
+    except TypeError:
+        raise _exception.ParseError("Could not find client revision", data=define)
+
+    return fb_dtsg, revision
+
+
+def parse_response(text: Optional[str], as_graphql: bool = False) -> Any:
+    """Parse the body of a response from Facebook."""
+    if text is None or len(text) == 0:
+        raise _exception.HTTPError("Error when sending request: Got empty response")
+    if as_graphql:
+        return _graphql.response_to_json(text)
+    else:
+        text = _util.strip_json_cruft(text)
+        j = _util.parse_json(text)
+        log.debug(j)
+        return j
+
+
+def get_message_id(j) -> Tuple[str, str]:
+    """Get the message and thread ID from a ``/messaging/send/`` response."""
+    _exception.handle_payload_error(j)
+
+    try:
+        message_ids = [
+            (action["message_id"], action["thread_fbid"])
+            for action in j["payload"]["actions"]
+            if "message_id" in action
+        ]
+        if len(message_ids) != 1:
+            log.warning("Got multiple message ids' back: {}".format(message_ids))
+        return message_ids[0]
+    except (KeyError, IndexError, TypeError) as e:
+        raise _exception.ParseError("No message IDs could be found", data=j) from e
+
+
+@attr.s(slots=True, kw_only=kw_only)
+class RequestStats:
+    """Counters describing the requests a `Session` has made to Facebook."""
+
+    #: Number of requests sent
+    requests = attr.ib(0, type=int)
+    #: Number of requests that failed, including those that timed out
+    failures = attr.ib(0, type=int)
+    #: Number of requests that timed out
+    timeouts = attr.ib(0, type=int)
+    #: Number of failed requests that were sent again, included in ``requests``
+    retries = attr.ib(0, type=int)
+    #: Number of requests delayed by the session's `RateLimiter`
+    throttled = attr.ib(0, type=int)
+    #: Total time requests were delayed by the session's `RateLimiter`, in seconds
+    throttle_time = attr.ib(0.0, type=float)
+    #: Total time spent waiting for responses, in seconds. For streamed responses,
+    #: only the time until the response started arriving is included.
+    wait_time = attr.ib(0.0, type=float)
+
+
 @attr.s(slots=True, kw_only=kw_only, repr=False, eq=False)
 class Session:
     """Stores and manages state required for most Facebook requests.
 
     This is the main class, which is used to login to Facebook.
+
+    A session can be shared by several threads, e.g. the workers of a thread pool,
+    and used to make requests concurrently.
     """
 
     _user_id = attr.ib(type=str)
     _fb_dtsg = attr.ib(type=str)
     _revision = attr.ib(type=int)
     _session = attr.ib(factory=session_factory, type=requests.Session)
-    _counter = attr.ib(0, type=int)
+    _counter = attr.ib(0, converter=request_counter, type=Iterator[int])
     _client_id = attr.ib(factory=client_id_factory, type=str)
+    _timeout = attr.ib(factory=_timeouts.Timeout, type=_timeouts.Timeout)
+    _retry_policy = attr.ib(factory=_retry.RetryPolicy, type=_retry.RetryPolicy)
+    _stats = attr.ib(factory=RequestStats, init=False, type=RequestStats)
+    _rate_limiter = attr.ib(None, init=False, type=Optional[_ratelimit.RateLimiter])
+    _batcher = attr.ib(None, init=False, type=Optional[_batch.Batcher])
+    _thread_handles = attr.ib(
+        None, init=False, type=Optional[weakref.WeakValueDictionary]
+    )
+    _lazy_timestamps = attr.ib(False, init=False, type=bool)
+    #: The number of the request whose response contained ``fb_dtsg``
+    _fb_dtsg_request = attr.ib(0, init=False, type=int)
+    #: Guards ``fb_dtsg`` and the request stats, which are changed by all threads
+    _lock = attr.ib(factory=threading.Lock, init=False, type=threading.Lock)
+
+    #: Replacements of the thread classes, used by `fbchat._threads.intern_thread`
+    _thread_classes = {}  # type: Mapping[type, type]
 
     @property
     def user(self):
@@ -239,23 +373,193 @@ class Session:
 
         return _threads.User(session=self, id=self._user_id)
 
+    @property
+    def stats(self) -> RequestStats:
+        """Counters for the requests made by the session, and the time they took."""
+        return self._stats
+
+    @property
+    def timeout(self) -> _timeouts.Timeout:
+        """The default timeout of the session's requests, see `set_timeout`."""
+        return self._timeout
+
+    def set_timeout(self, timeout: _timeouts.Timeout) -> None:
+        """Set the default timeout of the session's requests.
+
+        Args:
+            timeout: How long to wait for Facebook's servers
+
+        Example:
+            >>> session.set_timeout(fbchat.Timeout(connect=5, read=30))
+        """
+        self._timeout = timeout
+
+    @property
+    def retry_policy(self) -> _retry.RetryPolicy:
+        """How failed requests are retried, see `set_retry_policy`."""
+        return self._retry_policy
+
+    def set_retry_policy(self, policy: _retry.RetryPolicy) -> None:
+        """Set how failed requests are retried.
+
+        By default, requests fetching data are retried up to 3 times, if they failed
+        because of a connection error, a timeout or a server error.
+
+        Args:
+            policy: The retry policy. Use ``RetryPolicy(max_retries=0)`` to disable
+                retries.
+
+        Example:
+            >>> session.set_retry_policy(fbchat.RetryPolicy(max_retries=5))
+        """
+        self._retry_policy = policy
+
+    @property
+    def rate_limiter(self) -> Optional[_ratelimit.RateLimiter]:
+        """The rate limiter used by the session, see `set_rate_limiter`."""
+        return self._rate_limiter
+
+    def set_rate_limiter(self, limiter: Optional[_ratelimit.RateLimiter]) -> None:
+        """Limit the rate of requests, to avoid being throttled by Facebook.
+
+        Requests are delayed when they exceed the limiter's rates, instead of being
+        sent in bursts that Facebook answers with errors and temporary blocks. The
+        time spent waiting is included in `stats`.
+
+        Args:
+            limiter: The rate limiter, or ``None`` to send requests right away
+
+        Example:
+            >>> session.set_rate_limiter(fbchat.RateLimiter())
+        """
+        self._rate_limiter = limiter
+
+    def set_pool_config(self, config: _pool.PoolConfig, host: str = None) -> None:
+        """Configure the connection pool to a host.
+
+        www.messenger.com and upload.messenger.com, used by `Client.upload`, have
+        separate pools, so that connections to them are reused, even if many other
+        hosts are accessed through the session.
+
+        Open connections in the previous pool are closed.
+
+        Args:
+            config: The pool's settings
+            host: E.g. ``"www.messenger.com"``. If ``None``, the pool used for hosts
+                without a separate pool, e.g. Facebook's CDN, is configured.
+
+        Example:
+            >>> config = fbchat.PoolConfig(size=20, block=True)
+            >>> session.set_pool_config(config, host="www.messenger.com")
+        """
+        prefix = "https://{}/".format(host) if host else "https://"
+        previous = self._session.adapters.get(prefix)
+        self._session.mount(prefix, _pool.PoolAdapter(config))
+        if previous is not None:
+            previous.close()
+
+    def get_pool_stats(self) -> Sequence[_pool.PoolStats]:
+        """Utilization of the session's connection pools, one for each host.
+
+        Example:
+            >>> for stats in session.get_pool_stats():
+            ...     print(stats.host, stats.connections, stats.requests)
+            www.messenger.com 4 1000
+        """
+        return [
+            stats
+            for adapter in self._session.adapters.values()
+            if isinstance(adapter, _pool.PoolAdapter)
+            for stats in adapter.get_stats()
+        ]
+
     def __repr__(self) -> str:
         # An alternative repr, to illustrate that you can't create the class directly
         return "<fbchat.Session user_id={}>".format(self._user_id)
 
+    def _get_timeout(self, timeout=None, deadline=None):
+        if timeout is None:
+            timeout = self._timeout
+        if deadline is not None:
+            timeout = deadline.limit(timeout)
+        return timeout
+
+    @contextlib.contextmanager
+    def _record_request(self):
+        start = time.monotonic()
+        failed = timed_out = False
+        try:
+            yield
+        except _exception.RequestTimeout:
+            failed = timed_out = True
+            raise
+        except Exception:
+            failed = True
+            raise
+        finally:
+            with self._lock:
+                self._stats.requests += 1
+                self._stats.failures += failed
+                self._stats.timeouts += timed_out
+                self._stats.wait_time += time.monotonic() - start
+
+    def _throttle_delay(self, url, deadline=None):
+        if deadline is not None and deadline.expired:
+            raise _exception.RequestTimeout("Deadline exceeded")
+        if self._rate_limiter is None:
+            return 0.0
+        max_delay = None if deadline is None else deadline.remaining()
+        delay = self._rate_limiter.reserve(url, max_delay)
+        if max_delay is not None and delay >= max_delay:
+            # Waiting for the rate limiter would only run into the deadline
+            raise _exception.RequestTimeout("Deadline exceeded while throttled")
+        if delay > 0:
+            with self._lock:
+                self._stats.throttled += 1
+                self._stats.throttle_time += delay
+        return delay
+
+    def _retry_delay(self, error, attempt, deadline):
+        delay = self._retry_policy.get_delay(error, attempt, deadline)
+        if delay is not None:
+            with self._lock:
+                self._stats.retries += 1
+            log.warning("Retrying request in %.2f seconds, after: %s", delay, error)
+        return delay
+
+    def _with_retries(self, send, deadline=None, retry=False):
+        self._retry_policy.budget.deposit()
+        attempt = 0
+        while True:
+            try:
+                return send(deadline=deadline)
+            except (_exception.HTTPError, _exception.ExternalError) as e:
+                delay = self._retry_delay(e, attempt, deadline) if retry else None
+                if delay is None:
+                    raise
+            time.sleep(delay)
+            attempt += 1
+
     def _get_params(self):
-        self._counter += 1  # TODO: Make this operation atomic / thread-safe
+        counter = next(self._counter)
+        with self._lock:
+            fb_dtsg = self._fb_dtsg
         return {
             "__a": 1,
-            "__req": base36encode(self._counter),
+            "__req": base36encode(counter),
             "__rev": self._revision,
-            "fb_dtsg": self._fb_dtsg,
+            "fb_dtsg": fb_dtsg,
         }
 
     # TODO: Add ability to load previous cookies in here, to avoid 2fa flow
     @classmethod
     def login(
-        cls, email: str, password: str, on_2fa_callback: Callable[[], int] = None
+        cls,
+        email: str,
+        password: str,
+        on_2fa_callback: Callable[[], int] = None,
+        timeout: _timeouts.Timeout = None,
+        pool: _pool.PoolConfig = None,
     ):
         """Login the user, using ``email`` and ``password``.
 
@@ -271,6 +575,10 @@ class Session:
 
                 Note: Facebook limits the amount of codes they will give you, so if you
                 don't receive a code, be patient, and try again later!
+            timeout: Timeout of each request while logging in, and the default timeout
+                of the returned session
+            pool: Settings of the connection pools, used for each host. See
+                `Session.set_pool_config` to configure the pool to a single host.
 
         Example:
             >>> import fbchat
@@ -286,7 +594,9 @@ class Session:
             >>> session.user.id
             "1234"
         """
-        session = session_factory()
+        if timeout is None:
+            timeout = _timeouts.Timeout()
+        session = session_factory(pool)
 
         data = {
             # "jazoest": "2754",
@@ -311,6 +621,7 @@ class Session:
                 data=data,
                 allow_redirects=False,
                 cookies=login_cookies(_util.now()),
+                timeout=timeout._to_requests(),
             )
         except requests.RequestException as e:
             _exception.handle_requests_error(e)
@@ -335,22 +646,31 @@ class Session:
                 raise _exception.ParseError("Failed 2fa flow (1)", data=url)
 
             r = session.get(
-                url, allow_redirects=False, cookies=login_cookies(_util.now())
+                url,
+                allow_redirects=False,
+                cookies=login_cookies(_util.now()),
+                timeout=timeout._to_requests(),
             )
             url = r.headers.get("Location")
             if not url or not url.startswith("https://www.facebook.com/checkpoint/"):
                 raise _exception.ParseError("Failed 2fa flow (2)", data=url)
 
             r = session.get(
-                url, allow_redirects=False, cookies=login_cookies(_util.now())
+                url,
+                allow_redirects=False,
+                cookies=login_cookies(_util.now()),
+                timeout=timeout._to_requests(),
             )
-            url = two_factor_helper(session, r, on_2fa_callback)
+            url = two_factor_helper(session, r, on_2fa_callback, timeout)
 
             if not url.startswith("https://www.messenger.com/login/auth_token/"):
                 raise _exception.ParseError("Failed 2fa flow (3)", data=url)
 
             r = session.get(
-                url, allow_redirects=False, cookies=login_cookies(_util.now())
+                url,
+                allow_redirects=False,
+                cookies=login_cookies(_util.now()),
+                timeout=timeout._to_requests(),
             )
             url = r.headers.get("Location")
 
@@ -359,13 +679,16 @@ class Session:
             raise _exception.NotLoggedIn("Failed logging in: {}, {}".format(url, error))
 
         try:
-            return cls._from_session(session=session)
+            return cls._from_session(session=session, timeout=timeout)
         except _exception.NotLoggedIn as e:
             raise _exception.ParseError("Failed loading session", data=r) from e
 
-    def is_logged_in(self) -> bool:
+    def is_logged_in(self, timeout: _timeouts.Timeout = None) -> bool:
         """Send a request to Facebook to check the login status.
 
+        Args:
+            timeout: Override the session's default timeout
+
         Returns:
             Whether the user is still logged in
 
@@ -373,29 +696,44 @@ class Session:
             >>> assert session.is_logged_in()
         """
         # Send a request to the login url, to see if we're directed to the home page
-        try:
-            r = self._session.get(prefix_url("/login/"), allow_redirects=False)
-        except requests.RequestException as e:
-            _exception.handle_requests_error(e)
-        _exception.handle_http_error(r.status_code)
+        timeout = self._get_timeout(timeout)
+        with self._record_request():
+            try:
+                r = self._session.get(
+                    prefix_url("/login/"),
+                    allow_redirects=False,
+                    timeout=timeout._to_requests(),
+                )
+            except requests.RequestException as e:
+                _exception.handle_requests_error(e)
+            _exception.handle_http_error(r.status_code)
         return "https://www.messenger.com/" == r.headers.get("Location")
 
-    def logout(self) -> None:
+    def logout(self, timeout: _timeouts.Timeout = None) -> None:
         """Safely log out the user.
 
         The session object must not be used after this action has been performed!
 
+        Args:
+            timeout: Override the session's default timeout
+
         Example:
             >>> session.logout()
         """
-        data = {"fb_dtsg": self._fb_dtsg}
-        try:
-            r = self._session.post(
-                prefix_url("/logout/"), data=data, allow_redirects=False
-            )
-        except requests.RequestException as e:
-            _exception.handle_requests_error(e)
-        _exception.handle_http_error(r.status_code)
+        with self._lock:
+            data = {"fb_dtsg": self._fb_dtsg}
+        timeout = self._get_timeout(timeout)
+        with self._record_request():
+            try:
+                r = self._session.post(
+                    prefix_url("/logout/"),
+                    data=data,
+                    allow_redirects=False,
+                    timeout=timeout._to_requests(),
+                )
+            except requests.RequestException as e:
+                _exception.handle_requests_error(e)
+            _exception.handle_http_error(r.status_code)
 
         if "Location" not in r.headers:
             raise _exception.FacebookError("Failed logging out, was not redirected!")
@@ -405,34 +743,30 @@ class Session:
             )
 
     @classmethod
-    def _from_session(cls, session):
+    def _from_session(cls, session, timeout=None):
         # TODO: Automatically set user_id when the cookie changes in the session
         user_id = get_user_id(session)
+        if timeout is None:
+            timeout = _timeouts.Timeout()
 
         # Make a request to the main page to retrieve ServerJSDefine entries
         try:
-            r = session.get(prefix_url("/"), allow_redirects=False)
+            r = session.get(
+                prefix_url("/"), allow_redirects=False, timeout=timeout._to_requests()
+            )
         except requests.RequestException as e:
             _exception.handle_requests_error(e)
         _exception.handle_http_error(r.status_code)
 
-        define = parse_server_js_define(r.content.decode("utf-8"))
-
-        fb_dtsg = get_fb_dtsg(define)
-        if fb_dtsg is None:
-            raise _exception.ParseError("Could not find fb_dtsg", data=define)
-        if not fb_dtsg:
-            # Happens when the client is not actually logged in
-            raise _exception.NotLoggedIn(
-                "Found empty fb_dtsg, the session was probably invalid."
-            )
-
-        try:
-            revision = int(define["SiteData"]["client_revision"])
-        except TypeError:
-            raise _exception.ParseError("Could not find client revision", data=define)
+        fb_dtsg, revision = get_session_data(r.content.decode("utf-8"))
 
-        return cls(user_id=user_id, fb_dtsg=fb_dtsg, revision=revision, session=session)
+        return cls(
+            user_id=user_id,
+            fb_dtsg=fb_dtsg,
+            revision=revision,
+            session=session,
+            timeout=timeout,
+        )
 
     def get_cookies(self) -> Mapping[str, str]:
         """Retrieve session cookies, that can later be used in `from_cookies`.
@@ -446,42 +780,83 @@ class Session:
         return self._session.cookies.get_dict()
 
     @classmethod
-    def from_cookies(cls, cookies: Mapping[str, str]):
+    def from_cookies(
+        cls,
+        cookies: Mapping[str, str],
+        timeout: _timeouts.Timeout = None,
+        pool: _pool.PoolConfig = None,
+    ):
         """Load a session from session cookies.
 
         Args:
             cookies: A dictionary containing session cookies
+            timeout: Timeout of the request loading the session, and the default
+                timeout of the returned session
+            pool: Settings of the connection pools, used for each host. See
+                `Session.set_pool_config` to configure the pool to a single host.
 
         Example:
             >>> cookies = session.get_cookies()
             >>> # Store cookies somewhere, and then subsequently
             >>> session = fbchat.Session.from_cookies(cookies)
         """
-        session = session_factory()
+        session = session_factory(pool)
         session.cookies = requests.cookies.merge_cookies(session.cookies, cookies)
-        return cls._from_session(session=session)
-
-    def _post(self, url, data, files=None, as_graphql=False):
-        data.update(self._get_params())
-        try:
-            r = self._session.post(prefix_url(url), data=data, files=files)
-        except requests.RequestException as e:
-            _exception.handle_requests_error(e)
+        return cls._from_session(session=session, timeout=timeout)
+
+    def _send(self, url, data, files=None, stream=False, deadline=None):
+        delay = self._throttle_delay(url, deadline)
+        if delay:
+            time.sleep(delay)
+        timeout = self._get_timeout(deadline=deadline)
+        with self._record_request():
+            try:
+                r = self._session.post(
+                    prefix_url(url),
+                    data=data,
+                    files=files,
+                    stream=stream,
+                    timeout=timeout._to_requests(),
+                )
+            except requests.RequestException as e:
+                _exception.handle_requests_error(e)
+            if not r.ok:
+                r.close()
+            _exception.handle_http_error(r.status_code)
         # Facebook's encoding is always UTF-8
         r.encoding = "utf-8"
-        _exception.handle_http_error(r.status_code)
-        if r.text is None or len(r.text) == 0:
-            raise _exception.HTTPError("Error when sending request: Got empty response")
-        if as_graphql:
-            return _graphql.response_to_json(r.text)
-        else:
-            text = _util.strip_json_cruft(r.text)
-            j = _util.parse_json(text)
-            log.debug(j)
-            return j
+        return r
+
+    def _post(
+        self, url, data, files=None, as_graphql=False, deadline=None, retry=False
+    ):
+        data.update(self._get_params())
+
+        # Errors returned by Facebook in the response may also be temporary
+        def send(deadline):
+            r = self._send(url, data, files=files, deadline=deadline)
+            return parse_response(r.text, as_graphql=as_graphql)
+
+        return self._with_retries(send, deadline=deadline, retry=retry)
+
+    def _post_stream(self, url, data, retry=False):
+        data.update(self._get_params())
+        send = functools.partial(self._send, url, data, stream=True)
+        # Only sending the request is retried, since results may already have been
+        # yielded when reading the response fails
+        r = self._with_retries(send, retry=retry)
+        with r:
+            try:
+                yield from r.iter_content(STREAM_CHUNK_SIZE, decode_unicode=True)
+            except requests.RequestException as e:
+                _exception.handle_requests_error(e)
 
     def _payload_post(self, url, data, files=None):
         j = self._post(url, data, files=files)
+        # `_get_params` added the request's number to the data
+        return self._parse_payload(j, int(data["__req"], 36))
+
+    def _parse_payload(self, j, request):
         _exception.handle_payload_error(j)
 
         # update fb_dtsg token if received in response
@@ -489,24 +864,102 @@ class Session:
             define = _util.get_jsmods_define(j["jsmods"]["define"])
             fb_dtsg = get_fb_dtsg(define)
             if fb_dtsg:
-                self._fb_dtsg = fb_dtsg
+                with self._lock:
+                    # Responses can arrive out of order, so a token from an older
+                    # request mustn't replace a newer one
+                    if request > self._fb_dtsg_request:
+                        self._fb_dtsg = fb_dtsg
+                        self._fb_dtsg_request = request
 
         try:
             return j["payload"]
         except (KeyError, TypeError) as e:
             raise _exception.ParseError("Missing payload", data=j) from e
 
-    def _graphql_requests(self, *queries):
+    def enable_batching(self, max_size: int = 50, max_wait: float = 0.01) -> None:
+        """Combine GraphQL queries made at the same time into fewer requests.
+
+        Queries from other threads, e.g. `ThreadABC.fetch_messages`, are collected
+        until ``max_size`` are waiting or ``max_wait`` seconds have passed, and then
+        sent together. This reduces the number of requests when many threads fetch
+        data at once, at the cost of a little latency.
+
+        Queries that fail with a temporary error are retried in a later batch,
+        following the session's `RetryPolicy`.
+
+        Args:
+            max_size: The maximum number of queries in a request
+            max_wait: The maximum time to wait for other queries, in seconds
+
+        Example:
+            >>> session.enable_batching(max_size=100, max_wait=0.05)
+        """
+        self._batcher = _batch.Batcher(
+            send=self._graphql_stream,
+            max_size=max_size,
+            max_wait=max_wait,
+            retry_delay=lambda error, attempt: self._retry_delay(error, attempt, None),
+        )
+
+    def disable_batching(self) -> None:
+        """Send each call's GraphQL queries in a separate request again."""
+        self._batcher = None
+
+    def enable_thread_interning(self) -> None:
+        """Reuse thread objects with the same type and ID, e.g. in parsed events.
+
+        Events, messages and participants reference threads and users using objects
+        like `User`. Normally each reference is a new object, but with this, objects
+        that are still in use elsewhere are shared. This reduces allocations and memory
+        usage when receiving many events, e.g. from a few busy groups.
+
+        The objects are immutable, so sharing them is safe.
+
+        Example:
+            >>> session.enable_thread_interning()
+        """
+        if self._thread_handles is None:
+            self._thread_handles = weakref.WeakValueDictionary()
+
+    def enable_lazy_timestamps(self) -> None:
+        """Create timestamps in parsed models and events only when they're used.
+
+        Timestamps, like `Message.created_at`, will be `LazyDatetime` objects instead
+        of `datetime.datetime`, which keep the raw milliseconds until they're used as a
+        datetime. This makes parsing large amounts of messages faster.
+
+        Only models and events parsed by this session are affected. `LazyDatetime` is
+        not a `datetime.datetime` subclass, so code checking ``isinstance(x,
+        datetime.datetime)`` should be updated before enabling this.
+
+        Example:
+            >>> session.enable_lazy_timestamps()
+        """
+        self._lazy_timestamps = True
+
+    def _graphql_requests(self, *queries, deadline=None, retry=True):
         # TODO: Explain usage of GraphQL, probably in the docs
         # Perhaps provide this API as public?
-        data = {
-            "method": "GET",
-            "response_format": "json",
-            "queries": _graphql.queries_to_json(*queries),
-        }
-        return self._post("/api/graphqlbatch/", data, as_graphql=True)
+        # Queries are retried by default, mutations must set `retry=False`. Those, and
+        # queries with a deadline, are sent separately, since the batch is shared
+        if self._batcher is not None and deadline is None and retry:
+            return self._batcher.request(*queries)
+        data = _graphql.queries_to_data(*queries)
+        return self._post(
+            "/api/graphqlbatch/", data, as_graphql=True, deadline=deadline, retry=retry
+        )
 
-    def _do_send_request(self, data):
+    def _graphql_stream(self, *queries):
+        """Like `_graphql_requests`, but yield each query's result as it arrives.
+
+        Failed queries are returned as a `QueryResult` with an error, instead of
+        failing the whole batch.
+        """
+        data = _graphql.queries_to_data(*queries)
+        stream = self._post_stream("/api/graphqlbatch/", data, retry=True)
+        return _graphql.iter_results(stream)
+
+    def _prepare_send_request(self, data):
         now = _util.now()
         offline_threading_id = _util.generate_offline_threading_id()
         data["client"] = "mercury"
@@ -517,18 +970,8 @@ class Session:
         data["message_id"] = offline_threading_id
         data["threading_id"] = generate_message_id(now, self._client_id)
         data["ephemeral_ttl_mode:"] = "0"
-        j = self._post("/messaging/send/", data)
+        return data
 
-        _exception.handle_payload_error(j)
-
-        try:
-            message_ids = [
-                (action["message_id"], action["thread_fbid"])
-                for action in j["payload"]["actions"]
-                if "message_id" in action
-            ]
-            if len(message_ids) != 1:
-                log.warning("Got multiple message ids' back: {}".format(message_ids))
-            return message_ids[0]
-        except (KeyError, IndexError, TypeError) as e:
-            raise _exception.ParseError("No message IDs could be found", data=j) from e
+    def _do_send_request(self, data):
+        j = self._post("/messaging/send/", self._prepare_send_request(data))
+        return get_message_id(j)
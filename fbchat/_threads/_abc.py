@@ -3,7 +3,7 @@ import attr
 import collections
 import datetime
 from .._common import log, attrs_default
-from .. import _util, _exception, _session, _graphql, _models
+from .. import _util, _exception, _session, _graphql, _models, _timeouts
 from typing import MutableMapping, Mapping, Any, Iterable, Tuple, Optional
 
 
@@ -32,6 +32,38 @@ SETABLE_COLORS = (
 )
 
 
+def thread_class(cls, session):
+    """The class that ``session`` uses instead of ``cls``.
+
+    E.g. `fbchat.aio.Session` uses the asyncio thread and thread data classes, whose
+    methods are coroutines.
+    """
+    classes = getattr(session, "_thread_classes", None)
+    if classes:
+        return classes.get(cls, cls)
+    return cls
+
+
+def intern_thread(cls, session, id: str):
+    """Create a thread object like ``cls(session=session, id=id)``.
+
+    If the session interns threads, an existing object with the same type and ID is
+    reused instead, see `Session.enable_thread_interning`.
+
+    Sessions can replace ``cls``, see `thread_class`.
+    """
+    cls = thread_class(cls, session)
+    handles = getattr(session, "_thread_handles", None)
+    if handles is None:
+        return cls(session=session, id=id)
+    key = (cls, id)
+    thread = handles.get(key)
+    if thread is None:
+        thread = cls(session=session, id=id)
+        handles[key] = thread
+    return thread
+
+
 class ThreadABC(metaclass=abc.ABCMeta):
     """Implemented by thread-like classes.
 
@@ -305,12 +337,14 @@ class ThreadABC(metaclass=abc.ABCMeta):
             "thread_fbid": self.id,
         }
         j = self.session._payload_post("/ajax/mercury/search_snippets.php?dpr=1", data)
+        return self._parse_snippets(self._copy(), query, j)
 
-        result = j["search_snippets"][query].get(self.id)
+    @staticmethod
+    def _parse_snippets(thread, query, j):
+        result = j["search_snippets"][query].get(thread.id)
         if not result:
             return (0, [])
 
-        thread = self._copy()
         snippets = [
             _models.MessageSnippet._parse(thread, snippet)
             for snippet in result["snippets"]
@@ -349,7 +383,7 @@ class ThreadABC(metaclass=abc.ABCMeta):
                 return  # No more data to fetch
             offset += limit
 
-    def _fetch_messages(self, limit, before):
+    def _fetch_messages(self, limit, before, deadline=None):
         params = {
             "id": self.id,
             "message_limit": limit,
@@ -360,23 +394,30 @@ class ThreadABC(metaclass=abc.ABCMeta):
             "before": _util.datetime_to_millis(before) if before else None,
         }
         (j,) = self.session._graphql_requests(
-            _graphql.from_doc_id("1860982147341344", params)  # 2696825200377124
+            _graphql.from_doc_id("1860982147341344", params),  # 2696825200377124
+            deadline=deadline,
         )
+        return self._parse_messages(self._copy(), j)
 
+    @staticmethod
+    def _parse_messages(thread, j):
         if j.get("message_thread") is None:
             raise _exception.ParseError("Could not fetch messages", data=j)
 
         # TODO: Should we parse the returned thread data, too?
 
-        read_receipts = j["message_thread"]["read_receipts"]["nodes"]
+        read_receipts = _models.ReadReceipts._from_graphql(
+            j["message_thread"]["read_receipts"]["nodes"]
+        )
 
-        thread = self._copy()
         return [
             _models.MessageData._from_graphql(thread, message, read_receipts)
             for message in j["message_thread"]["messages"]["nodes"]
         ]
 
-    def fetch_messages(self, limit: Optional[int]) -> Iterable["_models.Message"]:
+    def fetch_messages(
+        self, limit: Optional[int], deadline: _timeouts.Deadline = None
+    ) -> Iterable["_models.Message"]:
         """Fetch messages in a thread.
 
         The returned messages are ordered by last sent first.
@@ -384,6 +425,7 @@ class ThreadABC(metaclass=abc.ABCMeta):
         Args:
             limit: Max. number of threads to retrieve. If ``None``, all threads will be
                 retrieved.
+            deadline: Stop fetching, by raising `RequestTimeout`, once this has passed
 
         Example:
             >>> for message in thread.fetch_messages(limit=5)
@@ -400,7 +442,7 @@ class ThreadABC(metaclass=abc.ABCMeta):
 
         before = None
         for limit in _util.get_limits(limit, MAX_BATCH_LIMIT):
-            messages = self._fetch_messages(limit, before)
+            messages = self._fetch_messages(limit, before, deadline)
             messages.reverse()
 
             if before:
@@ -419,11 +461,14 @@ class ThreadABC(metaclass=abc.ABCMeta):
         (j,) = self.session._graphql_requests(
             _graphql.from_query_id("515216185516880", data)
         )
+        return self._parse_images(self.id, j)
 
-        if not j[self.id]:
+    @staticmethod
+    def _parse_images(thread_id, j):
+        if not j[thread_id]:
             raise _exception.ParseError("Could not find images", data=j)
 
-        result = j[self.id]["message_shared_media"]
+        result = j[thread_id]["message_shared_media"]
 
         rtn = []
         for edge in result["edges"]:
@@ -784,12 +829,12 @@ class ThreadABC(metaclass=abc.ABCMeta):
             typename = actor["__typename"]
             thread_id = actor["id"]
             if typename == "User":
-                yield _user.User(session=session, id=thread_id)
+                yield intern_thread(_user.User, session, thread_id)
             elif typename == "MessageThread":
                 # MessageThread => Group thread
-                yield _group.Group(session=session, id=thread_id)
+                yield intern_thread(_group.Group, session, thread_id)
             elif typename == "Page":
-                yield _page.Page(session=session, id=thread_id)
+                yield intern_thread(_page.Page, session, thread_id)
             elif typename == "Group":
                 # We don't handle Facebook "Groups"
                 pass
@@ -819,4 +864,4 @@ class Thread(ThreadABC):
         )
 
     def _copy(self) -> "Thread":
-        return Thread(session=self.session, id=self.id)
+        return intern_thread(Thread, self.session, self.id)
@@ -1,6 +1,6 @@
 import attr
 import datetime
-from ._abc import ThreadABC
+from ._abc import ThreadABC, intern_thread, thread_class
 from . import _user
 from .._common import attrs_default
 from .. import _util, _session, _graphql, _models
@@ -25,7 +25,7 @@ class Group(ThreadABC):
         return {"thread_fbid": self.id}
 
     def _copy(self) -> "Group":
-        return Group(session=self.session, id=self.id)
+        return intern_thread(Group, self.session, self.id)
 
     def add_participants(self, user_ids: Iterable[str]):
         """Add users to the group.
@@ -146,7 +146,7 @@ class Group(ThreadABC):
             "surface": "ADMIN_MODEL_APPROVAL_CENTER",
         }
         (j,) = self.session._graphql_requests(
-            _graphql.from_doc_id("1574519202665847", {"data": data})
+            _graphql.from_doc_id("1574519202665847", {"data": data}), retry=False
         )
 
     def accept_users(self, user_ids: Iterable[str]):
@@ -183,7 +183,8 @@ class GroupData(Group):
     photo = attr.ib(None, type=Optional[_models.Image])
     #: The name of the group
     name = attr.ib(None, type=Optional[str])
-    #: When the group was last active / when the last message was sent
+    #: When the group was last active / when the last message was sent. A
+    #: `LazyDatetime` with lazy timestamps, see `Session.enable_lazy_timestamps`.
     last_active = attr.ib(None, type=Optional[datetime.datetime])
     #: Number of messages in the group
     message_count = attr.ib(None, type=Optional[int])
@@ -208,13 +209,14 @@ class GroupData(Group):
 
     @classmethod
     def _from_graphql(cls, session, data):
+        cls = thread_class(cls, session)
         if data.get("image") is None:
             data["image"] = {}
         c_info = cls._parse_customization_info(data)
         last_active = None
         if "last_message" in data:
             last_active = _util.millis_to_datetime(
-                int(data["last_message"]["nodes"][0]["timestamp_precise"])
+                int(data["last_message"]["nodes"][0]["timestamp_precise"]), session
             )
         plan = None
         if data.get("event_reminders") and data["event_reminders"].get("nodes"):
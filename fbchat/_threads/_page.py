@@ -1,6 +1,6 @@
 import attr
 import datetime
-from ._abc import ThreadABC
+from ._abc import ThreadABC, intern_thread, thread_class
 from .._common import attrs_default
 from .. import _session, _models
 
@@ -26,7 +26,7 @@ class Page(ThreadABC):
         return {"other_user_fbid": self.id}
 
     def _copy(self) -> "Page":
-        return Page(session=self.session, id=self.id)
+        return intern_thread(Page, self.session, self.id)
 
 
 @attrs_default
@@ -59,6 +59,7 @@ class PageData(Page):
 
     @classmethod
     def _from_graphql(cls, session, data):
+        cls = thread_class(cls, session)
         if data.get("profile_picture") is None:
             data["profile_picture"] = {}
         if data.get("city") is None:
@@ -1,6 +1,6 @@
 import attr
 import datetime
-from ._abc import ThreadABC
+from ._abc import ThreadABC, intern_thread, thread_class
 from .._common import log, attrs_default
 from .. import _util, _session, _models
 
@@ -58,7 +58,7 @@ class User(ThreadABC):
         }
 
     def _copy(self) -> "User":
-        return User(session=self.session, id=self.id)
+        return intern_thread(User, self.session, self.id)
 
     def confirm_friend_request(self):
         """Confirm a friend request, adding the user to your friend list.
@@ -114,7 +114,8 @@ class UserData(User):
     first_name = attr.ib(type=str)
     #: The users last name
     last_name = attr.ib(None, type=Optional[str])
-    #: When the thread was last active / when the last message was sent
+    #: When the thread was last active / when the last message was sent. A
+    #: `LazyDatetime` with lazy timestamps, see `Session.enable_lazy_timestamps`.
     last_active = attr.ib(None, type=Optional[datetime.datetime])
     #: Number of messages in the thread
     message_count = attr.ib(None, type=Optional[int])
@@ -146,6 +147,7 @@ class UserData(User):
 
     @classmethod
     def _from_graphql(cls, session, data):
+        cls = thread_class(cls, session)
         c_info = cls._parse_customization_info(data)
 
         plan = None
@@ -175,6 +177,7 @@ class UserData(User):
 
     @classmethod
     def _from_thread_fetch(cls, session, data):
+        cls = thread_class(cls, session)
         user = cls._get_other_user(data)
         if user["__typename"] != "User":
             # TODO: Add Page._from_thread_fetch, and parse it there
@@ -203,12 +206,15 @@ class UserData(User):
             own_nickname=c_info.get("own_nickname"),
             photo=_models.Image._from_uri(user["big_image_src"]),
             message_count=data["messages_count"],
-            last_active=_util.millis_to_datetime(int(data["updated_time_precise"])),
+            last_active=_util.millis_to_datetime(
+                int(data["updated_time_precise"]), session
+            ),
             plan=plan,
         )
 
     @classmethod
     def _from_all_fetch(cls, session, data):
+        cls = thread_class(cls, session)
         return cls(
             session=session,
             id=data["id"],
@@ -0,0 +1,77 @@
+import attr
+import time
+from ._common import attrs_default, kw_only
+from . import _exception
+
+from typing import Optional, Tuple
+
+
+@attrs_default
+class Timeout:
+    """How long to wait for Facebook's servers, in seconds.
+
+    Example:
+        >>> session.set_timeout(fbchat.Timeout(connect=5, read=30))
+    """
+
+    #: The maximum time to wait for a connection to be established
+    connect = attr.ib(10.0, type=Optional[float])
+    #: The maximum time to wait between bytes received from the server
+    read = attr.ib(60.0, type=Optional[float])
+
+    def _to_requests(self) -> Tuple[Optional[float], Optional[float]]:
+        return (self.connect, self.read)
+
+
+def _min(timeout: Optional[float], remaining: float) -> float:
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+@attr.s(slots=True, kw_only=kw_only, eq=False)
+class Deadline:
+    """A point in time, after which a series of requests should be abandoned.
+
+    Given to methods that make several requests, like `Client.fetch_threads`, the
+    deadline is checked before each request, and limits the request's timeouts to the
+    time that's left.
+
+    Example:
+        Fetch as many threads as possible in 30 seconds.
+
+        >>> deadline = fbchat.Deadline.after(30)
+        >>> try:
+        ...     for thread in client.fetch_threads(limit=None, deadline=deadline):
+        ...         print(thread.id)
+        ... except fbchat.RequestTimeout:
+        ...     print("Ran out of time")
+    """
+
+    #: The deadline, as a `time.monotonic` value
+    expires = attr.ib(type=float)
+
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        """Create a deadline a number of seconds from now."""
+        return cls(expires=time.monotonic() + seconds)
+
+    def remaining(self) -> float:
+        """The number of seconds left, or ``0`` if the deadline has passed."""
+        return max(self.expires - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        """Whether the deadline has passed."""
+        return self.expires <= time.monotonic()
+
+    def limit(self, timeout: Timeout) -> Timeout:
+        """Shorten a request's timeouts, so they end before the deadline.
+
+        Raises:
+            RequestTimeout: If the deadline has passed
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise _exception.RequestTimeout("Deadline exceeded")
+        return Timeout(
+            connect=_min(timeout.connect, remaining), read=_min(timeout.read, remaining)
+        )
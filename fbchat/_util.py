@@ -1,13 +1,28 @@
+import concurrent.futures
 import datetime
-import json
+import operator
+import queue
+import threading
 import time
 import random
 import urllib.parse
 
 from ._common import log
-from . import _exception
+from . import _json, _exception
 
-from typing import Iterable, Optional, Any, Mapping, Sequence
+from typing import (
+    Iterable,
+    Iterator,
+    Optional,
+    Any,
+    Callable,
+    Mapping,
+    Sequence,
+    TypeVar,
+    Union,
+)
+
+T = TypeVar("T")
 
 
 def int_or_none(inp: Any) -> Optional[int]:
@@ -37,7 +52,7 @@ def get_limits(limit: Optional[int], max_limit: int) -> Iterable[int]:
 
 def json_minimal(data: Any) -> str:
     """Get JSON data in minimal form."""
-    return json.dumps(data, separators=(",", ":"))
+    return _json.dumps(data)
 
 
 def strip_json_cruft(text: str) -> str:
@@ -48,13 +63,61 @@ def strip_json_cruft(text: str) -> str:
         raise _exception.ParseError("No JSON object found", data=text) from e
 
 
-def parse_json(text: str) -> Any:
+def parse_json(text: Union[str, bytes, bytearray, memoryview]) -> Any:
+    """Parse JSON, from a string or directly from UTF-8 encoded bytes."""
     try:
-        return json.loads(text)
+        return _json.loads(text)
     except ValueError as e:
         raise _exception.ParseError("Error while parsing JSON", data=text) from e
 
 
+def iter_concurrently(
+    funcs: Iterable[Callable[[], Iterable[T]]], workers: int
+) -> Iterator[T]:
+    """Run generator functions in a thread pool, yielding items as they're produced.
+
+    At most ``workers`` of the functions run at the same time. Exceptions are raised
+    in the caller, and stop the remaining functions.
+    """
+    funcs = list(funcs)
+    if workers <= 1 or len(funcs) <= 1:
+        for func in funcs:
+            yield from func()
+        return
+
+    done = object()
+    items = queue.Queue()  # type: queue.Queue
+    stop = threading.Event()
+
+    def drain(func):
+        try:
+            for item in func():
+                if stop.is_set():
+                    break
+                items.put((item, None))
+        except Exception as e:
+            items.put((None, e))
+        finally:
+            items.put((done, None))
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(drain, func) for func in funcs]
+        try:
+            remaining = len(futures)
+            while remaining:
+                item, exception = items.get()
+                if exception is not None:
+                    raise exception
+                if item is done:
+                    remaining -= 1
+                else:
+                    yield item
+        finally:
+            stop.set()
+            for future in futures:
+                future.cancel()
+
+
 def generate_offline_threading_id():
     ret = datetime_to_millis(now())
     value = int(random.random() * 4294967295)
@@ -115,8 +178,107 @@ def seconds_to_datetime(timestamp_in_seconds: float) -> datetime.datetime:
     )
 
 
-def millis_to_datetime(timestamp_in_milliseconds: int) -> datetime.datetime:
-    """Convert an UTC timestamp, in milliseconds, to a timezone-aware datetime."""
+class LazyDatetime:
+    """A timestamp, that only creates a `datetime.datetime` when it's needed.
+
+    Returned instead of `datetime.datetime` by sessions with lazy timestamps enabled,
+    see `Session.enable_lazy_timestamps`. Attributes and methods of the datetime, like
+    ``.year`` and ``.isoformat()``, are available directly on this object, and it can
+    be compared with, added to and subtracted from datetimes.
+
+    It's not a subclass of `datetime.datetime`, so ``isinstance`` checks fail. Use
+    `LazyDatetime.to_datetime` where a real datetime is required.
+
+    Comparisons and sorting between lazy timestamps use the milliseconds directly.
+
+    Example:
+        >>> session.enable_lazy_timestamps()
+        >>> message.created_at.millis
+        1500000000000
+        >>> message.created_at.to_datetime()
+        datetime.datetime(2017, 7, 14, 2, 40, tzinfo=datetime.timezone.utc)
+    """
+
+    __slots__ = ("millis", "_datetime")
+
+    def __init__(self, millis: int):
+        #: The UTC timestamp, in milliseconds
+        self.millis = millis
+        self._datetime = None  # type: Optional[datetime.datetime]
+
+    def to_datetime(self) -> datetime.datetime:
+        """The timestamp as a timezone-aware datetime, created on first use."""
+        if self._datetime is None:
+            self._datetime = seconds_to_datetime(self.millis / 1000)
+        return self._datetime
+
+    def __getattr__(self, name):
+        # Don't create the datetime for special methods, e.g. when pickling
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.to_datetime(), name)
+
+    def __repr__(self) -> str:
+        return "LazyDatetime({!r})".format(self.millis)
+
+    def __str__(self) -> str:
+        return str(self.to_datetime())
+
+    def __format__(self, format_spec: str) -> str:
+        return format(self.to_datetime(), format_spec)
+
+    def __hash__(self) -> int:
+        # Must be equal to the datetime's hash, since they compare equal
+        return hash(self.to_datetime())
+
+    def _compare(self, other, op):
+        if isinstance(other, LazyDatetime):
+            return op(self.millis, other.millis)
+        if isinstance(other, datetime.datetime):
+            return op(self.to_datetime(), other)
+        return NotImplemented
+
+    def __eq__(self, other):
+        return self._compare(other, operator.eq)
+
+    def __ne__(self, other):
+        return self._compare(other, operator.ne)
+
+    def __lt__(self, other):
+        return self._compare(other, operator.lt)
+
+    def __le__(self, other):
+        return self._compare(other, operator.le)
+
+    def __gt__(self, other):
+        return self._compare(other, operator.gt)
+
+    def __ge__(self, other):
+        return self._compare(other, operator.ge)
+
+    def __add__(self, other):
+        return self.to_datetime() + other
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if isinstance(other, LazyDatetime):
+            return millis_to_timedelta(self.millis - other.millis)
+        return self.to_datetime() - other
+
+    def __rsub__(self, other):
+        return other - self.to_datetime()
+
+
+def millis_to_datetime(
+    timestamp_in_milliseconds: int, session=None
+) -> datetime.datetime:
+    """Convert an UTC timestamp, in milliseconds, to a timezone-aware datetime.
+
+    Returns a `LazyDatetime` if ``session`` has lazy timestamps enabled.
+    """
+    if getattr(session, "_lazy_timestamps", False):
+        return LazyDatetime(timestamp_in_milliseconds)
     return seconds_to_datetime(timestamp_in_milliseconds / 1000)
 
 
@@ -127,6 +289,8 @@ def datetime_to_seconds(dt: datetime.datetime) -> int:
 
     The returned seconds will be rounded to the nearest whole number.
     """
+    if isinstance(dt, LazyDatetime):
+        return round(dt.millis / 1000)
     # We could've implemented some fancy "convert naive timezones to UTC" logic, but
     # it's not really worth the effort.
     return round(dt.timestamp())
@@ -139,6 +303,8 @@ def datetime_to_millis(dt: datetime.datetime) -> int:
 
     The returned milliseconds will be rounded to the nearest whole number.
     """
+    if isinstance(dt, LazyDatetime):
+        return round(dt.millis)
     return round(dt.timestamp() * 1000)
 
 
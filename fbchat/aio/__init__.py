@@ -0,0 +1,31 @@
+"""Asyncio support for ``fbchat``.
+
+Requires Python 3.6 or later, and ``aiohttp``, which can be installed with::
+
+    $ pip install fbchat[aio]
+
+The API mirrors the synchronous one, except that methods that make requests are
+coroutines, and methods that return iterables return asynchronous iterables. The
+responses are parsed with the same code, into the same models.
+"""
+
+try:
+    import aiohttp as _aiohttp
+except ImportError as e:  # pragma: no cover
+    raise ImportError(
+        "fbchat.aio requires aiohttp, install it with `pip install fbchat[aio]`"
+    ) from e
+
+from ._session import Session
+from ._threads import ThreadABC, Thread, User, Group, Page
+from ._threads import UserData, GroupData, PageData
+from ._client import Client
+from ._listen import Listener
+
+__all__ = ("Session", "Listener", "Client")
+
+
+from .. import _fix_module_metadata
+
+_fix_module_metadata.fixup_module_metadata(globals(), module="fbchat.aio")
+del _fix_module_metadata
@@ -0,0 +1,92 @@
+import attr
+import asyncio
+from .._common import log, kw_only
+from .. import _batch
+
+from typing import Any, AsyncIterator, Callable, List, Optional, Sequence, Set
+
+
+@attr.s(slots=True, kw_only=kw_only, eq=False)
+class Batcher:
+    """Combine GraphQL queries from multiple coroutines into fewer requests.
+
+    The asyncio version of `fbchat._batch.Batcher`.
+    """
+
+    #: Send queries, and return their results
+    _send = attr.ib(type=Callable[..., AsyncIterator[Any]])
+    #: The maximum number of queries in a request
+    max_size = attr.ib(50, type=int)
+    #: The maximum time to wait for other queries, in seconds
+    max_wait = attr.ib(0.01, type=float)
+    #: See `fbchat._batch.Batcher`
+    _retry_delay = attr.ib(
+        None, type=Optional[Callable[[Exception, int], Optional[float]]]
+    )
+    _pending = attr.ib(factory=list, init=False, type=List[_batch.Pending])
+    _handle = attr.ib(None, init=False, type=Optional[asyncio.TimerHandle])
+    #: Keep references to the running requests, so they're not garbage collected
+    _tasks = attr.ib(factory=set, init=False, type=Set[asyncio.Task])
+
+    def _retry(self, pending: _batch.Pending, result) -> bool:
+        query, future, attempt = pending
+        if result.error is not None and self._retry_delay and not future.done():
+            # Only the failed query is retried, in a later batch
+            delay = self._retry_delay(result.error, attempt)
+            if delay is not None:
+                loop = asyncio.get_event_loop()
+                loop.call_later(delay, self._add, [(query, future, attempt + 1)])
+                return True
+        return False
+
+    async def _send_batch(self, batch: Sequence[_batch.Pending]) -> None:
+        log.debug("Sending %d batched GraphQL queries", len(batch))
+        retried = set()  # type: Set[int]
+        try:
+            async for result in self._send(*(query for query, _, _ in batch)):
+                if self._retry(batch[result.index], result):
+                    retried.add(result.index)
+                else:
+                    _batch.set_result(batch[result.index][1], result)
+        except Exception as e:
+            _batch.set_missing(batch, e, retried)
+        else:
+            _batch.set_missing(batch, None, retried)
+
+    def _start(self, batch: Sequence[_batch.Pending]) -> None:
+        task = asyncio.ensure_future(self._send_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _add(self, pending: Sequence[_batch.Pending]) -> None:
+        self._pending.extend(pending)
+        while len(self._pending) >= self.max_size:
+            self._start(_batch.take_batch(self._pending, self.max_size))
+        if self._pending and self._handle is None:
+            loop = asyncio.get_event_loop()
+            self._handle = loop.call_later(self.max_wait, self._flush)
+        elif not self._pending and self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def _flush(self) -> None:
+        self._handle = None
+        while self._pending:
+            self._start(_batch.take_batch(self._pending, self.max_size))
+
+    async def request(self, *queries: Any) -> Sequence[Any]:
+        """Send queries in the next batch, and wait for their results.
+
+        Raises:
+            GraphQLError: If one of the queries failed
+        """
+        loop = asyncio.get_event_loop()
+        pending = [(query, loop.create_future(), 0) for query in queries]
+        self._add(pending)
+
+        futures = [future for _, future, _ in pending]
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        return results
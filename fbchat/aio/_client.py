@@ -0,0 +1,492 @@
+import attr
+import asyncio
+import datetime
+
+from .._common import log, attrs_default
+from .. import _util, _cache, _exception, _graphql, _client, _threads, _models
+from .. import _timeouts
+from . import _session, _threads as _aio_threads
+
+from typing import (
+    Sequence,
+    Iterable,
+    Tuple,
+    Optional,
+    Set,
+    BinaryIO,
+    AsyncIterator,
+    Callable,
+    Dict,
+    TypeVar,
+)
+
+T = TypeVar("T")
+
+
+async def iter_concurrently(
+    iterators: Iterable[AsyncIterator[T]], workers: int
+) -> AsyncIterator[T]:
+    """Run asynchronous iterators concurrently, yielding items as they're produced.
+
+    The asyncio version of `fbchat._util.iter_concurrently`.
+    """
+    iterators = list(iterators)
+    if workers <= 1 or len(iterators) <= 1:
+        for iterator in iterators:
+            async for item in iterator:
+                yield item
+        return
+
+    done = object()
+    items = asyncio.Queue()  # type: asyncio.Queue
+    semaphore = asyncio.Semaphore(workers)
+
+    async def drain(iterator):
+        try:
+            async with semaphore:
+                async for item in iterator:
+                    await items.put((item, None))
+        except Exception as e:
+            await items.put((None, e))
+        finally:
+            await items.put((done, None))
+
+    tasks = [asyncio.ensure_future(drain(iterator)) for iterator in iterators]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            item, exception = await items.get()
+            if exception is not None:
+                raise exception
+            if item is done:
+                remaining -= 1
+            else:
+                yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+@attrs_default
+class Client:
+    """A client for Facebook Messenger.
+
+    The asyncio version of `fbchat.Client`. The methods take the same arguments,
+    and the responses are parsed into the same models as their synchronous
+    counterparts.
+
+    Returned thread data are the asyncio versions, e.g. `fbchat.aio.UserData`, which
+    subclass the synchronous data classes, and whose methods are coroutines.
+
+    Example:
+        >>> client = fbchat.aio.Client(session=session)
+        >>> async for thread in client.fetch_threads(limit=10):
+        ...     await thread.send_text("Hi!")
+    """
+
+    #: The session to use when making requests.
+    session = attr.ib(type=_session.Session)
+    #: Cache of thread data, used by `fetch_thread_info`
+    cache = attr.ib(None, type=Optional[_cache.ThreadCache])
+
+    async def fetch_users(self) -> Sequence[_aio_threads.UserData]:
+        """Fetch users the client is currently chatting with.
+
+        Example:
+            >>> users = await client.fetch_users()
+        """
+        data = {"viewer": self.session.user.id}
+        j = await self.session._payload_post("/chat/user_info_all", data)
+
+        users = []
+        for data in j.values():
+            if data["type"] not in ["user", "friend"] or data["id"] in ["0", 0]:
+                log.warning("Invalid user data %s", data)
+                continue  # Skip invalid users
+            users.append(_threads.UserData._from_all_fetch(self.session, data))
+        return users
+
+    async def search_for_users(
+        self, name: str, limit: int
+    ) -> Sequence[_aio_threads.UserData]:
+        """Find and get users by their name.
+
+        Example:
+            >>> (user,) = await client.search_for_users("user", limit=1)
+        """
+        params = {"search": name, "limit": limit}
+        (j,) = await self.session._graphql_requests(
+            _graphql.from_query(_graphql.SEARCH_USER, params)
+        )
+
+        return [
+            _threads.UserData._from_graphql(self.session, node)
+            for node in j[name]["users"]["nodes"]
+        ]
+
+    async def search_for_pages(
+        self, name: str, limit: int
+    ) -> Sequence[_aio_threads.PageData]:
+        """Find and get pages by their name.
+
+        Example:
+            >>> (page,) = await client.search_for_pages("page", limit=1)
+        """
+        params = {"search": name, "limit": limit}
+        (j,) = await self.session._graphql_requests(
+            _graphql.from_query(_graphql.SEARCH_PAGE, params)
+        )
+
+        return [
+            _threads.PageData._from_graphql(self.session, node)
+            for node in j[name]["pages"]["nodes"]
+        ]
+
+    async def search_for_groups(
+        self, name: str, limit: int
+    ) -> Sequence[_aio_threads.GroupData]:
+        """Find and get group threads by their name.
+
+        Example:
+            >>> (group,) = await client.search_for_groups("group", limit=1)
+        """
+        params = {"search": name, "limit": limit}
+        (j,) = await self.session._graphql_requests(
+            _graphql.from_query(_graphql.SEARCH_GROUP, params)
+        )
+
+        return [
+            _threads.GroupData._from_graphql(self.session, node)
+            for node in j["viewer"]["groups"]["nodes"]
+        ]
+
+    async def search_for_threads(
+        self, name: str, limit: int
+    ) -> Sequence[_threads.ThreadABC]:
+        """Find and get threads by their name.
+
+        Example:
+            >>> (user,) = await client.search_for_threads("user", limit=1)
+        """
+        params = {"search": name, "limit": limit}
+        (j,) = await self.session._graphql_requests(
+            _graphql.from_query(_graphql.SEARCH_THREAD, params)
+        )
+
+        nodes = j[name]["threads"]["nodes"]
+        return list(_client.parse_search_threads(self.session, nodes))
+
+    async def _search_messages(self, query, offset, limit):
+        data = {"query": query, "offset": offset, "limit": limit}
+        j = await self.session._payload_post(
+            "/ajax/mercury/search_snippets.php?dpr=1", data
+        )
+
+        total_snippets = j["search_snippets"][query]
+
+        rtn = []
+        for node in j["graphql_payload"]["message_threads"]:
+            type_ = node["thread_type"]
+            if type_ == "GROUP":
+                thread = _aio_threads.Group(
+                    session=self.session, id=node["thread_key"]["thread_fbid"]
+                )
+            elif type_ == "ONE_TO_ONE":
+                thread = _aio_threads.Thread(
+                    session=self.session, id=node["thread_key"]["other_user_id"]
+                )
+            else:
+                thread = None
+                log.warning("Unknown thread type %s, data: %s", type_, node)
+
+            if thread:
+                rtn.append((thread, total_snippets[thread.id]["num_total_snippets"]))
+            else:
+                rtn.append((None, 0))
+
+        return rtn
+
+    async def search_messages(
+        self, query: str, limit: Optional[int]
+    ) -> AsyncIterator[Tuple[_aio_threads.ThreadABC, int]]:
+        """Search for messages in all threads.
+
+        Example:
+            >>> async for thread, count in client.search_messages("abc", limit=3):
+            ...     print(f"{thread.id} matched the search {count} time(s)")
+        """
+        offset = 0
+        for limit in _util.get_limits(limit, max_limit=100):
+            data = await self._search_messages(query, offset, limit)
+            for thread, total_snippets in data:
+                if thread:
+                    yield (thread, total_snippets)
+            if len(data) < limit:
+                return  # No more data to fetch
+            offset += limit
+
+    async def _fetch_info(self, *ids):
+        data = {"ids[{}]".format(i): _id for i, _id in enumerate(ids)}
+        j = await self.session._payload_post("/chat/user_info/", data)
+        return _client.parse_user_info(j)
+
+    async def _fetch_thread_info(self, ids, retries, failed):
+        pending = ids
+
+        # Groups are yielded as soon as they're received, see `fbchat.Client`
+        entries = []
+        for attempt in range(retries + 1):
+            queries = [_client.thread_info_query(thread_id) for thread_id in pending]
+            errors = {}
+            async for result in self.session._graphql_stream(*queries):
+                thread_id = pending[result.index]
+                if result.error is not None:
+                    errors[thread_id] = result.error
+                    continue
+                entry = _client.get_thread_info_entry(thread_id, result.data)
+                if entry.get("thread_type") == "ONE_TO_ONE":
+                    entries.append(entry)
+                    continue
+                try:
+                    thread = _client.parse_thread_info(self.session, entry, {})
+                except _exception.ParseError as e:
+                    failed[thread_id] = e
+                    continue
+                yield thread
+
+            pending, delay = _client.get_thread_info_retries(
+                self.session, errors, failed, attempt, retries
+            )
+            if not pending:
+                break
+            log.warning("Failed fetching %d thread(s), retrying", len(pending))
+            await asyncio.sleep(delay)
+
+        pages_and_user_ids = [entry["thread_key"]["other_user_id"] for entry in entries]
+        pages_and_users = {}
+        if len(pages_and_user_ids) != 0:
+            try:
+                pages_and_users = await self._fetch_info(*pages_and_user_ids)
+            except _exception.FacebookError as e:
+                failed.update(dict.fromkeys(pages_and_user_ids, e))
+                return
+
+        for thread_id, entry in zip(pages_and_user_ids, entries):
+            try:
+                thread = _client.parse_thread_info(self.session, entry, pages_and_users)
+            except _exception.ParseError as e:
+                failed[thread_id] = e
+                continue
+            yield thread
+
+    async def fetch_thread_info(
+        self,
+        ids: Iterable[str],
+        retries: int = 1,
+        on_error: Callable[[str, _exception.FacebookError], None] = None,
+        chunk_size: int = _client.THREAD_INFO_CHUNK_SIZE,
+        workers: int = 4,
+    ) -> AsyncIterator[_threads.ThreadABC]:
+        """Fetch threads' info from IDs, unordered.
+
+        The IDs are deduplicated and fetched in concurrent chunks, and failed threads
+        are retried and reported, like in `fbchat.Client.fetch_thread_info`.
+
+        Example:
+            >>> async for thread in client.fetch_thread_info(["4"]):
+            ...     print(thread.name)
+            Mark Zuckerberg
+        """
+        failed = {}  # type: Dict[str, _exception.FacebookError]
+        ids = list(dict.fromkeys(ids))
+        if self.cache is not None:
+            cached, ids = self.cache.lookup(ids)
+            for thread in cached:
+                yield thread
+
+        chunks = _client.get_thread_info_chunks(ids, chunk_size)
+        async for thread in iter_concurrently(
+            (self._fetch_thread_info(chunk, retries, failed) for chunk in chunks),
+            workers=workers,
+        ):
+            if self.cache is not None:
+                self.cache.put(thread)
+            yield thread
+        _client.handle_thread_info_errors(failed, on_error)
+
+    async def _fetch_threads(self, limit, before, folders, deadline=None):
+        params = {
+            "limit": limit,
+            "tags": folders,
+            "before": _util.datetime_to_millis(before) if before else None,
+            "includeDeliveryReceipts": True,
+            "includeSeqID": False,
+        }
+        (j,) = await self.session._graphql_requests(
+            _graphql.from_doc_id("1349387578499440", params), deadline=deadline
+        )
+        return _client.parse_threads(self.session, j)
+
+    async def fetch_threads(
+        self,
+        limit: Optional[int],
+        location: _models.ThreadLocation = _models.ThreadLocation.INBOX,
+        deadline: _timeouts.Deadline = None,
+    ) -> AsyncIterator[_threads.ThreadABC]:
+        """Fetch the client's thread list.
+
+        The returned threads are ordered by last active first.
+
+        Example:
+            >>> async for thread in client.fetch_threads(limit=3):
+            ...     print(f"{thread.id}: {thread.name}")
+        """
+        MAX_BATCH_LIMIT = 100
+
+        seen_ids = set()  # type: Set[str]
+        before = None
+        for limit in _util.get_limits(limit, MAX_BATCH_LIMIT):
+            threads = await self._fetch_threads(
+                limit, before, [location.value], deadline
+            )
+
+            before = None
+            for thread in threads:
+                # Don't return seen and unknown threads
+                if thread and thread.id not in seen_ids:
+                    seen_ids.add(thread.id)
+                    before = thread.last_active
+                    yield thread
+
+            if len(threads) < MAX_BATCH_LIMIT:
+                return  # No more data to fetch
+
+            # We check this here in case _fetch_threads only returned `None` threads
+            if not before:
+                raise ValueError("Too many unknown threads.")
+
+    def _to_threads(self, result) -> Sequence[_aio_threads.ThreadABC]:
+        return [
+            _aio_threads.Group(session=self.session, id=id_)
+            for id_ in result["thread_fbids"]
+        ] + [
+            _aio_threads.User(session=self.session, id=id_)
+            for id_ in result["other_user_fbids"]
+        ]
+
+    async def fetch_unread(self) -> Sequence[_aio_threads.ThreadABC]:
+        """Fetch unread threads.
+
+        Warning:
+            This is not finished, and the API may change at any point!
+        """
+        at = _util.now()
+        form = {
+            "folders[0]": "inbox",
+            "client": "mercury",
+            "last_action_timestamp": _util.datetime_to_millis(at),
+        }
+        j = await self.session._payload_post("/ajax/mercury/unread_threads.php", form)
+        return self._to_threads(j["unread_thread_fbids"][0])
+
+    async def fetch_unseen(self) -> Sequence[_aio_threads.ThreadABC]:
+        """Fetch unseen / new threads.
+
+        Warning:
+            This is not finished, and the API may change at any point!
+        """
+        j = await self.session._payload_post("/mercury/unseen_thread_ids/", {})
+        return self._to_threads(j["unseen_thread_fbids"][0])
+
+    async def fetch_image_url(self, image_id: str) -> str:
+        """Fetch URL to download the original image from an image attachment ID.
+
+        Example:
+            >>> await client.fetch_image_url("1234")
+            "https://scontent-arn1-1.xx.fbcdn.net/v/t1.123-4/1_23_45_n.png?..."
+        """
+        data = {"photo_id": str(image_id)}
+        j = await self.session._post("/mercury/attachments/photo/", data)
+        return _client.parse_image_url(j)
+
+    async def _get_private_data(self):
+        (j,) = await self.session._graphql_requests(
+            _graphql.from_doc_id("1868889766468115", {})
+        )
+        return j["viewer"]
+
+    async def get_phone_numbers(self) -> Sequence[str]:
+        """Fetch the user's phone numbers."""
+        data = await self._get_private_data()
+        return [
+            j["phone_number"]["universal_number"] for j in data["user"]["all_phones"]
+        ]
+
+    async def get_emails(self) -> Sequence[str]:
+        """Fetch the user's emails."""
+        data = await self._get_private_data()
+        return [j["display_email"] for j in data["all_emails"]]
+
+    async def upload(
+        self, files: Iterable[Tuple[str, BinaryIO, str]], voice_clip: bool = False
+    ) -> Sequence[Tuple[str, str]]:
+        """Upload files to Facebook.
+
+        Example:
+            >>> with open("file.txt", "rb") as f:
+            ...     (file,) = await client.upload([("file.txt", f, "text/plain")])
+        """
+        file_dict = {"upload_{}".format(i): f for i, f in enumerate(files)}
+
+        data = {"voice_clip": voice_clip}
+
+        j = await self.session._payload_post(
+            "https://upload.messenger.com/ajax/mercury/upload.php",
+            data,
+            files=file_dict,
+        )
+        return _client.parse_uploads(j, len(file_dict))
+
+    async def _read_status(self, read, threads, at):
+        data = {
+            "watermarkTimestamp": _util.datetime_to_millis(at),
+            "shouldSendReadReceipt": "true",
+        }
+
+        for thread in threads:
+            data["ids[{}]".format(thread.id)] = "true" if read else "false"
+
+        await self.session._payload_post("/ajax/mercury/change_read_status.php", data)
+
+    async def mark_as_read(self, threads: Iterable, at: datetime.datetime):
+        """Mark threads as read.
+
+        Example:
+            >>> await client.mark_as_read([thread], datetime.datetime.now())
+        """
+        await self._read_status(True, threads, at)
+
+    async def mark_as_unread(self, threads: Iterable, at: datetime.datetime):
+        """Mark threads as unread."""
+        await self._read_status(False, threads, at)
+
+    async def mark_as_seen(self, at: datetime.datetime):
+        data = {"seen_timestamp": _util.datetime_to_millis(at)}
+        await self.session._payload_post("/ajax/mercury/mark_seen.php", data)
+
+    async def delete_threads(self, threads: Iterable):
+        """Bulk delete threads.
+
+        Example:
+            >>> await client.delete_threads([group])
+        """
+        await _aio_threads.ThreadABC._delete_many(self.session, (t.id for t in threads))
+
+    async def delete_messages(self, messages: Iterable[_models.Message]):
+        """Bulk delete specified messages."""
+        data = {}
+        for i, message in enumerate(messages):
+            data["message_ids[{}]".format(i)] = message.id
+        await self.session._payload_post(
+            "/ajax/mercury/delete_messages.php?dpr=1", data
+        )
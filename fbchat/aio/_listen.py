@@ -0,0 +1,337 @@
+import attr
+import asyncio
+import paho.mqtt.client
+
+from .._common import log, kw_only
+from .. import _util, _exception, _listen, _events, _backfill, _models
+from . import _session, _client
+
+from typing import AsyncIterator, Optional
+
+#: The delay before the first attempt to reconnect, in seconds
+RECONNECT_MIN_DELAY = 1.0
+#: The maximum delay between attempts to reconnect, in seconds
+RECONNECT_MAX_DELAY = 120.0
+
+
+async def fetch_sequence_id(session: _session.Session) -> int:
+    """Fetch sequence ID."""
+    log.debug("Fetching MQTT sequence ID")
+    (j,) = await session._graphql_requests(_listen.sequence_id_query())
+    return _listen.parse_sequence_id(j)
+
+
+async def fetch_new_events(session, thread, since):
+    # The asyncio `User` or `Group`, since the session replaces the thread classes
+    thread = _backfill.to_thread(session, thread)
+    messages = []
+    # Messages are ordered by last sent first
+    async for message in thread.fetch_messages(limit=None):
+        if not _backfill.is_new(message, since):
+            break
+        messages.append(message)
+    messages.reverse()
+    return _backfill.to_events(session, thread, messages)
+
+
+def next_reconnect_delay(delay: Optional[float]) -> float:
+    """The delay before reconnecting, doubled after each failed attempt.
+
+    Same as ``paho``'s default backoff.
+    """
+    if delay is None:
+        return RECONNECT_MIN_DELAY
+    return min(delay * 2, RECONNECT_MAX_DELAY)
+
+
+async def backfill(session, since, concurrency) -> AsyncIterator[_events.MessageEvent]:
+    """Fetch messages sent after ``since``, as recovered `MessageEvent` objects.
+
+    See `fbchat._backfill.backfill`.
+    """
+    log.info("Backfilling messages sent since %s", since)
+    client = _client.Client(session=session)
+    threads = []
+    # `Client.fetch_threads` only fetches a single location
+    for location in _models.ThreadLocation:
+        # Threads are ordered by last active first
+        async for thread in client.fetch_threads(limit=None, location=location):
+            if not _backfill.is_changed(thread, since):
+                break
+            threads.append(thread)
+
+    for i in range(0, len(threads), concurrency):
+        batch = threads[i : i + concurrency]
+        results = await asyncio.gather(
+            *(fetch_new_events(session, thread, since) for thread in batch)
+        )
+        for event in _backfill.merge_batch(results):
+            yield event
+
+
+@attr.s(slots=True, kw_only=kw_only, eq=False)
+class Listener(_listen.Listener):
+    """Listen to incoming Facebook events.
+
+    The asyncio version of `fbchat.Listener`. Instead of polling the connection, the
+    underlying socket is registered with the running event loop, so events are
+    delivered as soon as they're received.
+
+    Threads and users in the events, like ``event.thread``, are the asyncio versions,
+    e.g. `fbchat.aio.Group`, so their methods are coroutines. Messages and thread data
+    in the events, like `fbchat.MessageData`, are the same as in `fbchat.Listener`.
+
+    Example:
+        >>> listener = fbchat.aio.Listener(session, chat_on=True, foreground=True)
+    """
+
+    #: The listener's event loop, set when listening
+    _loop = attr.ib(None, init=False, type=Optional[asyncio.AbstractEventLoop])
+    #: Queue of errors and return codes from the connection, set when listening
+    _queue = attr.ib(None, init=False, type=Optional[asyncio.Queue])
+    _misc_handle = attr.ib(None, init=False, type=Optional[asyncio.TimerHandle])
+    #: Whether the socket has been unregistered because the payload queue is full
+    _reading_paused = attr.ib(False, init=False, type=bool)
+    #: The delay after the last failed attempt to reconnect, reset when connected
+    _reconnect_delay = attr.ib(None, init=False, type=Optional[float])
+
+    def _on_message_handler(self, client, userdata, message):
+        self._payloads.put(message.topic, message.payload)
+
+        if self._paused() and not self._reading_paused:
+            self._reading_paused = True
+            sock = self._mqtt.socket()
+            if sock is not None:
+                self._loop.remove_reader(sock)
+
+        # Wake up the listening loop
+        if self._queue.empty():
+            self._queue.put_nowait(None)
+
+    def _resume_reading(self):
+        if self._reading_paused and not self._paused():
+            self._reading_paused = False
+            sock = self._mqtt.socket()
+            if sock is not None:
+                self._loop.add_reader(sock, self._on_readable)
+                # Data buffered in the SSL or websocket layers doesn't trigger events
+                self._loop.call_soon(self._on_readable)
+
+    def _get_cookie_header(self, url: str) -> str:
+        return _session.get_cookie_header(self.session._session, url)
+
+    def _on_readable(self):
+        if self._reading_paused:
+            return
+        try:
+            rc = self._mqtt.loop_read()
+            # Data may be buffered in the SSL or websocket layers, which would not
+            # trigger another read event on the socket
+            while rc == paho.mqtt.client.MQTT_ERR_SUCCESS and not self._reading_paused:
+                sock = self._mqtt.socket()
+                if sock is None or not sock.pending():
+                    break
+                rc = self._mqtt.loop_read()
+        except Exception as e:
+            self._queue.put_nowait(e)
+            return
+        if rc != paho.mqtt.client.MQTT_ERR_SUCCESS:
+            self._queue.put_nowait(rc)
+
+    def _on_writable(self):
+        try:
+            rc = self._mqtt.loop_write()
+        except Exception as e:
+            self._queue.put_nowait(e)
+            return
+        if rc != paho.mqtt.client.MQTT_ERR_SUCCESS:
+            self._queue.put_nowait(rc)
+
+    def _on_misc(self):
+        # Handles keepalive pings and retries, so it doesn't affect event latency
+        rc = self._mqtt.loop_misc()
+        if rc != paho.mqtt.client.MQTT_ERR_SUCCESS:
+            self._queue.put_nowait(rc)
+        elif self._mqtt.socket() is None:
+            self._queue.put_nowait(paho.mqtt.client.MQTT_ERR_CONN_LOST)
+        else:
+            self._misc_handle = self._loop.call_later(1, self._on_misc)
+
+    def _on_socket_register_write(self, client, userdata, sock):
+        self._loop.add_writer(sock, self._on_writable)
+
+    def _on_socket_unregister_write(self, client, userdata, sock):
+        self._loop.remove_writer(sock)
+
+    def _on_socket_close(self, client, userdata, sock):
+        self._loop.remove_reader(sock)
+        self._loop.remove_writer(sock)
+        if self._misc_handle:
+            self._misc_handle.cancel()
+            self._misc_handle = None
+
+    def _attach_socket(self):
+        sock = self._mqtt.socket()
+        self._mqtt.on_socket_close = self._on_socket_close
+        self._mqtt.on_socket_register_write = self._on_socket_register_write
+        self._mqtt.on_socket_unregister_write = self._on_socket_unregister_write
+        self._loop.add_reader(sock, self._on_readable)
+        if self._mqtt.want_write():
+            self._loop.add_writer(sock, self._on_writable)
+        self._misc_handle = self._loop.call_later(1, self._on_misc)
+
+    def _detach_socket(self):
+        # The callbacks must not be called while reconnecting in the executor
+        self._mqtt.on_socket_close = None
+        self._mqtt.on_socket_register_write = None
+        self._mqtt.on_socket_unregister_write = None
+        self._reading_paused = False
+        sock = self._mqtt.socket()
+        if sock is not None:
+            self._on_socket_close(self._mqtt, None, sock)
+
+    async def _reconnect(self) -> bool:
+        self._detach_socket()
+        self._configure_connect_options()
+        try:
+            # Connecting does a blocking TCP, TLS and websocket handshake
+            await self._loop.run_in_executor(None, self._mqtt.reconnect)
+        except (
+            # Taken from .loop_forever
+            paho.mqtt.client.socket.error,
+            OSError,
+            paho.mqtt.client.WebsocketConnectionError,
+        ) as e:
+            log.debug("MQTT reconnection failed: %s", e)
+            # Wait before reconnecting
+            self._reconnect_delay = next_reconnect_delay(self._reconnect_delay)
+            await asyncio.sleep(self._reconnect_delay)
+            return False
+        self._reconnect_delay = None
+        self._attach_socket()
+        return True
+
+    async def listen(
+        self, filter: _events.EventFilter = None
+    ) -> AsyncIterator[_events.Event]:
+        """Run the listening loop continually.
+
+        This is an asynchronous iterator, that will yield events as they arrive.
+
+        This will automatically reconnect on errors, except if the errors are one of
+        `PleaseRefresh` or `NotLoggedIn`.
+
+        Args:
+            filter: Only parse and yield the selected events, see `fbchat.Listener`.
+
+        Example:
+            Print events continually.
+
+            >>> async for event in listener.listen():
+            ...     print(event)
+        """
+        self._filter = filter
+        self._loop = asyncio.get_event_loop()
+        self._queue = asyncio.Queue()
+
+        self._load_checkpoint()
+        if self._watermark is None:
+            self._watermark = _util.now()
+        if self._sequence_id is None:
+            self._sequence_id = await fetch_sequence_id(self.session)
+
+        try:
+            # Make sure we're connected
+            while not await self._reconnect():
+                pass
+
+            yield _events.Connect()
+
+            while True:
+                self._check_overflow()
+                # The sequence ID was reset in _handle_ms or _check_overflow
+                # TODO: Signal to the user that they should reload their data!
+                if self._sequence_id is None:
+                    self._sequence_id = await fetch_sequence_id(self.session)
+                    self._messenger_queue_publish()
+
+                    if self._backfill_since:
+                        since, self._backfill_since = self._backfill_since, None
+                        async for event in backfill(
+                            self.session, since, self._backfill_concurrency
+                        ):
+                            if self._filter is None or self._filter._accepts_event(
+                                event
+                            ):
+                                yield event
+                            self._handled(event)
+
+                # If disconnect() has been called
+                # Beware, internal API, may have to change this to something more stable!
+                if self._mqtt._state == paho.mqtt.client.mqtt_cs_disconnecting:
+                    break  # Stop listening
+
+                # Parse received payloads in order, before handling errors
+                payload = self._payloads.get()
+                if payload is not None:
+                    self._resume_reading()
+                    for event in self._parse_message(*payload):
+                        yield event
+                        self._handled(event)
+                    # Only persist the position once the events have been handled
+                    if payload[0] == "/t_ms":
+                        self._save_checkpoint()
+                    continue
+
+                item = await self._queue.get()
+
+                if item is None:
+                    continue
+                elif isinstance(item, Exception):
+                    raise item
+                elif isinstance(item, int):
+                    # If known/expected error
+                    if item == paho.mqtt.client.MQTT_ERR_CONN_LOST:
+                        yield _events.Disconnect(reason="Connection lost, retrying")
+                    elif item == paho.mqtt.client.MQTT_ERR_NOMEM:
+                        # This error is wrongly classified
+                        # See https://github.com/eclipse/paho.mqtt.python/issues/340
+                        yield _events.Disconnect(reason="Connection error, retrying")
+                    elif item == paho.mqtt.client.MQTT_ERR_CONN_REFUSED:
+                        raise _exception.NotLoggedIn("MQTT connection refused")
+                    else:
+                        err = paho.mqtt.client.error_string(item)
+                        log.error("MQTT Error: %s", err)
+                        reason = "MQTT Error: {}, retrying".format(err)
+                        yield _events.Disconnect(reason=reason)
+
+                    while not await self._reconnect():
+                        pass
+
+                    yield _events.Connect()
+        finally:
+            self._detach_socket()
+
+    def disconnect(self) -> None:
+        """Disconnect the MQTT listener.
+
+        Can be called while listening, which will stop the listening loop.
+
+        The `Listener` object should not be used after this is called!
+
+        Example:
+            Stop the listener when receiving a message with the text "/stop"
+
+            >>> async for event in listener.listen():
+            ...     if isinstance(event, fbchat.MessageEvent):
+            ...         if event.message.text == "/stop":
+            ...             listener.disconnect()  # Almost the same "break"
+        """
+        self._mqtt.disconnect()
+        # Send the disconnect packet right away, since the socket will be unregistered
+        # from the event loop
+        if self._mqtt.socket() is not None:
+            self._mqtt.loop_write()
+        if self._queue is not None:
+            # Wake up the listening loop
+            self._queue.put_nowait(None)
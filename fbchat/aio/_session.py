@@ -0,0 +1,494 @@
+import attr
+import asyncio
+import codecs
+import collections
+import functools
+import aiohttp
+import yarl
+
+from .._common import kw_only
+from .. import _session, _graphql, _exception, _timeouts, _pool
+from . import _batch
+
+from typing import List, Mapping, Callable, Sequence
+
+
+@attr.s(slots=True, kw_only=kw_only, eq=False)
+class PoolTracker:
+    """Counts the connections and requests to each host, using ``aiohttp``'s tracing.
+
+    ``aiohttp`` doesn't keep these counters itself, see `Session.get_pool_stats`.
+    """
+
+    #: Number of connections created to each host
+    connections = attr.ib(factory=collections.Counter, type=collections.Counter)
+    #: Number of requests sent to each host
+    requests = attr.ib(factory=collections.Counter, type=collections.Counter)
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        config = aiohttp.TraceConfig()
+        config.on_request_start.append(self._on_request_start)
+        config.on_connection_create_end.append(self._on_connection_create_end)
+        return config
+
+    async def _on_request_start(self, session, context, params):
+        # The context is shared by the callbacks of a request, and connection events
+        # don't include the host
+        context.host = params.url.host
+        self.requests[context.host] += 1
+
+    async def _on_connection_create_end(self, session, context, params):
+        self.connections[context.host] += 1
+
+
+def session_factory(
+    pool: _pool.PoolConfig = None,
+    tracker: PoolTracker = None,
+    cookie_jar: aiohttp.abc.AbstractCookieJar = None,
+) -> aiohttp.ClientSession:
+    from .. import __version__
+
+    if pool is None:
+        pool = _pool.PoolConfig()
+
+    # Same default headers and cookies as `fbchat._session.session_factory`
+    headers = {
+        "Referer": "https://www.messenger.com/",
+        "User-Agent": "fbchat/{}".format(__version__),
+    }
+    # aiohttp always waits for a free connection when the limit is reached, instead of
+    # opening one that's discarded after use, so `PoolConfig.block` is ignored
+    connector = aiohttp.TCPConnector(
+        limit_per_host=pool.size, force_close=not pool.keep_alive
+    )
+    session = aiohttp.ClientSession(
+        headers=headers,
+        connector=connector,
+        cookie_jar=cookie_jar,
+        trace_configs=[tracker.trace_config()] if tracker is not None else None,
+    )
+    session.cookie_jar.update_cookies({"locale": "en_US"})
+    return session
+
+
+def get_user_id(session: aiohttp.ClientSession) -> str:
+    cookies = get_cookies(session)
+    rtn = cookies.get("c_user")
+    if rtn is None:
+        raise _exception.ParseError("Could not find user id", data=cookies)
+    return str(rtn)
+
+
+def get_cookies(session: aiohttp.ClientSession) -> Mapping[str, str]:
+    return {cookie.key: cookie.value for cookie in session.cookie_jar}
+
+
+def get_cookie_header(session: aiohttp.ClientSession, url: str) -> str:
+    """Extract a cookie header from an aiohttp session."""
+    cookies = session.cookie_jar.filter_cookies(yarl.URL(url))
+    return "; ".join("{}={}".format(k, v.value) for k, v in cookies.items())
+
+
+def form_data(data, files=None) -> aiohttp.FormData:
+    """Convert data and files in the format `requests` uses to `aiohttp.FormData`."""
+    form = aiohttp.FormData()
+    for key, value in data.items():
+        # Mimic `requests`, which skips fields set to `None`
+        if value is not None:
+            form.add_field(key, str(value))
+    for key, (filename, f, content_type) in (files or {}).items():
+        form.add_field(key, f, filename=filename, content_type=content_type)
+    return form
+
+
+def client_timeout(timeout: _timeouts.Timeout, deadline=None) -> aiohttp.ClientTimeout:
+    """Convert a `Timeout`, and optionally a `Deadline`, to ``aiohttp``'s format."""
+    return aiohttp.ClientTimeout(
+        total=deadline.remaining() if deadline is not None else None,
+        sock_connect=timeout.connect,
+        sock_read=timeout.read,
+    )
+
+
+def handle_client_error(e):
+    # Checked first, since connection timeouts are also connection errors
+    if isinstance(e, asyncio.TimeoutError):
+        raise _exception.RequestTimeout("Request timed out") from e
+    if isinstance(e, aiohttp.ClientConnectionError):
+        raise _exception.ConnectionFailed("Connection error") from e
+    raise _exception.HTTPError("Requests error") from e
+
+
+@attr.s(slots=True, kw_only=kw_only, repr=False, eq=False)
+class Session(_session.Session):
+    """Stores and manages state required for most Facebook requests.
+
+    The asyncio version of `fbchat.Session`, using ``aiohttp`` to make requests.
+
+    The session should be closed with `Session.close` when it's no longer needed,
+    alternatively it can be used as an asynchronous context manager.
+
+    Example:
+        >>> async with await fbchat.aio.Session.from_cookies(cookies) as session:
+        ...     print(session.user.id)
+        1234
+    """
+
+    _pool_tracker = attr.ib(factory=PoolTracker, type=PoolTracker)
+
+    @property
+    def user(self):
+        """The logged in user."""
+        from . import _threads
+
+        return _threads.User(session=self, id=self._user_id)
+
+    @property
+    def _thread_classes(self):
+        from . import _threads
+
+        return _threads.THREAD_CLASSES
+
+    def __repr__(self) -> str:
+        return "<fbchat.aio.Session user_id={}>".format(self._user_id)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self) -> None:
+        """Close the underlying HTTP connections.
+
+        The session object must not be used after this action has been performed!
+        """
+        await self._session.close()
+
+    @classmethod
+    async def login(
+        cls,
+        email: str,
+        password: str,
+        on_2fa_callback: Callable[[], int] = None,
+        timeout: _timeouts.Timeout = None,
+        pool: _pool.PoolConfig = None,
+    ):
+        """Login the user, using ``email`` and ``password``.
+
+        Logging in is rare, and the flow is fairly complex, so this runs
+        `fbchat.Session.login` in the default executor, and then loads the resulting
+        cookies. See that method for details about the arguments.
+
+        Example:
+            >>> session = await fbchat.aio.Session.login("<email>", "<password>")
+        """
+        loop = asyncio.get_event_loop()
+        sync_session = await loop.run_in_executor(
+            None, _session.Session.login, email, password, on_2fa_callback, timeout
+        )
+        return await cls.from_cookies(
+            sync_session.get_cookies(), timeout=timeout, pool=pool
+        )
+
+    async def is_logged_in(self, timeout: _timeouts.Timeout = None) -> bool:
+        """Send a request to Facebook to check the login status.
+
+        Args:
+            timeout: Override the session's default timeout
+
+        Returns:
+            Whether the user is still logged in
+
+        Example:
+            >>> assert await session.is_logged_in()
+        """
+        timeout = self._get_timeout(timeout)
+        with self._record_request():
+            try:
+                async with self._session.get(
+                    _session.prefix_url("/login/"),
+                    allow_redirects=False,
+                    timeout=client_timeout(timeout),
+                ) as r:
+                    _exception.handle_http_error(r.status)
+                    return "https://www.messenger.com/" == r.headers.get("Location")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                handle_client_error(e)
+
+    async def logout(self, timeout: _timeouts.Timeout = None) -> None:
+        """Safely log out the user.
+
+        The session object must not be used after this action has been performed!
+
+        Args:
+            timeout: Override the session's default timeout
+
+        Example:
+            >>> await session.logout()
+        """
+        with self._lock:
+            data = {"fb_dtsg": self._fb_dtsg}
+        timeout = self._get_timeout(timeout)
+        with self._record_request():
+            try:
+                async with self._session.post(
+                    _session.prefix_url("/logout/"),
+                    data=form_data(data),
+                    allow_redirects=False,
+                    timeout=client_timeout(timeout),
+                ) as r:
+                    _exception.handle_http_error(r.status)
+                    location = r.headers.get("Location")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                handle_client_error(e)
+
+        if location is None:
+            raise _exception.FacebookError("Failed logging out, was not redirected!")
+        if "https://www.messenger.com/login/" != location:
+            raise _exception.FacebookError(
+                "Failed logging out, got bad redirect: {}".format(location)
+            )
+
+    @classmethod
+    async def _from_session(cls, session, timeout=None, pool_tracker=None):
+        user_id = get_user_id(session)
+        if timeout is None:
+            timeout = _timeouts.Timeout()
+
+        # Make a request to the main page to retrieve ServerJSDefine entries
+        try:
+            async with session.get(
+                _session.prefix_url("/"),
+                allow_redirects=False,
+                timeout=client_timeout(timeout),
+            ) as r:
+                _exception.handle_http_error(r.status)
+                html = await r.text(encoding="utf-8")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            handle_client_error(e)
+
+        fb_dtsg, revision = _session.get_session_data(html)
+
+        return cls(
+            user_id=user_id,
+            fb_dtsg=fb_dtsg,
+            revision=revision,
+            session=session,
+            timeout=timeout,
+            pool_tracker=pool_tracker or PoolTracker(),
+        )
+
+    def get_cookies(self) -> Mapping[str, str]:
+        """Retrieve session cookies, that can later be used in `from_cookies`.
+
+        Returns:
+            A dictionary containing session cookies
+
+        Example:
+            >>> cookies = session.get_cookies()
+        """
+        return get_cookies(self._session)
+
+    @classmethod
+    async def from_cookies(
+        cls,
+        cookies: Mapping[str, str],
+        timeout: _timeouts.Timeout = None,
+        pool: _pool.PoolConfig = None,
+    ):
+        """Load a session from session cookies.
+
+        The cookies are compatible with the ones from `fbchat.Session.get_cookies`.
+
+        Args:
+            cookies: A dictionary containing session cookies
+            timeout: Timeout of the request loading the session, and the default
+                timeout of the returned session
+            pool: Settings of the connection pool, used for each host. See
+                `Session.set_pool_config`.
+
+        Example:
+            >>> session = await fbchat.aio.Session.from_cookies(cookies)
+        """
+        tracker = PoolTracker()
+        session = session_factory(pool, tracker)
+        session.cookie_jar.update_cookies(cookies)
+        try:
+            return await cls._from_session(
+                session=session, timeout=timeout, pool_tracker=tracker
+            )
+        except BaseException:
+            await session.close()
+            raise
+
+    async def set_pool_config(self, config: _pool.PoolConfig) -> None:
+        """Configure the connection pool.
+
+        Unlike `fbchat.Session.set_pool_config`, the settings are used for every host,
+        since ``aiohttp`` shares a connector between all hosts. The connector limits the
+        connections to each host separately, so hosts don't compete for connections.
+
+        ``aiohttp`` always waits for a connection to be returned to a full pool, so
+        `PoolConfig.block` is ignored.
+
+        Open connections in the previous pool are closed, so this should be done before
+        making requests.
+
+        Args:
+            config: The pool's settings
+
+        Example:
+            >>> await session.set_pool_config(fbchat.PoolConfig(size=20))
+        """
+        tracker = PoolTracker()
+        previous = self._session
+        self._session = session_factory(config, tracker, cookie_jar=previous.cookie_jar)
+        self._pool_tracker = tracker
+        await previous.close()
+
+    def get_pool_stats(self) -> Sequence[_pool.PoolStats]:
+        """Utilization of the session's connection pool, one for each host.
+
+        Example:
+            >>> for stats in session.get_pool_stats():
+            ...     print(stats.host, stats.connections, stats.requests)
+            www.messenger.com 4 1000
+        """
+        connector = self._session.connector
+        # aiohttp doesn't expose the idle connections, they're kept by host in `_conns`
+        idle = collections.Counter()  # type: collections.Counter
+        for key, conns in getattr(connector, "_conns", {}).items():
+            idle[key.host] += len(conns)
+        rtn = []  # type: List[_pool.PoolStats]
+        for host, requests in self._pool_tracker.requests.items():
+            rtn.append(
+                _pool.PoolStats(
+                    host=host,
+                    size=connector.limit_per_host,
+                    connections=self._pool_tracker.connections[host],
+                    requests=requests,
+                    idle=idle[host],
+                )
+            )
+        return rtn
+
+    async def _with_retries(self, send, deadline=None, retry=False):
+        self._retry_policy.budget.deposit()
+        attempt = 0
+        while True:
+            try:
+                return await send(deadline=deadline)
+            except (_exception.HTTPError, _exception.ExternalError) as e:
+                delay = self._retry_delay(e, attempt, deadline) if retry else None
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _send(self, url, data, files=None, deadline=None):
+        delay = self._throttle_delay(url, deadline)
+        if delay:
+            await asyncio.sleep(delay)
+        timeout = self._get_timeout(deadline=deadline)
+        with self._record_request():
+            try:
+                async with self._session.post(
+                    _session.prefix_url(url),
+                    data=form_data(data, files),
+                    timeout=client_timeout(timeout, deadline),
+                ) as r:
+                    _exception.handle_http_error(r.status)
+                    # Facebook's encoding is always UTF-8
+                    return await r.text(encoding="utf-8")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                handle_client_error(e)
+
+    async def _send_stream(self, url, data, deadline=None):
+        delay = self._throttle_delay(url, deadline)
+        if delay:
+            await asyncio.sleep(delay)
+        timeout = self._get_timeout(deadline=deadline)
+        with self._record_request():
+            try:
+                r = await self._session.post(
+                    _session.prefix_url(url),
+                    data=form_data(data),
+                    timeout=client_timeout(timeout, deadline),
+                )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                handle_client_error(e)
+            if not r.ok:
+                r.close()
+            _exception.handle_http_error(r.status)
+        return r
+
+    async def _post(
+        self, url, data, files=None, as_graphql=False, deadline=None, retry=False
+    ):
+        data.update(self._get_params())
+
+        # Errors returned by Facebook in the response may also be temporary
+        async def send(deadline):
+            text = await self._send(url, data, files=files, deadline=deadline)
+            return _session.parse_response(text, as_graphql=as_graphql)
+
+        return await self._with_retries(send, deadline=deadline, retry=retry)
+
+    async def _post_stream(self, url, data, retry=False):
+        data.update(self._get_params())
+        # Facebook's encoding is always UTF-8
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        send = functools.partial(self._send_stream, url, data)
+        # Only sending the request is retried, see `fbchat.Session._post_stream`
+        r = await self._with_retries(send, retry=retry)
+        async with r:
+            try:
+                async for chunk in r.content.iter_chunked(_session.STREAM_CHUNK_SIZE):
+                    yield decoder.decode(chunk)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                handle_client_error(e)
+        yield decoder.decode(b"", final=True)
+
+    async def _payload_post(self, url, data, files=None):
+        j = await self._post(url, data, files=files)
+        # `_get_params` added the request's number to the data
+        return self._parse_payload(j, int(data["__req"], 36))
+
+    def enable_batching(self, max_size: int = 50, max_wait: float = 0.01) -> None:
+        """Combine GraphQL queries made at the same time into fewer requests.
+
+        Queries from other coroutines are collected until ``max_size`` are waiting or
+        ``max_wait`` seconds have passed, and then sent together. See
+        `fbchat.Session.enable_batching`.
+
+        Example:
+            >>> session.enable_batching(max_size=100, max_wait=0.05)
+        """
+        self._batcher = _batch.Batcher(
+            send=self._graphql_stream,
+            max_size=max_size,
+            max_wait=max_wait,
+            retry_delay=lambda error, attempt: self._retry_delay(error, attempt, None),
+        )
+
+    async def _graphql_requests(self, *queries, deadline=None, retry=True):
+        if self._batcher is not None and deadline is None and retry:
+            return await self._batcher.request(*queries)
+        data = _graphql.queries_to_data(*queries)
+        return await self._post(
+            "/api/graphqlbatch/", data, as_graphql=True, deadline=deadline, retry=retry
+        )
+
+    async def _graphql_stream(self, *queries):
+        data = _graphql.queries_to_data(*queries)
+        parser = _graphql.ResponseParser()
+        async for text in self._post_stream("/api/graphqlbatch/", data, retry=True):
+            for result in parser.feed(text):
+                yield result
+        for result in parser.close():
+            yield result
+
+    async def _do_send_request(self, data):
+        j = await self._post("/messaging/send/", self._prepare_send_request(data))
+        return _session.get_message_id(j)
@@ -0,0 +1,681 @@
+import abc
+import attr
+import datetime
+import inspect
+from .._common import attrs_default
+from .. import _util, _exception, _graphql, _models, _threads, _timeouts
+from . import _session
+
+from typing import Mapping, MutableMapping, Iterable, Tuple, Optional, AsyncIterator
+
+
+class ThreadABC(metaclass=abc.ABCMeta):
+    """Implemented by thread-like classes.
+
+    The asyncio version of `fbchat.ThreadABC`. The methods take the same arguments,
+    and return the same data, as their synchronous counterparts.
+
+    This is private to implement.
+    """
+
+    @property
+    @abc.abstractmethod
+    def session(self) -> _session.Session:
+        """The session to use when making requests."""
+        raise NotImplementedError
+
+    @property
+    @abc.abstractmethod
+    def id(self) -> str:
+        """The unique identifier of the thread."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def _to_send_data(self) -> MutableMapping[str, str]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def _copy(self) -> "ThreadABC":
+        raise NotImplementedError
+
+    async def wave(self, first: bool = True) -> str:
+        """Wave hello to the thread.
+
+        Example:
+            >>> await thread.wave(False)
+        """
+        data = self._to_send_data()
+        data["action_type"] = "ma-type:user-generated-message"
+        data["lightweight_action_attachment[lwa_state]"] = (
+            "INITIATED" if first else "RECIPROCATED"
+        )
+        data["lightweight_action_attachment[lwa_type]"] = "WAVE"
+        message_id, thread_id = await self.session._do_send_request(data)
+        return message_id
+
+    async def send_text(
+        self,
+        text: str,
+        mentions: Iterable["_models.Mention"] = None,
+        files: Iterable[Tuple[str, str]] = None,
+        reply_to_id: str = None,
+    ) -> str:
+        """Send a message to the thread.
+
+        Example:
+            >>> message_id = await thread.send_text("A message")
+        """
+        data = self._to_send_data()
+        data["action_type"] = "ma-type:user-generated-message"
+        if text is not None:  # To support `send_files`
+            data["body"] = text
+
+        for i, mention in enumerate(mentions or ()):
+            data.update(mention._to_send_data(i))
+
+        if files:
+            data["has_attachment"] = True
+
+        for i, (file_id, mimetype) in enumerate(files or ()):
+            data["{}s[{}]".format(_util.mimetype_to_key(mimetype), i)] = file_id
+
+        if reply_to_id:
+            data["replied_to_message_id"] = reply_to_id
+
+        return await self.session._do_send_request(data)
+
+    async def send_emoji(self, emoji: str, size: "_models.EmojiSize") -> str:
+        """Send an emoji to the thread.
+
+        Example:
+            >>> await thread.send_emoji("😀", size=fbchat.EmojiSize.LARGE)
+        """
+        data = self._to_send_data()
+        data["action_type"] = "ma-type:user-generated-message"
+        data["body"] = emoji
+        data["tags[0]"] = "hot_emoji_size:{}".format(size.name.lower())
+        return await self.session._do_send_request(data)
+
+    async def send_sticker(self, sticker_id: str) -> str:
+        """Send a sticker to the thread.
+
+        Example:
+            >>> await thread.send_sticker("1889713947839631")
+        """
+        data = self._to_send_data()
+        data["action_type"] = "ma-type:user-generated-message"
+        data["sticker_id"] = sticker_id
+        return await self.session._do_send_request(data)
+
+    async def _send_location(self, current, latitude, longitude):
+        data = self._to_send_data()
+        data["action_type"] = "ma-type:user-generated-message"
+        data["location_attachment[coordinates][latitude]"] = latitude
+        data["location_attachment[coordinates][longitude]"] = longitude
+        data["location_attachment[is_current_location]"] = current
+        return await self.session._do_send_request(data)
+
+    async def send_location(self, latitude: float, longitude: float):
+        """Send a given location to a thread as the user's current location.
+
+        Example:
+            >>> await thread.send_location(51.5287718, -0.2416815)
+        """
+        await self._send_location(True, latitude=latitude, longitude=longitude)
+
+    async def send_pinned_location(self, latitude: float, longitude: float):
+        """Send a given location to a thread as a pinned location.
+
+        Example:
+            >>> await thread.send_pinned_location(39.9390731, 116.117273)
+        """
+        await self._send_location(False, latitude=latitude, longitude=longitude)
+
+    async def send_files(self, files: Iterable[Tuple[str, str]]):
+        """Send files from file IDs to a thread.
+
+        Example:
+            >>> files = await client.upload([("video.mp4", f, "video/mp4")])
+            >>> await thread.send_files(files)
+        """
+        return await self.send_text(text=None, files=files)
+
+    async def _search_messages(self, query, offset, limit):
+        data = {
+            "query": query,
+            "snippetOffset": offset,
+            "snippetLimit": limit,
+            "identifier": "thread_fbid",
+            "thread_fbid": self.id,
+        }
+        j = await self.session._payload_post(
+            "/ajax/mercury/search_snippets.php?dpr=1", data
+        )
+        return _threads.ThreadABC._parse_snippets(self._copy(), query, j)
+
+    async def search_messages(
+        self, query: str, limit: int
+    ) -> AsyncIterator["_models.MessageSnippet"]:
+        """Find and get message IDs by query.
+
+        Example:
+            >>> async for snippet in thread.search_messages("abc", limit=1):
+            ...     print(snippet.text)
+            Some text and abc
+        """
+        offset = 0
+        for limit in _util.get_limits(limit, max_limit=50):
+            _, snippets = await self._search_messages(query, offset, limit)
+            for snippet in snippets:
+                yield snippet
+            if len(snippets) < limit:
+                return  # No more data to fetch
+            offset += limit
+
+    async def _fetch_messages(self, limit, before, deadline=None):
+        params = {
+            "id": self.id,
+            "message_limit": limit,
+            "load_messages": True,
+            "load_read_receipts": True,
+            "before": _util.datetime_to_millis(before) if before else None,
+        }
+        (j,) = await self.session._graphql_requests(
+            _graphql.from_doc_id("1860982147341344", params), deadline=deadline
+        )
+        return _threads.ThreadABC._parse_messages(self._copy(), j)
+
+    async def fetch_messages(
+        self, limit: Optional[int], deadline: _timeouts.Deadline = None
+    ) -> AsyncIterator["_models.MessageData"]:
+        """Fetch messages in a thread.
+
+        The returned messages are ordered by last sent first.
+
+        Example:
+            >>> async for message in thread.fetch_messages(limit=5):
+            ...     print(message.text)
+        """
+        MAX_BATCH_LIMIT = 100
+
+        before = None
+        for limit in _util.get_limits(limit, MAX_BATCH_LIMIT):
+            messages = await self._fetch_messages(limit, before, deadline)
+            messages.reverse()
+
+            for message in messages[1:] if before else messages:
+                yield message
+
+            if len(messages) < MAX_BATCH_LIMIT:
+                return  # No more data to fetch
+
+            before = messages[-1].created_at
+
+    async def _fetch_images(self, limit, after):
+        data = {"id": self.id, "first": limit, "after": after}
+        (j,) = await self.session._graphql_requests(
+            _graphql.from_query_id("515216185516880", data)
+        )
+        return _threads.ThreadABC._parse_images(self.id, j)
+
+    async def fetch_images(
+        self, limit: Optional[int]
+    ) -> AsyncIterator["_models.Attachment"]:
+        """Fetch images/videos posted in the thread.
+
+        Example:
+            >>> async for image in thread.fetch_images(limit=3):
+            ...     print(image.id)
+        """
+        cursor = None
+        for limit in _util.get_limits(limit, max_limit=1000):
+            cursor, images = await self._fetch_images(limit, cursor)
+            if not images:
+                return  # No more data to fetch
+            for image in images:
+                if image:
+                    yield image
+
+    async def set_nickname(self, user_id: str, nickname: str):
+        """Change the nickname of a user in the thread.
+
+        Example:
+            >>> await thread.set_nickname("1234", "A nickname")
+        """
+        data = {
+            "nickname": nickname,
+            "participant_id": user_id,
+            "thread_or_other_fbid": self.id,
+        }
+        await self.session._payload_post(
+            "/messaging/save_thread_nickname/?source=thread_settings&dpr=1", data
+        )
+
+    async def set_color(self, color: str):
+        """Change thread color.
+
+        See `fbchat.ThreadABC.set_color` for the list of valid colors.
+
+        Example:
+            >>> await thread.set_color("#e68585")
+        """
+        if color not in _threads.SETABLE_COLORS:
+            raise ValueError(
+                "Invalid color! Please use one of: {}".format(_threads.SETABLE_COLORS)
+            )
+
+        # Set color to "" if DEFAULT_COLOR. Just how the endpoint works...
+        if color == _threads.DEFAULT_COLOR:
+            color = ""
+
+        data = {"color_choice": color, "thread_or_other_fbid": self.id}
+        await self.session._payload_post(
+            "/messaging/save_thread_color/?source=thread_settings&dpr=1", data
+        )
+
+    async def set_emoji(self, emoji: Optional[str]):
+        """Change thread emoji.
+
+        Example:
+            >>> await thread.set_emoji("😊")
+        """
+        data = {"emoji_choice": emoji, "thread_or_other_fbid": self.id}
+        await self.session._payload_post(
+            "/messaging/save_thread_emoji/?source=thread_settings&dpr=1", data
+        )
+
+    async def forward_attachment(self, attachment_id: str):
+        """Forward an attachment.
+
+        Example:
+            >>> await thread.forward_attachment("1234")
+        """
+        data = {
+            "attachment_id": attachment_id,
+            "recipient_map[{}]".format(_util.generate_offline_threading_id()): self.id,
+        }
+        j = await self.session._payload_post("/mercury/attachments/forward/", data)
+        if not j.get("success"):
+            raise _exception.ExternalError("Failed forwarding attachment", j["error"])
+
+    async def _set_typing(self, typing):
+        data = {
+            "typ": "1" if typing else "0",
+            "thread": self.id,
+            "source": "mercury-chat",
+        }
+        await self.session._payload_post("/ajax/messaging/typ.php", data)
+
+    async def start_typing(self):
+        """Set the current user to start typing in the thread.
+
+        Example:
+            >>> await thread.start_typing()
+        """
+        await self._set_typing(True)
+
+    async def stop_typing(self):
+        """Set the current user to stop typing in the thread.
+
+        Example:
+            >>> await thread.stop_typing()
+        """
+        await self._set_typing(False)
+
+    async def mute(self, duration: datetime.timedelta = None):
+        """Mute the thread.
+
+        Example:
+            >>> await thread.mute(datetime.timedelta(days=2))
+        """
+        if duration is None:
+            setting = "-1"
+        else:
+            setting = str(_util.timedelta_to_seconds(duration))
+        data = {"mute_settings": setting, "thread_fbid": self.id}
+        await self.session._payload_post(
+            "/ajax/mercury/change_mute_thread.php?dpr=1", data
+        )
+
+    async def unmute(self):
+        """Unmute the thread.
+
+        Example:
+            >>> await thread.unmute()
+        """
+        await self.mute(datetime.timedelta(0))
+
+    async def _mute_reactions(self, mode: bool):
+        data = {"reactions_mute_mode": "1" if mode else "0", "thread_fbid": self.id}
+        await self.session._payload_post(
+            "/ajax/mercury/change_reactions_mute_thread/?dpr=1", data
+        )
+
+    async def mute_reactions(self):
+        """Mute thread reactions."""
+        await self._mute_reactions(True)
+
+    async def unmute_reactions(self):
+        """Unmute thread reactions."""
+        await self._mute_reactions(False)
+
+    async def _mute_mentions(self, mode: bool):
+        data = {"mentions_mute_mode": "1" if mode else "0", "thread_fbid": self.id}
+        await self.session._payload_post(
+            "/ajax/mercury/change_mentions_mute_thread/?dpr=1", data
+        )
+
+    async def mute_mentions(self):
+        """Mute thread mentions."""
+        await self._mute_mentions(True)
+
+    async def unmute_mentions(self):
+        """Unmute thread mentions."""
+        await self._mute_mentions(False)
+
+    async def mark_as_spam(self):
+        """Mark the thread as spam, and delete it."""
+        data = {"id": self.id}
+        await self.session._payload_post("/ajax/mercury/mark_spam.php?dpr=1", data)
+
+    @staticmethod
+    async def _delete_many(session, thread_ids):
+        data = {}
+        for i, id_ in enumerate(thread_ids):
+            data["ids[{}]".format(i)] = id_
+        await session._payload_post("/ajax/mercury/delete_thread.php", data)
+
+    async def delete(self):
+        """Delete the thread.
+
+        Example:
+            >>> await thread.delete()
+        """
+        await self._delete_many(self.session, [self.id])
+
+    async def _forced_fetch(self, message_id: str) -> dict:
+        params = {
+            "thread_and_message_id": {"thread_id": self.id, "message_id": message_id}
+        }
+        (j,) = await self.session._graphql_requests(
+            _graphql.from_doc_id("1768656253222505", params)
+        )
+        return j
+
+
+@attrs_default
+class Thread(ThreadABC):
+    """Represents a Facebook thread, where the actual type is unknown.
+
+    The asyncio version of `fbchat.Thread`.
+    """
+
+    #: The session to use when making requests.
+    session = attr.ib(type=_session.Session)
+    #: The unique identifier of the thread.
+    id = attr.ib(converter=str, type=str)
+
+    def _to_send_data(self):
+        raise NotImplementedError(
+            "The method you called is not supported on raw Thread objects."
+            " Please use an appropriate User/Group/Page object instead!"
+        )
+
+    def _copy(self) -> "Thread":
+        return _threads.intern_thread(Thread, self.session, self.id)
+
+
+@attrs_default
+class User(ThreadABC):
+    """Represents a Facebook user.
+
+    The asyncio version of `fbchat.User`.
+
+    Example:
+        >>> user = fbchat.aio.User(session=session, id="1234")
+    """
+
+    #: The session to use when making requests.
+    session = attr.ib(type=_session.Session)
+    #: The user's unique identifier.
+    id = attr.ib(converter=str, type=str)
+
+    def _to_send_data(self):
+        return {
+            "other_user_fbid": self.id,
+            # The entry below is to support .wave
+            "specific_to_list[0]": "fbid:{}".format(self.id),
+        }
+
+    def _copy(self) -> "User":
+        return _threads.intern_thread(User, self.session, self.id)
+
+    async def confirm_friend_request(self):
+        """Confirm a friend request, adding the user to your friend list."""
+        data = {"to_friend": self.id, "action": "confirm"}
+        await self.session._payload_post("/ajax/add_friend/action.php?dpr=1", data)
+
+    async def remove_friend(self):
+        """Remove the user from the client's friend list."""
+        data = {"uid": self.id}
+        await self.session._payload_post("/ajax/profile/removefriendconfirm.php", data)
+
+    async def block(self):
+        """Block messages from the user."""
+        data = {"fbid": self.id}
+        await self.session._payload_post("/messaging/block_messages/?dpr=1", data)
+
+    async def unblock(self):
+        """Unblock a previously blocked user."""
+        data = {"fbid": self.id}
+        await self.session._payload_post("/messaging/unblock_messages/?dpr=1", data)
+
+
+@attrs_default
+class Group(ThreadABC):
+    """Represents a Facebook group.
+
+    The asyncio version of `fbchat.Group`.
+
+    Example:
+        >>> group = fbchat.aio.Group(session=session, id="1234")
+    """
+
+    #: The session to use when making requests.
+    session = attr.ib(type=_session.Session)
+    #: The group's unique identifier.
+    id = attr.ib(converter=str, type=str)
+
+    def _to_send_data(self):
+        return {"thread_fbid": self.id}
+
+    def _copy(self) -> "Group":
+        return _threads.intern_thread(Group, self.session, self.id)
+
+    async def add_participants(self, user_ids: Iterable[str]):
+        """Add users to the group.
+
+        Example:
+            >>> await group.add_participants(["1234", "2345"])
+        """
+        data = self._to_send_data()
+
+        data["action_type"] = "ma-type:log-message"
+        data["log_message_type"] = "log:subscribe"
+
+        for i, user_id in enumerate(user_ids):
+            if user_id == self.session.user.id:
+                raise ValueError(
+                    "Error when adding users: Cannot add self to group thread"
+                )
+            else:
+                data[
+                    "log_message_data[added_participants][{}]".format(i)
+                ] = "fbid:{}".format(user_id)
+
+        return await self.session._do_send_request(data)
+
+    async def remove_participant(self, user_id: str):
+        """Remove user from the group.
+
+        Example:
+            >>> await group.remove_participant("1234")
+        """
+        data = {"uid": user_id, "tid": self.id}
+        await self.session._payload_post("/chat/remove_participants/", data)
+
+    async def _admin_status(self, user_ids: Iterable[str], status: bool):
+        data = {"add": status, "thread_fbid": self.id}
+
+        for i, user_id in enumerate(user_ids):
+            data["admin_ids[{}]".format(i)] = str(user_id)
+
+        await self.session._payload_post("/messaging/save_admins/?dpr=1", data)
+
+    async def add_admins(self, user_ids: Iterable[str]):
+        """Set specified users as group admins."""
+        await self._admin_status(user_ids, True)
+
+    async def remove_admins(self, user_ids: Iterable[str]):
+        """Remove admin status from specified users."""
+        await self._admin_status(user_ids, False)
+
+    async def set_title(self, title: str):
+        """Change title of the group.
+
+        Example:
+            >>> await group.set_title("Abc")
+        """
+        data = {"thread_name": title, "thread_id": self.id}
+        await self.session._payload_post("/messaging/set_thread_name/?dpr=1", data)
+
+    async def set_image(self, image_id: str):
+        """Change the group image from an image id."""
+        data = {"thread_image_id": image_id, "thread_id": self.id}
+        await self.session._payload_post("/messaging/set_thread_image/?dpr=1", data)
+
+    async def set_approval_mode(self, require_admin_approval: bool):
+        """Change the group's approval mode."""
+        data = {"set_mode": int(require_admin_approval), "thread_fbid": self.id}
+        await self.session._payload_post("/messaging/set_approval_mode/?dpr=1", data)
+
+    async def _users_approval(self, user_ids: Iterable[str], approve: bool):
+        data = {
+            "client_mutation_id": "0",
+            "actor_id": self.session.user.id,
+            "thread_fbid": self.id,
+            "user_ids": list(user_ids),
+            "response": "ACCEPT" if approve else "DENY",
+            "surface": "ADMIN_MODEL_APPROVAL_CENTER",
+        }
+        await self.session._graphql_requests(
+            _graphql.from_doc_id("1574519202665847", {"data": data}), retry=False
+        )
+
+    async def accept_users(self, user_ids: Iterable[str]):
+        """Accept users to the group from the group's approval."""
+        await self._users_approval(user_ids, True)
+
+    async def deny_users(self, user_ids: Iterable[str]):
+        """Deny users from joining the group."""
+        await self._users_approval(user_ids, False)
+
+
+@attrs_default
+class Page(ThreadABC):
+    """Represents a Facebook page.
+
+    The asyncio version of `fbchat.Page`.
+
+    Example:
+        >>> page = fbchat.aio.Page(session=session, id="1234")
+    """
+
+    #: The session to use when making requests.
+    session = attr.ib(type=_session.Session)
+    #: The unique identifier of the page.
+    id = attr.ib(converter=str, type=str)
+
+    def _to_send_data(self):
+        return {"other_user_fbid": self.id}
+
+    def _copy(self) -> "Page":
+        return _threads.intern_thread(Page, self.session, self.id)
+
+
+def _unavailable(name):
+    def method(self, *args, **kwargs):
+        raise NotImplementedError("{} is not available in fbchat.aio".format(name))
+
+    method.__name__ = name
+    return method
+
+
+def _async_methods(thread_cls):
+    """Give the decorated thread data class the methods of ``thread_cls``.
+
+    The data classes, e.g. `fbchat.UserData`, can't inherit both the synchronous and
+    the asyncio thread classes, since both define slots. Instead, the asyncio methods
+    replace the synchronous ones, and synchronous methods without an asyncio version
+    are disabled, so they're never called with an asyncio session.
+    """
+
+    def decorator(cls):
+        methods = {}
+        for base in reversed(thread_cls.__mro__):
+            methods.update(
+                (name, value)
+                for name, value in vars(base).items()
+                if inspect.isfunction(value)
+                and not name.startswith("__")
+                and not getattr(value, "__isabstractmethod__", False)
+            )
+        for name, value in inspect.getmembers(cls, inspect.isfunction):
+            if not name.startswith("_") and name not in methods:
+                setattr(cls, name, _unavailable(name))
+        for name, value in methods.items():
+            setattr(cls, name, value)
+        ThreadABC.register(cls)
+        return cls
+
+    return decorator
+
+
+@_async_methods(User)
+@attrs_default
+class UserData(_threads.UserData):
+    """Represents data about a Facebook user.
+
+    The asyncio version of `fbchat.UserData`, with the methods of `User`.
+    """
+
+
+@_async_methods(Group)
+@attrs_default
+class GroupData(_threads.GroupData):
+    """Represents data about a Facebook group.
+
+    The asyncio version of `fbchat.GroupData`, with the methods of `Group`.
+    """
+
+
+@_async_methods(Page)
+@attrs_default
+class PageData(_threads.PageData):
+    """Represents data about a Facebook page.
+
+    The asyncio version of `fbchat.PageData`, with the methods of `Page`.
+    """
+
+
+#: The asyncio thread classes, replacing the synchronous ones in parsed models and
+#: events, see `fbchat._threads.intern_thread`
+THREAD_CLASSES = {
+    _threads.Thread: Thread,
+    _threads.User: User,
+    _threads.Group: Group,
+    _threads.Page: Page,
+    _threads.UserData: UserData,
+    _threads.GroupData: GroupData,
+    _threads.PageData: PageData,
+}  # type: Mapping[type, type]
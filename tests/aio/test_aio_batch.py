@@ -0,0 +1,83 @@
+import asyncio
+import attr
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from fbchat import GraphQLError, RetryPolicy
+from fbchat.aio import Session
+from fbchat._graphql import QueryResult
+
+ERROR = GraphQLError(message="Oops", description="Something went wrong")
+FLAKY = GraphQLError(message="Oops", description="Try again", code=1)
+
+
+@attr.s(slots=True, repr=False, eq=False)
+class BatchSession(Session):
+    sent = attr.ib(factory=list)
+
+    async def _graphql_stream(self, *queries):
+        self.sent.append(queries)
+        await asyncio.sleep(0)
+        for i, query in enumerate(queries):
+            if query == "fail":
+                yield QueryResult(index=i, error=ERROR)
+            elif query == "flaky" and len(self.sent) == 1:
+                yield QueryResult(index=i, error=FLAKY)
+            else:
+                yield QueryResult(index=i, data=query.upper())
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def make_session():
+    return BatchSession(user_id="1234", fb_dtsg=None, revision=None, session=None)
+
+
+def test_batching():
+    async def main():
+        session = make_session()
+        session.enable_batching(max_size=50, max_wait=0.05)
+        results = await asyncio.gather(
+            session._graphql_requests("a"),
+            session._graphql_requests("b", "c"),
+            session._graphql_requests("fail"),
+            return_exceptions=True,
+        )
+        return session, results
+
+    session, results = run(main())
+    assert [["A"], ["B", "C"], ERROR] == results
+    assert [("a", "b", "c", "fail")] == session.sent
+
+
+def test_batching_max_size():
+    async def main():
+        session = make_session()
+        session.enable_batching(max_size=2, max_wait=10)
+        results = await session._graphql_requests("a", "b", "c", "d")
+        return session, results
+
+    session, results = run(main())
+    assert ["A", "B", "C", "D"] == results
+    assert [("a", "b"), ("c", "d")] == session.sent
+
+
+def test_batching_retries_query():
+    async def main():
+        session = make_session()
+        session.set_retry_policy(RetryPolicy(base_delay=0))
+        session.enable_batching(max_size=50, max_wait=0.01)
+        return session, await session._graphql_requests("a", "flaky")
+
+    session, results = run(main())
+    assert ["A", "FLAKY"] == results
+    # Only the failed query was sent again
+    assert [("a", "flaky"), ("flaky",)] == session.sent
+    assert 1 == session.stats.retries
@@ -0,0 +1,72 @@
+import asyncio
+import attr
+import pytest
+import fbchat
+
+pytest.importorskip("aiohttp")
+
+from fbchat.aio import Session, Client, Group, GroupData
+from fbchat._graphql import QueryResult
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+@attr.s(slots=True, repr=False, eq=False)
+class GroupSession(Session):
+    requested = attr.ib(factory=list)
+
+    async def _graphql_stream(self, *queries):
+        ids = [q["query_params"]["id"] for q in queries]
+        self.requested.append(ids)
+        for i, thread_id in enumerate(ids):
+            await asyncio.sleep(0)
+            data = {
+                "message_thread": {
+                    "thread_key": {"thread_fbid": thread_id},
+                    "thread_type": "GROUP",
+                    "all_participants": {"nodes": []},
+                    "thread_admins": [],
+                    "joinable_mode": {"mode": "0", "link": ""},
+                }
+            }
+            yield QueryResult(index=i, data=data)
+
+
+def test_fetch_thread_info_chunks():
+    session = GroupSession(user_id="1234", fb_dtsg=None, revision=None, session=None)
+    ids = [str(i) for i in range(10)] * 2
+
+    async def main():
+        client = Client(session=session)
+        return [
+            thread.id
+            async for thread in client.fetch_thread_info(ids, chunk_size=3, workers=2)
+        ]
+
+    assert sorted(set(ids)) == sorted(run(main()))
+    assert [3, 3, 3, 1] == sorted((len(x) for x in session.requested), reverse=True)
+
+
+def test_fetch_thread_info_asyncio_data():
+    session = GroupSession(user_id="1234", fb_dtsg=None, revision=None, session=None)
+
+    async def main():
+        return [
+            thread async for thread in Client(session=session).fetch_thread_info(["1"])
+        ]
+
+    (group,) = run(main())
+    assert isinstance(group, GroupData)
+    assert isinstance(group, fbchat.GroupData)
+    assert asyncio.iscoroutinefunction(group.set_title)
+    assert asyncio.iscoroutinefunction(group.send_text)
+    assert isinstance(group._copy(), Group)
+    # Methods without an asyncio version can't be used with the asyncio session
+    with pytest.raises(NotImplementedError):
+        group.create_poll("Question", {})
@@ -0,0 +1,184 @@
+import asyncio
+import datetime
+import socket
+import pytest
+
+pytest.importorskip("aiohttp")
+
+import paho.mqtt.client
+import fbchat
+from fbchat import Typing, Connect, Disconnect
+from fbchat.aio import Session, Listener, User, Group
+from fbchat.aio._listen import next_reconnect_delay
+from fbchat.aio._session import session_factory
+
+
+class Message:
+    def __init__(self, topic, payload):
+        self.topic = topic
+        self.payload = payload
+
+
+class StubListener(Listener):
+    """Listener that doesn't actually connect to the MQTT server."""
+
+    async def _reconnect(self):
+        self.reconnects += 1
+        return True
+
+
+async def make_listener(**kwargs):
+    session = Session(
+        user_id="1234", fb_dtsg="abc", revision=12345, session=session_factory()
+    )
+    mqtt = paho.mqtt.client.Client(transport="websockets")
+    listener = StubListener(
+        session=session,
+        chat_on=False,
+        foreground=False,
+        mqtt=mqtt,
+        sequence_id=1,
+        **kwargs,
+    )
+    listener.reconnects = 0
+    return listener
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def test_listen_yields_events():
+    async def inner():
+        listener = await make_listener()
+        listen = listener.listen()
+        events = [await listen.__anext__()]
+
+        payload = b'{"sender_fbid": 2345, "thread": 3456, "state": 1}'
+        message = Message("/thread_typing", payload)
+        # Multiple messages handled at once must not overwrite each other
+        listener._on_message_handler(None, None, message)
+        listener._on_message_handler(None, None, message)
+        events.append(await listen.__anext__())
+        events.append(await listen.__anext__())
+
+        listener._mqtt._state = paho.mqtt.client.mqtt_cs_disconnecting
+        listener.disconnect()
+        async for event in listen:
+            events.append(event)
+
+        await listener.session.close()
+        return listener.session, events
+
+    session, events = run(inner())
+    typing = Typing(
+        author=User(session=session, id="2345"),
+        thread=Group(session=session, id="3456"),
+        status=True,
+    )
+    assert [Connect(), typing, typing] == events
+    # The asyncio threads, whose methods are coroutines
+    assert asyncio.iscoroutinefunction(events[1].thread.start_typing)
+
+
+def test_backfill_threads():
+    session = Session(user_id="1234", fb_dtsg=None, revision=None, session=None)
+    group = fbchat.GroupData(session=session, id="2345")
+    thread = fbchat._backfill.to_thread(session, group)
+    assert Group(session=session, id="2345") == thread
+    message = fbchat.MessageData(
+        thread=thread,
+        id="mid.$XYZ",
+        author="3456",
+        created_at=datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc),
+    )
+    (event,) = fbchat._backfill.to_events(session, thread, [message])
+    assert User(session=session, id="3456") == event.author
+
+
+def test_next_reconnect_delay():
+    delays = [next_reconnect_delay(None)]
+    for _ in range(8):
+        delays.append(next_reconnect_delay(delays[-1]))
+    assert [1, 2, 4, 8, 16, 32, 64, 120, 120] == delays
+
+
+def test_reconnect_backoff(monkeypatch):
+    sleeps = []
+
+    async def sleep(delay):
+        sleeps.append(delay)
+
+    def reconnect():
+        raise OSError("Connection refused")
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+
+    async def inner():
+        listener = await make_listener()
+        listener._loop = asyncio.get_event_loop()
+        listener._mqtt.reconnect = reconnect
+        results = [await Listener._reconnect(listener) for _ in range(3)]
+        await listener.session.close()
+        return results
+
+    assert [False, False, False] == run(inner())
+    assert [1, 2, 4] == sleeps
+
+
+def test_listen_reconnects_on_connection_lost():
+    async def inner():
+        listener = await make_listener()
+        listen = listener.listen()
+        events = [await listen.__anext__()]
+        listener._queue.put_nowait(paho.mqtt.client.MQTT_ERR_CONN_LOST)
+        events.append(await listen.__anext__())
+        events.append(await listen.__anext__())
+        await listen.aclose()
+        await listener.session.close()
+        return listener.reconnects, events
+
+    reconnects, events = run(inner())
+    assert reconnects == 2
+    assert [
+        Connect(),
+        Disconnect(reason="Connection lost, retrying"),
+        Connect(),
+    ] == events
+
+
+def test_listen_pauses_reading():
+    async def inner():
+        listener = await make_listener(max_queue_size=2)
+        reader, writer = socket.socketpair()
+        listen = listener.listen()
+        await listen.__anext__()
+
+        # Attach a socket, so that there's something to pause
+        listener._mqtt._sock = reader
+        listener._attach_socket()
+
+        payload = b'{"sender_fbid": 2345, "thread": 3456, "state": 1}'
+        message = Message("/thread_typing", payload)
+        listener._on_message_handler(None, None, message)
+        assert not listener._reading_paused
+        listener._on_message_handler(None, None, message)
+        assert listener._reading_paused
+        await listen.__anext__()
+        assert not listener._reading_paused
+
+        await listen.aclose()
+        listener._mqtt._sock = None
+        reader.close()
+        writer.close()
+        await listener.session.close()
+        return listener.stats
+
+    stats = run(inner())
+    assert stats.paused == 1
+    assert stats.parsed == 1
+    assert stats.queue_depth == 1
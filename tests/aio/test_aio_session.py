@@ -0,0 +1,155 @@
+import asyncio
+import attr
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from fbchat import Timeout, Deadline, RequestTimeout, HTTPError, RetryPolicy, PoolConfig
+from fbchat import PoolStats, ConnectionFailed
+from fbchat.aio._session import (
+    Session,
+    session_factory,
+    get_user_id,
+    get_cookies,
+    get_cookie_header,
+    form_data,
+    client_timeout,
+    handle_client_error,
+)
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def test_session_factory_cookies():
+    async def inner():
+        session = session_factory()
+        try:
+            session.cookie_jar.update_cookies({"c_user": "1234", "xs": "abc"})
+            return (
+                get_user_id(session),
+                get_cookies(session),
+                get_cookie_header(session, "https://edge-chat.messenger.com/chat"),
+            )
+        finally:
+            await session.close()
+
+    user_id, cookies, header = run(inner())
+    assert user_id == "1234"
+    assert cookies == {"locale": "en_US", "c_user": "1234", "xs": "abc"}
+    assert sorted(header.split("; ")) == ["c_user=1234", "locale=en_US", "xs=abc"]
+
+
+def test_session_factory_pool():
+    async def inner(pool):
+        session = session_factory(pool)
+        try:
+            return session.connector.limit_per_host, session.connector.force_close
+        finally:
+            await session.close()
+
+    assert (10, False) == run(inner(None))
+    # The size is a limit, even if the pool doesn't block
+    assert (3, False) == run(inner(PoolConfig(size=3)))
+    pool = PoolConfig(size=3, block=True, keep_alive=False)
+    assert (3, True) == run(inner(pool))
+
+
+def test_pool_stats():
+    from aiohttp import web
+
+    async def handler(request):
+        return web.json_response({})
+
+    async def inner():
+        app = web.Application()
+        app.router.add_get("/", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        (port,) = [s.getsockname()[1] for s in site._server.sockets]
+        url = "http://127.0.0.1:{}/".format(port)
+
+        session = Session(
+            user_id="1234", fb_dtsg=None, revision=None, session=session_factory()
+        )
+        try:
+            await session.set_pool_config(PoolConfig(size=2))
+            cookies = session.get_cookies()
+            for _ in range(5):
+                async with session._session.get(url) as r:
+                    await r.read()
+            stats = session.get_pool_stats()
+
+            await session.set_pool_config(PoolConfig(size=4))
+            assert session.get_cookies() == cookies
+            assert session.get_pool_stats() == []
+            return stats
+        finally:
+            await session.close()
+            await runner.cleanup()
+
+    assert run(inner()) == [
+        PoolStats(host="127.0.0.1", size=2, connections=1, requests=5, idle=1)
+    ]
+
+
+def test_form_data():
+    form = form_data({"a": 1, "b": None, "c": True, "d": "e"})
+    assert [(options["name"], value) for options, _, value in form._fields] == [
+        ("a", "1"),
+        ("c", "True"),
+        ("d", "e"),
+    ]
+
+
+def test_client_timeout():
+    timeout = client_timeout(Timeout(connect=1, read=2))
+    assert (timeout.total, timeout.sock_connect, timeout.sock_read) == (None, 1, 2)
+    timeout = client_timeout(Timeout(connect=1, read=2), Deadline.after(30))
+    assert 29 < timeout.total <= 30
+
+
+def test_handle_client_error():
+    import aiohttp
+
+    with pytest.raises(RequestTimeout):
+        handle_client_error(asyncio.TimeoutError())
+    with pytest.raises(RequestTimeout):
+        handle_client_error(aiohttp.ServerTimeoutError())
+    with pytest.raises(ConnectionFailed, match="Connection error"):
+        handle_client_error(aiohttp.ClientConnectionError())
+
+
+@attr.s(slots=True, repr=False, eq=False)
+class FlakySession(Session):
+    """Fails to send the first requests, before succeeding."""
+
+    failures = attr.ib(factory=list)
+
+    async def _send(self, url, data, files=None, deadline=None):
+        if self.failures:
+            raise self.failures.pop(0)
+        return '{"q0": {"data": {"a": 1}}}'
+
+
+def test_graphql_retries():
+    session = FlakySession(user_id="1234", fb_dtsg=None, revision=None, session=None)
+    session.set_retry_policy(RetryPolicy(base_delay=0))
+    session.failures = [
+        ConnectionFailed("Connection error"),
+        RequestTimeout("Timed out"),
+    ]
+    assert [{"a": 1}] == run(session._graphql_requests("abc"))
+    assert session.stats.retries == 2
+
+    session.failures = [HTTPError("Failed sending request", status_code=404)]
+    with pytest.raises(HTTPError):
+        run(session._graphql_requests("abc"))
+    assert session.stats.retries == 2
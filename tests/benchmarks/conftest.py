@@ -0,0 +1,12 @@
+import timeit
+import pytest
+
+
+@pytest.fixture
+def measure():
+    """Return the best time of a few runs of ``func``, in seconds per call."""
+
+    def measure(func, number=100, repeat=5):
+        return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+    return measure
@@ -0,0 +1,54 @@
+import pytest
+from fbchat import _util
+from fbchat._events import parse_client_payloads
+
+pytestmark = pytest.mark.benchmark
+
+
+def reaction(i):
+    return {
+        "deltaMessageReaction": {
+            "threadKey": {"threadFbId": 1234},
+            "messageId": "mid.$XYZ{}".format(i),
+            "action": 0,
+            "userId": 4321,
+            "reaction": "😍",
+            "senderId": 4321,
+            "offlineThreadingId": "6623596674408921967",
+        }
+    }
+
+
+@pytest.fixture
+def burst():
+    """A large burst of reactions, encoded as a client payload."""
+    payload = {"deltas": [reaction(i) for i in range(500)]}
+    return {
+        "payload": list(_util.json_minimal(payload).encode("utf-8")),
+        "class": "ClientPayload",
+    }
+
+
+def test_decode_client_payload(burst, measure):
+    def old():
+        _util.parse_json("".join(chr(z) for z in burst["payload"]))
+
+    def new():
+        _util.parse_json(bytes(burst["payload"]))
+
+    old_time = measure(old, number=20)
+    new_time = measure(new, number=20)
+    print(
+        "Decoding {} bytes: {:.3f}ms -> {:.3f}ms ({:.1f}x)".format(
+            len(burst["payload"]),
+            old_time * 1000,
+            new_time * 1000,
+            old_time / new_time,
+        )
+    )
+    assert new_time < old_time
+
+
+def test_parse_client_payloads(session, burst, measure):
+    time = measure(lambda: list(parse_client_payloads(session, burst)), number=10)
+    print("Parsing 500 reactions: {:.3f}ms".format(time * 1000))
@@ -0,0 +1,86 @@
+import gc
+import pytest
+import tracemalloc
+import fbchat
+from fbchat._events import parse_events
+
+pytestmark = pytest.mark.benchmark
+
+
+def new_message(i):
+    return {
+        "class": "NewMessage",
+        "attachments": [],
+        "body": "Message {}".format(i),
+        "irisSeqId": str(1000 + i),
+        "messageMetadata": {
+            # A few busy groups, with a handful of active members
+            "actorFbId": str(100 + i % 25),
+            "messageId": "mid.$gAAT4Sw1WSGh{}".format(i),
+            "offlineThreadingId": "6623596674408921967",
+            "tags": ["source:messenger:web"],
+            "threadKey": {"threadFbId": str(10 + i % 5)},
+            "timestamp": str(1577836800000 + i),
+        },
+    }
+
+
+@pytest.fixture
+def stream():
+    """A stream of ``/t_ms`` payloads, each with a burst of messages."""
+    return [
+        {"deltas": [new_message(i * 100 + j) for j in range(100)]} for i in range(100)
+    ]
+
+
+def parse_stream(session, stream):
+    """Parse and keep the events, like a consumer buffering them."""
+    return [e for data in stream for e in parse_events(session, "/t_ms", data)]
+
+
+def measure_memory(session, stream):
+    gc.collect()
+    collections = sum(stat["collections"] for stat in gc.get_stats())
+    tracemalloc.start()
+    try:
+        events = parse_stream(session, stream)
+        memory, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    collections = sum(stat["collections"] for stat in gc.get_stats()) - collections
+    threads = {id(e.thread) for e in events} | {id(e.message.author) for e in events}
+    return len(events), memory, collections, len(threads)
+
+
+def make_session(intern):
+    session = fbchat.Session(user_id="1", fb_dtsg=None, revision=None, session=None)
+    if intern:
+        session.enable_thread_interning()
+    return session
+
+
+def test_intern_memory(stream):
+    results = {}
+    for intern in (False, True):
+        count, memory, collections, threads = measure_memory(
+            make_session(intern), stream
+        )
+        results[intern] = memory
+        print(
+            "Interning {}: {} events, {:.1f} KiB retained, {} GC runs, "
+            "{} distinct thread objects".format(
+                "on" if intern else "off", count, memory / 1024, collections, threads,
+            )
+        )
+    assert results[True] < results[False]
+
+
+def test_intern_speed(stream, measure):
+    for intern in (False, True):
+        session = make_session(intern)
+        time = measure(lambda: parse_stream(session, stream), number=3, repeat=3)
+        print(
+            "Interning {}: Parsing 10000 events: {:.1f}ms".format(
+                "on" if intern else "off", time * 1000
+            )
+        )
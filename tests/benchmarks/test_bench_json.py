@@ -0,0 +1,134 @@
+import pytest
+from fbchat import _json
+
+pytestmark = pytest.mark.benchmark
+
+
+def message_node(i):
+    return {
+        "__typename": "UserMessage",
+        "message_id": "mid.$gAAT4Sw1WSGh{}".format(i),
+        "offline_threading_id": "6623596674408921967",
+        "message_sender": {"id": "1234", "email": "1234@facebook.com"},
+        "ttl": 0,
+        "timestamp_precise": "1577836800000",
+        "unread": False,
+        "is_sponsored": False,
+        "ad_id": None,
+        "ad_client_token": None,
+        "commerce_message_type": None,
+        "customizations": [],
+        "tags_list": ["source:messenger:web", "inbox", "sent"],
+        "platform_xmd_encoded": None,
+        "message_source_data": None,
+        "montage_reply_data": None,
+        "message_reactions": [{"reaction": "😍", "user": {"id": "4321"}}],
+        "unsent_timestamp_precise": "0",
+        "message_unsendability_status": "deny_log_message",
+        "message": {"text": "Hej, hvordan går det? 👋 {}".format(i), "ranges": []},
+        "extensible_attachment": None,
+        "sticker": None,
+        "blob_attachments": [],
+    }
+
+
+@pytest.fixture
+def graphqlbatch():
+    """A ``graphqlbatch`` response with a thread's info and messages."""
+    thread = {
+        "message_thread": {
+            "thread_key": {"thread_fbid": "1234"},
+            "name": "Gruppe",
+            "messages_count": 500,
+            "messages": {"nodes": [message_node(i) for i in range(100)]},
+        }
+    }
+    return (
+        _json.STDLIB.dumps({"q0": {"data": thread}})
+        + "\r\n"
+        + "{\n"
+        + '   "successful_results": 1,\n'
+        + '   "error_results": 0,\n'
+        + '   "skipped_results": 0\n'
+        + "}"
+    )
+
+
+@pytest.fixture
+def t_ms():
+    """A ``/t_ms`` MQTT payload with a burst of new messages."""
+    deltas = [
+        {
+            "class": "NewMessage",
+            "attachments": [],
+            "body": "Hej, hvordan går det? 👋 {}".format(i),
+            "irisSeqId": str(1000 + i),
+            "messageMetadata": {
+                "actorFbId": "1234",
+                "folderId": {"systemFolderId": "INBOX"},
+                "messageId": "mid.$gAAT4Sw1WSGh{}".format(i),
+                "offlineThreadingId": "6623596674408921967",
+                "skipBumpThread": False,
+                "tags": ["source:messenger:web"],
+                "threadKey": {"threadFbId": "4321"},
+                "threadReadStateEffect": "KEEP_AS_IS",
+                "timestamp": "1577836800000",
+            },
+            "requestContext": {"apiArgs": {}},
+        }
+        for i in range(200)
+    ]
+    payload = {"deltas": deltas, "firstDeltaSeqId": 1000, "lastIssuedSeqId": 1199}
+    return _json.STDLIB.dumps(payload).encode("utf-8")
+
+
+def test_graphqlbatch(json_backend, graphqlbatch, measure):
+    time = measure(lambda: _json.loads_concat(graphqlbatch), number=20)
+    print(
+        "{}: Decoding {} characters of graphqlbatch: {:.3f}ms".format(
+            json_backend.name, len(graphqlbatch), time * 1000
+        )
+    )
+
+
+def test_t_ms(json_backend, t_ms, measure):
+    time = measure(lambda: _json.loads(t_ms), number=20)
+    print(
+        "{}: Decoding {} bytes of /t_ms: {:.3f}ms".format(
+            json_backend.name, len(t_ms), time * 1000
+        )
+    )
+
+
+def test_encode_queries(json_backend, measure):
+    queries = {
+        "q{}".format(i): {"doc_id": "2147762685294928", "query_params": {"id": str(i)}}
+        for i in range(50)
+    }
+    time = measure(lambda: _json.dumps(queries), number=100)
+    print("{}: Encoding 50 queries: {:.3f}ms".format(json_backend.name, time * 1000))
+
+
+def test_stream_long_line(json_backend, measure):
+    # A page of messages with large attachments can be several MB on a single line
+    node = {"q0": {"data": {"nodes": [message_node(i) for i in range(8000)]}}}
+    text = _json.STDLIB.dumps(node)
+    size = 16 * 1024  # `fbchat._session.STREAM_CHUNK_SIZE`
+    chunks = [text[i : i + size] for i in range(0, len(text), size)]
+
+    def stream():
+        parser = _json.ConcatParser()
+        for chunk in chunks:
+            parser.feed(chunk)
+        return parser.close()
+
+    assert stream() == _json.loads_concat(text)
+    whole = measure(lambda: _json.loads_concat(text), number=1, repeat=3)
+    streamed = measure(stream, number=1, repeat=3)
+    print(
+        "{}: Parsing {} characters on one line: {:.3f}ms, streamed: {:.3f}ms".format(
+            json_backend.name, len(text), whole * 1000, streamed * 1000
+        )
+    )
+    # Each chunk must only be handled once, not copied with the rest of the line
+    assert streamed < whole * 3 + 0.01
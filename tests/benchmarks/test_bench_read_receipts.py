@@ -0,0 +1,72 @@
+import pytest
+import fbchat
+from fbchat import _util
+from fbchat._threads import ThreadABC
+
+pytestmark = pytest.mark.benchmark
+
+
+def message(i):
+    return {
+        "message_id": "mid.$gAAT4Sw1WSGh{}".format(i),
+        "message_sender": {"id": str(100 + i % 25)},
+        "message": {"text": "Message {}".format(i)},
+        "timestamp_precise": str(1577836800000 + i * 1000),
+        "message_reactions": [],
+        "unread": False,
+    }
+
+
+def page(members):
+    """A page of 100 messages, in a group where everyone has read some of them."""
+    return {
+        "message_thread": {
+            "read_receipts": {
+                "nodes": [
+                    {
+                        "actor": {"id": str(1000 + i)},
+                        "watermark": str(1577836800000 + (i % 100) * 1000),
+                    }
+                    for i in range(members)
+                ]
+            },
+            "messages": {"nodes": [message(i) for i in range(100)]},
+        }
+    }
+
+
+def old_read_by(messages, read_receipts):
+    """The previous implementation, comparing datetimes of every receipt."""
+    for data in messages:
+        created_at = _util.millis_to_datetime(int(data["timestamp_precise"]))
+        [
+            receipt["actor"]["id"]
+            for receipt in read_receipts
+            if _util.millis_to_datetime(int(receipt["watermark"])) >= created_at
+        ]
+
+
+@pytest.mark.parametrize("members", [50, 250, 1000])
+def test_parse_messages_read_by(session, measure, members):
+    thread = fbchat.Group(session=session, id="1234")
+    data = page(members)
+    thread_data = data["message_thread"]
+
+    old_time = measure(
+        lambda: old_read_by(
+            thread_data["messages"]["nodes"], thread_data["read_receipts"]["nodes"]
+        ),
+        number=3,
+    )
+    new_time = measure(lambda: ThreadABC._parse_messages(thread, data), number=3)
+    print(
+        "Page of 100 messages with {} members: read_by alone took {:.1f}ms before, "
+        "parsing the whole page now takes {:.1f}ms".format(
+            members, old_time * 1000, new_time * 1000
+        )
+    )
+    assert new_time < old_time
+
+    messages = ThreadABC._parse_messages(thread, data)
+    # The first message has been read by everyone
+    assert len(messages[0].read_by) == members
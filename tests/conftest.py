@@ -7,3 +7,15 @@ def session():
     return fbchat.Session(
         user_id="31415926536", fb_dtsg=None, revision=None, session=None
     )
+
+
+@pytest.fixture(params=list(fbchat._json.BACKENDS))
+def json_backend(request):
+    """Run the test with each of the installed JSON backends."""
+    old = fbchat._json.get_backend()
+    try:
+        yield fbchat._json.set_backend(request.param)
+    except ImportError:
+        pytest.skip("{} is not installed".format(request.param))
+    finally:
+        fbchat._json._backend = old
@@ -1,4 +1,5 @@
 import datetime
+import json
 import pytest
 from fbchat import (
     ParseError,
@@ -173,3 +174,28 @@ def test_parse_client_payloads_invalid(session):
     data = {"payload": payload, "class": "ClientPayload"}
     with pytest.raises(ParseError, match="Error parsing ClientPayload"):
         list(parse_client_payloads(session, data))
+
+
+def test_parse_client_payloads_non_ascii(session):
+    payload = {
+        "deltas": [
+            {
+                "deltaMessageReaction": {
+                    "threadKey": {"threadFbId": 1234},
+                    "messageId": "mid.$XYZ",
+                    "action": 0,
+                    "userId": 4321,
+                    "reaction": "😍",
+                    "senderId": 4321,
+                    "offlineThreadingId": "6623596674408921967",
+                }
+            }
+        ]
+    }
+    # Encoded like Facebook does it, as a list of UTF-8 bytes
+    data = {
+        "payload": list(json.dumps(payload, ensure_ascii=False).encode("utf-8")),
+        "class": "ClientPayload",
+    }
+    (event,) = parse_client_payloads(session, data)
+    assert "😍" == event.reaction
@@ -1,5 +1,6 @@
 import datetime
 import pytest
+import fbchat
 from fbchat import (
     ParseError,
     User,
@@ -357,3 +358,25 @@ def test_noop(session):
 def test_parse_delta_unknown(session):
     data = {"class": "Abc"}
     assert UnknownEvent(source="Delta class", data=data) == parse_delta(session, data)
+
+
+def test_parse_delta_interned():
+    session = fbchat.Session(user_id="1", fb_dtsg=None, revision=None, session=None)
+    session.enable_thread_interning()
+    data = {
+        "class": "ThreadName",
+        "messageMetadata": {
+            "actorFbId": "3456",
+            "messageId": "mid.$XYZ",
+            "offlineThreadingId": "1122334455",
+            "tags": [],
+            "threadKey": {"threadFbId": "4321"},
+            "timestamp": "1500000000000",
+        },
+        "name": "New title",
+    }
+    first = parse_delta(session, data)
+    second = parse_delta(session, data)
+    assert first == second
+    assert first.author is second.author
+    assert first.thread is second.thread
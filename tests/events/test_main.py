@@ -1,4 +1,5 @@
 import datetime
+import fbchat
 from fbchat import (
     _util,
     User,
@@ -36,7 +37,7 @@ def test_t_ms_full(session):
     data = {
         "deltas": [
             {
-                "payload": [ord(x) for x in _util.json_minimal(payload)],
+                "payload": list(_util.json_minimal(payload).encode("utf-8")),
                 "class": "ClientPayload",
             },
             {"class": "NoOp",},
@@ -135,3 +136,157 @@ def test_orca_presence_full(session):
         },
         full=True,
     )
+
+
+def test_register_delta_class(session, monkeypatch):
+    from fbchat._events import _delta_class
+
+    monkeypatch.setattr(
+        _delta_class, "DELTA_CLASS_PARSERS", dict(_delta_class.DELTA_CLASS_PARSERS)
+    )
+
+    @fbchat.register_delta_class("NewDeltaClass")
+    def parse(session, data):
+        return UnknownEvent(source="New", data=data["value"])
+
+    data = {"deltas": [{"class": "NewDeltaClass", "value": 1}]}
+    assert [UnknownEvent(source="New", data=1)] == list(
+        parse_events(session, "/t_ms", data)
+    )
+
+
+def test_register_delta_type(session, monkeypatch):
+    from fbchat._events import _delta_type
+
+    monkeypatch.setattr(
+        _delta_type, "DELTA_TYPE_PARSERS", dict(_delta_type.DELTA_TYPE_PARSERS)
+    )
+    fbchat.register_delta_type(
+        "instant_game_update", lambda session, data: UnknownEvent(source="Game", data=1)
+    )
+
+    data = {"deltas": [{"class": "AdminTextMessage", "type": "instant_game_update"}]}
+    assert [UnknownEvent(source="Game", data=1)] == list(
+        parse_events(session, "/t_ms", data)
+    )
+
+
+def test_register_client_payload(session, monkeypatch):
+    from fbchat._events import _client_payload
+
+    monkeypatch.setattr(
+        _client_payload,
+        "CLIENT_PAYLOAD_PARSERS",
+        dict(_client_payload.CLIENT_PAYLOAD_PARSERS),
+    )
+    fbchat.register_client_payload("deltaNewThing", lambda session, data: None)
+
+    payload = {"deltas": [{"deltaNewThing": {}}, {"deltaUnknown": {}}]}
+    data = {
+        "deltas": [
+            {
+                "payload": list(_util.json_minimal(payload).encode("utf-8")),
+                "class": "ClientPayload",
+            }
+        ]
+    }
+    assert [None, UnknownEvent(source="client payload", data={"deltaUnknown": {}})] == (
+        list(parse_events(session, "/t_ms", data))
+    )
+
+
+def new_message_delta(thread_key):
+    return {
+        "attachments": [],
+        "body": "test",
+        "messageMetadata": {
+            "actorFbId": "1234",
+            "messageId": "mid.$XYZ",
+            "threadKey": thread_key,
+            "timestamp": "1600000000000",
+        },
+        "class": "NewMessage",
+    }
+
+
+def test_filter_topic_not_parsed(session):
+    # Invalid data, so this would fail if it was parsed
+    data = {"invalid": "data"}
+    event_filter = fbchat.EventFilter(events=[fbchat.MessageEvent])
+    assert [] == list(parse_events(session, "/orca_presence", data, event_filter))
+    assert [] == list(parse_events(session, "/unknown", data, event_filter))
+    event_filter = fbchat.EventFilter(topics=["/t_ms"])
+    assert [] == list(parse_events(session, "/thread_typing", data, event_filter))
+
+
+def test_filter_delta_class_not_parsed(session):
+    data = {
+        "deltas": [
+            {"class": "DeliveryReceipt", "invalid": "data"},
+            {"class": "ReadReceipt", "invalid": "data"},
+            new_message_delta({"otherUserFbId": "1234"}),
+        ]
+    }
+    event_filter = fbchat.EventFilter(events=[fbchat.MessageEvent])
+    (event,) = parse_events(session, "/t_ms", data, event_filter)
+    assert isinstance(event, fbchat.MessageEvent)
+
+
+def test_filter_thread_ids(session):
+    data = {
+        "deltas": [
+            new_message_delta({"otherUserFbId": "1234"}),
+            new_message_delta({"threadFbId": "2345"}),
+            # Not parsed, since the thread doesn't match
+            {"class": "ReadReceipt", "threadKey": {"threadFbId": "3456"}},
+        ]
+    }
+    event_filter = fbchat.EventFilter(thread_ids=["2345"])
+    (event,) = parse_events(session, "/t_ms", data, event_filter)
+    assert Group(session=session, id="2345") == event.thread
+
+
+def test_filter_client_payload(session):
+    payload = {
+        "deltas": [{"deltaMessageReaction": {"invalid": "data"}}, {"deltaUnknown": {}},]
+    }
+    data = {
+        "deltas": [
+            {
+                "payload": list(_util.json_minimal(payload).encode("utf-8")),
+                "class": "ClientPayload",
+            }
+        ]
+    }
+    event_filter = fbchat.EventFilter(events=[UnknownEvent])
+    assert [UnknownEvent(source="client payload", data={"deltaUnknown": {}})] == list(
+        parse_events(session, "/t_ms", data, event_filter)
+    )
+
+
+def test_filter_registered_parser_events(session, monkeypatch):
+    from fbchat._events import _delta_class
+
+    monkeypatch.setattr(
+        _delta_class, "DELTA_CLASS_PARSERS", dict(_delta_class.DELTA_CLASS_PARSERS)
+    )
+    monkeypatch.setattr(
+        _delta_class, "DELTA_CLASS_EVENTS", dict(_delta_class.DELTA_CLASS_EVENTS)
+    )
+    calls = []
+
+    def parse(session, data):
+        calls.append(data)
+        return UnknownEvent(source="New", data=data)
+
+    data = {"deltas": [{"class": "NewDeltaClass"}]}
+    event_filter = fbchat.EventFilter(events=[fbchat.MessageEvent])
+
+    # Parsers without declared events are always called
+    fbchat.register_delta_class("NewDeltaClass", parse)
+    assert [] == list(parse_events(session, "/t_ms", data, event_filter))
+    assert 1 == len(calls)
+
+    fbchat.register_delta_class("NewDeltaClass", parse, events=[UnknownEvent])
+    assert [] == list(parse_events(session, "/t_ms", data, event_filter))
+    assert 1 == len(calls)
@@ -1,7 +1,8 @@
+import datetime
 import pytest
 import fbchat
 from fbchat import EmojiSize, Mention, Message, MessageData
-from fbchat._models._message import graphql_to_extensible_attachment
+from fbchat._models._message import ReadReceipts, graphql_to_extensible_attachment
 
 
 @pytest.mark.parametrize(
@@ -108,6 +109,64 @@ def test_message_from_graphql():
     pass
 
 
+def test_read_receipts_from_graphql():
+    data = [
+        {"actor": {"id": "1234"}, "watermark": "1500000000000"},
+        {"actor": {"id": "2345"}, "watermark": "1400000000000"},
+        {"actor": {"id": "3456"}, "watermark": "1500000000000"},
+    ]
+    receipts = ReadReceipts._from_graphql(data)
+    assert receipts.watermarks == [1400000000000, 1500000000000, 1500000000000]
+    assert receipts.read_by(1300000000000) == ["2345", "1234", "3456"]
+    assert receipts.read_by(1400000000000) == ["2345", "1234", "3456"]
+    assert receipts.read_by(1400000000001) == ["1234", "3456"]
+    assert receipts.read_by(1500000000001) == []
+
+
+def test_message_from_graphql_read_by(session):
+    thread = fbchat.Group(session=session, id="1234")
+    data = {
+        "message_id": "mid.$XYZ",
+        "message_sender": {"id": "1234"},
+        "message": {"text": "abc"},
+        "timestamp_precise": "1500000000000",
+        "message_reactions": [],
+    }
+    read_receipts = [
+        {"actor": {"id": "2345"}, "watermark": "1400000000000"},
+        {"actor": {"id": "3456"}, "watermark": "1500000000000"},
+    ]
+    expected = ["3456"]
+    message = MessageData._from_graphql(thread, dict(data), read_receipts)
+    assert message.read_by == expected
+    receipts = ReadReceipts._from_graphql(read_receipts)
+    message = MessageData._from_graphql(thread, dict(data), receipts)
+    assert message.read_by == expected
+    assert MessageData._from_graphql(thread, dict(data)).read_by == []
+
+
+def test_message_from_graphql_lazy_timestamps(session):
+    data = {
+        "message_id": "mid.$XYZ",
+        "message_sender": {"id": "1234"},
+        "message": {"text": "abc"},
+        "timestamp_precise": "1500000000000",
+        "message_reactions": [],
+    }
+    lazy_session = fbchat.Session(
+        user_id="31415926536", fb_dtsg=None, revision=None, session=None
+    )
+    lazy_session.enable_lazy_timestamps()
+    lazy = MessageData._from_graphql(
+        fbchat.Group(session=lazy_session, id="1234"), data
+    )
+    assert isinstance(lazy.created_at, fbchat.LazyDatetime)
+    # Other sessions are unaffected
+    message = MessageData._from_graphql(fbchat.Group(session=session, id="1234"), data)
+    assert isinstance(message.created_at, datetime.datetime)
+    assert lazy.created_at == message.created_at
+
+
 @pytest.mark.skip(reason="need to gather test data")
 def test_message_from_reply():
     pass
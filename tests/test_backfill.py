@@ -0,0 +1,83 @@
+import datetime
+import threading
+import pytest
+import fbchat
+from fbchat import (
+    GroupData,
+    PageData,
+    Group,
+    User,
+    MessageData,
+    MessageEvent,
+    Image,
+    ThreadLocation,
+)
+from fbchat._backfill import backfill, to_thread
+
+
+def dt(minute):
+    return datetime.datetime(2020, 1, 1, 12, minute, tzinfo=datetime.timezone.utc)
+
+
+def test_to_thread(session):
+    group = GroupData(session=session, id="1234")
+    page = PageData(session=session, id="2345", photo=Image(url="..."), name="abc")
+    assert Group(session=session, id="1234") == to_thread(session, group)
+    assert User(session=session, id="2345") == to_thread(session, page)
+
+
+def test_backfill(session, monkeypatch):
+    threads = {
+        ThreadLocation.INBOX: [
+            GroupData(session=session, id="1", last_active=dt(30)),
+            GroupData(session=session, id="3", last_active=dt(5)),
+        ],
+        ThreadLocation.ARCHIVED: [
+            GroupData(session=session, id="2", last_active=dt(20)),
+        ],
+    }
+    messages = {
+        "1": [(30, "c"), (15, "b"), (5, "x")],
+        "2": [(20, "d"), (11, "a"), (1, "y")],
+    }
+    locations = []
+
+    def fetch_threads(self, limit, location):
+        locations.append(location)
+        yield from threads.get(location, [])
+
+    def fetch_messages(self, limit):
+        for minute, id_ in messages[self.id]:
+            yield MessageData(thread=self, id=id_, author="4321", created_at=dt(minute))
+
+    monkeypatch.setattr(fbchat.Client, "fetch_threads", fetch_threads)
+    monkeypatch.setattr(fbchat.Group, "fetch_messages", fetch_messages)
+
+    events = list(backfill(session, since=dt(10), concurrency=2))
+    assert ["a", "b", "d", "c"] == [event.message.id for event in events]
+    assert all(isinstance(event, MessageEvent) for event in events)
+    assert all(event.recovered for event in events)
+    assert Group(session=session, id="2") == events[0].thread
+    assert User(session=session, id="4321") == events[0].author
+    # Every location is searched, not just the inbox
+    assert list(ThreadLocation) == locations
+
+
+def test_backfill_poll(session, monkeypatch):
+    monkeypatch.setattr("fbchat._backfill.POLL_INTERVAL", 0.01)
+    fetched = threading.Event()
+    polls = []
+
+    def fetch_threads(self, limit, location):
+        # Wait until the calling thread has polled
+        assert fetched.wait(timeout=5)
+        return []
+
+    def poll():
+        polls.append(threading.current_thread())
+        fetched.set()
+
+    monkeypatch.setattr(fbchat.Client, "fetch_threads", fetch_threads)
+    assert [] == list(backfill(session, since=dt(10), concurrency=2, poll=poll))
+    assert polls
+    assert all(thread is threading.main_thread() for thread in polls)
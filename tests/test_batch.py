@@ -0,0 +1,102 @@
+import attr
+import pytest
+import threading
+import fbchat
+from fbchat import GraphQLError, HTTPError
+from fbchat._graphql import QueryResult
+
+ERROR = GraphQLError(message="Oops", description="Something went wrong")
+#: A temporary error, which is retried
+FLAKY = GraphQLError(message="Oops", description="Try again", code=1)
+
+
+def results(queries, flaky=False):
+    for i, query in reversed(list(enumerate(queries))):
+        if query == "fail":
+            yield QueryResult(index=i, error=ERROR)
+        elif query == "flaky" and flaky:
+            yield QueryResult(index=i, error=FLAKY)
+        elif query != "missing":
+            yield QueryResult(index=i, data=query.upper())
+
+
+@attr.s(slots=True, repr=False, eq=False)
+class BatchSession(fbchat.Session):
+    sent = attr.ib(factory=list)
+
+    def _graphql_stream(self, *queries):
+        self.sent.append(queries)
+        if "down" in queries:
+            raise HTTPError("Connection error")
+        # Queries only fail temporarily in the first request
+        return results(queries, flaky=len(self.sent) == 1)
+
+
+@pytest.fixture
+def session():
+    return BatchSession(user_id="1234", fb_dtsg=None, revision=None, session=None)
+
+
+def run_concurrently(session, calls):
+    rtn = [None] * len(calls)
+
+    def call(i, queries):
+        try:
+            rtn[i] = session._graphql_requests(*queries)
+        except Exception as e:
+            rtn[i] = e
+
+    threads = [threading.Thread(target=call, args=x) for x in enumerate(calls)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return rtn
+
+
+def test_batching(session):
+    session.enable_batching(max_size=50, max_wait=0.2)
+    calls = [["a"], ["b", "c"], ["d"], ["e"]]
+    assert [["A"], ["B", "C"], ["D"], ["E"]] == run_concurrently(session, calls)
+    assert 1 == len(session.sent)
+    assert ["a", "b", "c", "d", "e"] == sorted(session.sent[0])
+
+
+def test_batching_max_size(session):
+    session.enable_batching(max_size=2, max_wait=10)
+    # Full batches are sent right away, instead of waiting
+    assert ["A", "B", "C", "D"] == session._graphql_requests("a", "b", "c", "d")
+    assert [("a", "b"), ("c", "d")] == session.sent
+
+
+def test_batching_errors(session):
+    session.enable_batching(max_size=50, max_wait=0.2)
+    calls = [["a"], ["fail"], ["missing"]]
+    a, fail, missing = run_concurrently(session, calls)
+    assert ["A"] == a
+    assert ERROR is fail
+    assert isinstance(missing, fbchat.ParseError)
+    assert 1 == len(session.sent)
+
+
+def test_batching_request_error(session):
+    session.enable_batching(max_size=2, max_wait=10)
+    with pytest.raises(HTTPError):
+        session._graphql_requests("a", "down")
+
+
+def test_batching_retries_query(session):
+    session.set_retry_policy(fbchat.RetryPolicy(base_delay=0))
+    session.enable_batching(max_size=2, max_wait=0.01)
+    assert ["A", "FLAKY"] == session._graphql_requests("a", "flaky")
+    # Only the failed query was sent again
+    assert [("a", "flaky"), ("flaky",)] == [tuple(x) for x in session.sent]
+    assert 1 == session.stats.retries
+
+
+def test_batching_retries_exhausted(session):
+    session.set_retry_policy(fbchat.RetryPolicy(base_delay=0, max_retries=0))
+    session.enable_batching(max_size=2, max_wait=0.01)
+    with pytest.raises(GraphQLError, match="Try again"):
+        session._graphql_requests("a", "flaky")
+    assert 1 == len(session.sent)
@@ -0,0 +1,195 @@
+import attr
+import datetime
+import pytest
+from fbchat import (
+    ThreadCache,
+    CacheStats,
+    Group,
+    GroupData,
+    User,
+    UserData,
+    TitleSet,
+    ColorSet,
+    EmojiSet,
+    NicknameSet,
+    PeopleAdded,
+    PersonRemoved,
+    AdminsAdded,
+    ApprovalModeSet,
+    UnfetchedThreadEvent,
+    Typing,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("time.monotonic", lambda: now[0])
+    return now
+
+
+def group(session, id_, name=None):
+    return GroupData(session=session, id=id_, name=name)
+
+
+def test_cache_get(session):
+    cache = ThreadCache()
+    thread = group(session, "1")
+    assert cache.get("1") is None
+    cache.put(thread)
+    assert thread is cache.get("1")
+    assert CacheStats(hits=1, misses=1) == cache.stats
+    assert 1 == len(cache)
+
+
+def test_cache_ttl(session, clock):
+    cache = ThreadCache(ttl=datetime.timedelta(seconds=60))
+    cache.put(group(session, "1"))
+    clock[0] += 59
+    assert cache.get("1")
+    clock[0] += 1
+    assert cache.get("1") is None
+    assert 0 == len(cache)
+    assert CacheStats(hits=1, misses=1, expirations=1) == cache.stats
+
+
+def test_cache_lru(session):
+    cache = ThreadCache(max_size=2)
+    cache.put(group(session, "1"))
+    cache.put(group(session, "2"))
+    cache.get("1")  # Now "2" is the least recently used
+    cache.put(group(session, "3"))
+    assert cache.get("2") is None
+    assert cache.get("1") and cache.get("3")
+    assert 1 == cache.stats.evictions
+
+
+def test_cache_invalidate(session):
+    cache = ThreadCache()
+    cache.put(group(session, "1"))
+    cache.put(group(session, "2"))
+    cache.invalidate("1")
+    cache.invalidate("3")
+    assert cache.get("1") is None
+    assert cache.get("2")
+    cache.clear()
+    assert 0 == len(cache)
+
+
+def test_cache_lookup(session):
+    cache = ThreadCache()
+    one = group(session, "1")
+    cache.put(one)
+    assert ([one], ["2", "3"]) == cache.lookup(["1", "2", "3"])
+
+
+def test_cache_replace(session):
+    cache = ThreadCache()
+    cache.put(group(session, "1", name="A"))
+    cache.put(group(session, "1", name="B"))
+    assert "B" == cache.get("1").name
+    assert 1 == len(cache)
+
+
+def make_group(session):
+    return GroupData(
+        session=session,
+        id="1",
+        name="Old",
+        participants=[User(session=session, id="2"), User(session=session, id="3")],
+        nicknames={"3": "Three"},
+        admins={"2"},
+        approval_mode=False,
+        color="#0084ff",
+        emoji="😀",
+    )
+
+
+def make_user(session):
+    return UserData(
+        session=session,
+        id="2",
+        name="Two",
+        first_name="Two",
+        photo=None,
+        is_friend=True,
+        nickname=None,
+        own_nickname=None,
+        color="#0084ff",
+        emoji=None,
+    )
+
+
+def test_cache_handle_event_group(session):
+    cache = ThreadCache()
+    cache.put(make_group(session))
+    group = Group(session=session, id="1")
+    at = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+    author = User(session=session, id="2")
+    events = [
+        TitleSet(author=author, thread=group, title="New", at=at),
+        ColorSet(author=author, thread=group, color="#ff0000", at=at),
+        EmojiSet(author=author, thread=group, emoji="👍", at=at),
+        NicknameSet(author=author, thread=group, subject=author, nickname="Two", at=at),
+        PeopleAdded(
+            author=author, thread=group, added=[User(session=session, id="4")], at=at
+        ),
+        PersonRemoved(
+            author=author, thread=group, removed=User(session=session, id="3"), at=at
+        ),
+        AdminsAdded(
+            author=author, thread=group, added=[User(session=session, id="4")], at=at
+        ),
+        ApprovalModeSet(
+            author=author, thread=group, require_admin_approval=True, at=at
+        ),
+    ]
+    assert all(cache.handle_event(event) for event in events)
+
+    assert attr.evolve(
+        make_group(session),
+        name="New",
+        color="#ff0000",
+        emoji="👍",
+        nicknames={"2": "Two"},
+        participants=[User(session=session, id="2"), User(session=session, id="4")],
+        admins={"2", "4"},
+        approval_mode=True,
+    ) == cache.get("1")
+
+
+def test_cache_handle_event_user(session):
+    cache = ThreadCache()
+    cache.put(make_user(session))
+    thread = User(session=session, id="2")
+    at = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+    cache.handle_event(
+        NicknameSet(author=thread, thread=thread, subject=thread, nickname="A", at=at)
+    )
+    cache.handle_event(
+        NicknameSet(
+            author=thread, thread=thread, subject=session.user, nickname="B", at=at
+        )
+    )
+    cache.handle_event(EmojiSet(author=thread, thread=thread, emoji="👍", at=at))
+    user = cache.get("2")
+    assert ("A", "B", "👍") == (user.nickname, user.own_nickname, user.emoji)
+
+
+def test_cache_handle_event_invalidate(session):
+    cache = ThreadCache()
+    cache.put(make_group(session))
+    event = UnfetchedThreadEvent(thread=Group(session=session, id="1"), message=None)
+    assert cache.handle_event(event)
+    assert cache.get("1") is None
+
+
+def test_cache_handle_event_ignored(session):
+    cache = ThreadCache()
+    at = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+    user = User(session=session, id="2")
+    # Not cached
+    assert not cache.handle_event(EmojiSet(author=user, thread=user, emoji="", at=at))
+    # Not relevant
+    assert not cache.handle_event(Typing(author=user, thread=user, status=True))
+    assert CacheStats() == cache.stats
@@ -0,0 +1,57 @@
+import datetime
+import pytest
+from fbchat import Checkpoint, FileCheckpointStore, SQLiteCheckpointStore
+
+
+@pytest.fixture
+def file_store(tmp_path):
+    return FileCheckpointStore(path=str(tmp_path / "checkpoint.json"))
+
+
+@pytest.fixture
+def sqlite_store(tmp_path):
+    store = SQLiteCheckpointStore(path=str(tmp_path / "fbchat.db"))
+    yield store
+    store.close()
+
+
+@pytest.fixture(params=["file_store", "sqlite_store"])
+def store(request):
+    return request.getfixturevalue(request.param)
+
+
+def test_checkpoint_store(store):
+    assert store.load() is None
+    store.save(Checkpoint(sync_token="abc", sequence_id=1))
+    store.save(Checkpoint(sync_token="abc", sequence_id=2))
+    assert Checkpoint(sync_token="abc", sequence_id=2) == store.load()
+    store.clear()
+    assert store.load() is None
+    store.clear()
+
+
+def test_checkpoint_store_at(store):
+    at = datetime.datetime(2020, 1, 1, 12, 30, tzinfo=datetime.timezone.utc)
+    store.save(Checkpoint(sync_token="abc", sequence_id=1, at=at))
+    assert Checkpoint(sync_token="abc", sequence_id=1, at=at) == store.load()
+
+
+def test_file_checkpoint_store_invalid(file_store):
+    with open(file_store.path, "w") as f:
+        f.write("{invalid")
+    assert file_store.load() is None
+
+
+def test_sqlite_checkpoint_store_keys(tmp_path):
+    path = str(tmp_path / "fbchat.db")
+    a = SQLiteCheckpointStore(path=path, key="a")
+    b = SQLiteCheckpointStore(path=path, key="b")
+    a.save(Checkpoint(sync_token="abc", sequence_id=1))
+    assert b.load() is None
+    b.save(Checkpoint(sync_token="def", sequence_id=2))
+    a.close()
+    b.close()
+
+    a = SQLiteCheckpointStore(path=path, key="a")
+    assert Checkpoint(sync_token="abc", sequence_id=1) == a.load()
+    a.close()
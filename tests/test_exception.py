@@ -9,6 +9,8 @@ from fbchat import (
     InvalidParameters,
     NotLoggedIn,
     PleaseRefresh,
+    RequestTimeout,
+    ConnectionFailed,
 )
 from fbchat._exception import (
     handle_payload_error,
@@ -231,7 +233,12 @@ def test_handle_http_error_no_error():
 
 
 def test_handle_requests_error():
-    with pytest.raises(HTTPError, match="Connection error"):
+    with pytest.raises(ConnectionFailed, match="Connection error"):
         handle_requests_error(requests.ConnectionError())
     with pytest.raises(HTTPError, match="Requests error"):
         handle_requests_error(requests.RequestException())
+    with pytest.raises(RequestTimeout, match="Request timed out"):
+        handle_requests_error(requests.ReadTimeout())
+    # Also a connection error
+    with pytest.raises(RequestTimeout, match="Request timed out"):
+        handle_requests_error(requests.ConnectTimeout())
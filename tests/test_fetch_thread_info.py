@@ -0,0 +1,284 @@
+import attr
+import threading
+import pytest
+import fbchat
+from fbchat import GroupData, UserData, GraphQLError, ParseError
+from fbchat._graphql import QueryResult
+
+
+def group_entry(id_):
+    return {
+        "message_thread": {
+            "thread_key": {"thread_fbid": id_},
+            "thread_type": "GROUP",
+            "name": "Group {}".format(id_),
+            "all_participants": {"nodes": []},
+            "thread_admins": [],
+            "joinable_mode": {"mode": "0", "link": ""},
+        }
+    }
+
+
+#: A temporary error, which is retried
+ERROR = GraphQLError(message="Oops", description="Something went wrong", code=1)
+#: An error that retrying doesn't fix
+PERMANENT = GraphQLError(message="Nope", description="Not allowed", code=200)
+
+
+@attr.s(slots=True, repr=False, eq=False)
+class StreamingSession(fbchat.Session):
+    #: The results of each batch request
+    batches = attr.ib(factory=list)
+    #: The thread IDs requested in each batch request
+    requested = attr.ib(factory=list)
+    received = attr.ib(factory=list)
+
+    def _graphql_stream(self, *queries):
+        self.requested.append([q["query_params"]["id"] for q in queries])
+        for result in self.batches.pop(0):
+            self.received.append(result.index)
+            yield result
+
+    def _payload_post(self, url, data):
+        assert "/chat/user_info/" == url
+        assert {"ids[0]": "4"} == data
+        profile = {"type": "user", "name": "Mark", "firstName": "Mark", "uri": None}
+        return {"profiles": {"4": profile}}
+
+
+@pytest.fixture
+def session():
+    session = StreamingSession(
+        user_id="1234", fb_dtsg=None, revision=None, session=None
+    )
+    session.set_retry_policy(fbchat.RetryPolicy(base_delay=0))
+    return session
+
+
+def test_fetch_thread_info_streaming(session):
+    session.batches = [
+        [
+            QueryResult(index=2, data=group_entry("3")),
+            QueryResult(index=0, data={}),
+            QueryResult(index=1, data=group_entry("2")),
+        ]
+    ]
+    threads = fbchat.Client(session=session).fetch_thread_info(["4", "2", "3"])
+
+    # Groups are yielded before the rest of the batch has been received
+    group = next(threads)
+    assert isinstance(group, GroupData)
+    assert "3" == group.id
+    assert [2] == session.received
+
+    assert "2" == next(threads).id
+    (user,) = threads
+    assert isinstance(user, UserData)
+    assert ("4", "Mark") == (user.id, user.name)
+
+
+def test_fetch_thread_info_retry_failed(session):
+    session.batches = [
+        [
+            QueryResult(index=0, data=group_entry("1")),
+            QueryResult(index=1, error=ERROR),
+            QueryResult(index=2, data=group_entry("3")),
+        ],
+        [QueryResult(index=0, data=group_entry("2"))],
+    ]
+    client = fbchat.Client(session=session)
+    threads = list(client.fetch_thread_info(["1", "2", "3"]))
+
+    assert ["1", "3", "2"] == [thread.id for thread in threads]
+    # Only the failed thread was retried
+    assert [["1", "2", "3"], ["2"]] == session.requested
+
+
+def test_fetch_thread_info_partial(session):
+    session.batches = [
+        [QueryResult(index=0, error=ERROR), QueryResult(index=1, data=group_entry("2"))]
+    ]
+    failed = {}
+    client = fbchat.Client(session=session)
+    threads = list(
+        client.fetch_thread_info(["1", "2"], retries=0, on_error=failed.__setitem__)
+    )
+
+    assert ["2"] == [thread.id for thread in threads]
+    assert {"1": ERROR} == failed
+
+
+def test_fetch_thread_info_permanent_error(session):
+    session.batches = [
+        [QueryResult(index=0, error=PERMANENT), QueryResult(index=1, error=ERROR),],
+        [QueryResult(index=0, data=group_entry("2"))],
+    ]
+    failed = {}
+    client = fbchat.Client(session=session)
+    threads = list(client.fetch_thread_info(["1", "2"], on_error=failed.__setitem__))
+
+    assert ["2"] == [thread.id for thread in threads]
+    assert {"1": PERMANENT} == failed
+    # Only the temporary error was retried
+    assert [["1", "2"], ["2"]] == session.requested
+    assert 1 == session.stats.retries
+
+
+def test_fetch_thread_info_retry_budget(session):
+    session.set_retry_policy(
+        fbchat.RetryPolicy(base_delay=0, budget=fbchat.RetryBudget(reserve=0))
+    )
+    session.batches = [[QueryResult(index=0, error=ERROR)]]
+    failed = {}
+    client = fbchat.Client(session=session)
+    assert [] == list(client.fetch_thread_info(["1"], on_error=failed.__setitem__))
+
+    assert {"1": ERROR} == failed
+    # The retry budget is empty, so the thread isn't retried
+    assert [["1"]] == session.requested
+
+
+def test_fetch_thread_info_unknown_type(session):
+    entry = group_entry("1")
+    entry["message_thread"]["thread_type"] = "MARKETPLACE"
+    session.batches = [[QueryResult(index=0, data=entry)]]
+    failed = {}
+    client = fbchat.Client(session=session)
+    assert [] == list(client.fetch_thread_info(["1"], on_error=failed.__setitem__))
+
+    assert ["1"] == list(failed)
+    assert isinstance(failed["1"], ParseError)
+
+
+def test_fetch_thread_info_error(session):
+    session.batches = [
+        [
+            QueryResult(index=0, error=ERROR),
+            QueryResult(index=1, data=group_entry("2")),
+        ],
+        [QueryResult(index=0, error=ERROR)],
+    ]
+    threads = fbchat.Client(session=session).fetch_thread_info(["1", "2"])
+
+    # The other threads are still returned before raising
+    assert "2" == next(threads).id
+    with pytest.raises(GraphQLError, match="Oops"):
+        next(threads)
+
+
+class MissingUserSession(StreamingSession):
+    def _payload_post(self, url, data):
+        assert {"ids[0]": "4", "ids[1]": "5"} == data
+        return super()._payload_post(url, {"ids[0]": "4"})
+
+
+def test_fetch_thread_info_missing_user():
+    session = MissingUserSession(
+        user_id="1234", fb_dtsg=None, revision=None, session=None
+    )
+    session.batches = [[QueryResult(index=0, data={}), QueryResult(index=1, data={})]]
+    failed = {}
+    client = fbchat.Client(session=session)
+    threads = list(client.fetch_thread_info(["4", "5"], on_error=failed.__setitem__))
+
+    assert ["4"] == [thread.id for thread in threads]
+    assert ["5"] == list(failed)
+    assert isinstance(failed["5"], ParseError)
+
+
+@attr.s(slots=True, repr=False, eq=False)
+class GroupSession(fbchat.Session):
+    """Session where every thread is a group, and requests may be concurrent."""
+
+    requested = attr.ib(factory=list)
+    lock = attr.ib(factory=threading.Lock)
+
+    def _graphql_stream(self, *queries):
+        ids = [q["query_params"]["id"] for q in queries]
+        with self.lock:
+            self.requested.append(ids)
+        for i, thread_id in enumerate(ids):
+            if thread_id == "fail":
+                yield QueryResult(index=i, error=ERROR)
+            else:
+                yield QueryResult(index=i, data=group_entry(thread_id))
+
+
+def test_fetch_thread_info_chunks():
+    session = GroupSession(user_id="1234", fb_dtsg=None, revision=None, session=None)
+    ids = [str(i) for i in range(10)] * 2
+    client = fbchat.Client(session=session)
+    threads = list(client.fetch_thread_info(ids, chunk_size=3, workers=2))
+
+    assert sorted(set(ids)) == sorted(thread.id for thread in threads)
+    # Duplicates are only fetched once
+    assert [3, 3, 3, 1] == sorted((len(x) for x in session.requested), reverse=True)
+
+
+@attr.s(slots=True, repr=False, eq=False)
+class ParamsSession(GroupSession):
+    """Session recording the request parameters, from each worker thread."""
+
+    params = attr.ib(factory=list)
+
+    def _graphql_stream(self, *queries):
+        params = self._get_params()
+        with self.lock:
+            self.params.append(params)
+        yield from super()._graphql_stream(*queries)
+
+
+def test_fetch_thread_info_chunks_share_session():
+    session = ParamsSession(user_id="1234", fb_dtsg="abc", revision=1, session=None)
+    ids = [str(i) for i in range(200)]
+    client = fbchat.Client(session=session)
+    threads = list(client.fetch_thread_info(ids, chunk_size=1, workers=8))
+
+    assert len(ids) == len(threads)
+    # The workers share the session, so its state must be safe to use concurrently
+    assert len(ids) == len({params["__req"] for params in session.params})
+    assert all("abc" == params["fb_dtsg"] for params in session.params)
+
+
+def test_fetch_thread_info_chunks_failed():
+    session = GroupSession(user_id="1234", fb_dtsg=None, revision=None, session=None)
+    session.set_retry_policy(fbchat.RetryPolicy(base_delay=0))
+    failed = {}
+    client = fbchat.Client(session=session)
+    threads = client.fetch_thread_info(
+        ["1", "fail", "2", "3"], chunk_size=2, on_error=failed.__setitem__
+    )
+    assert {"1", "2", "3"} == {thread.id for thread in threads}
+    assert {"fail": ERROR} == failed
+
+
+def test_fetch_thread_info_no_ids():
+    session = GroupSession(user_id="1234", fb_dtsg=None, revision=None, session=None)
+    assert [] == list(fbchat.Client(session=session).fetch_thread_info([]))
+    assert [] == session.requested
+
+
+def test_fetch_thread_info_cache():
+    session = GroupSession(user_id="1234", fb_dtsg=None, revision=None, session=None)
+    cache = fbchat.ThreadCache()
+    client = fbchat.Client(session=session, cache=cache)
+
+    assert ["1", "2"] == [t.id for t in client.fetch_thread_info(["1", "2"])]
+    assert [["1", "2"]] == session.requested
+
+    threads = list(client.fetch_thread_info(["2", "3", "2"]))
+    assert ["2", "3"] == [t.id for t in threads]
+    # Only the missing thread was fetched
+    assert [["1", "2"], ["3"]] == session.requested
+    assert fbchat.CacheStats(hits=1, misses=3) == cache.stats
+
+
+def test_fetch_thread_info_cache_user(session):
+    session.batches = [[QueryResult(index=0, data={})]]
+    client = fbchat.Client(session=session, cache=fbchat.ThreadCache())
+    (user,) = client.fetch_thread_info(["4"])
+    assert isinstance(user, UserData)
+
+    # Neither the thread info nor the user info is fetched again
+    assert [user] == list(client.fetch_thread_info(["4"]))
+    assert [["4"]] == session.requested
@@ -1,6 +1,15 @@
 import pytest
 import json
-from fbchat._graphql import ConcatJSONDecoder, queries_to_json, response_to_json
+from fbchat import HTTPError, ParseError, GraphQLError, NotLoggedIn
+from fbchat._graphql import (
+    ConcatJSONDecoder,
+    QueryResult,
+    ResponseParser,
+    iter_response,
+    iter_results,
+    queries_to_json,
+    response_to_json,
+)
 
 
 @pytest.mark.parametrize(
@@ -33,3 +42,73 @@ def test_response_to_json():
         "}"
     )
     assert [[1, 2], {"b": "c"}] == response_to_json(data)
+
+
+RESPONSE = (
+    'for (;;);{"q1":{"data":{"b":"c"}}}\r\n'
+    '{"q0":{"response":[1,2]}}\r\n'
+    "{\n"
+    '   "successful_results": 2,\n'
+    '   "error_results": 0,\n'
+    '   "skipped_results": 0\n'
+    "}"
+)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, len(RESPONSE)])
+def test_iter_response(json_backend, chunk_size):
+    chunks = [RESPONSE[i : i + chunk_size] for i in range(0, len(RESPONSE), chunk_size)]
+    assert [(1, {"b": "c"}), (0, [1, 2])] == list(iter_response(chunks))
+
+
+def test_response_parser_incremental():
+    parser = ResponseParser()
+    assert [] == parser.feed('{"q0":{"data":{"a":')
+    assert [QueryResult(index=0, data={"a": 1})] == parser.feed('1}}}\r\n{"q1":')
+    assert [] == parser.feed('{"data":2}}')
+    assert [QueryResult(index=1, data=2)] == parser.close()
+
+
+def test_iter_response_empty():
+    with pytest.raises(HTTPError, match="empty response"):
+        list(iter_response([]))
+    with pytest.raises(ParseError, match="No JSON object found"):
+        list(iter_response(["for (;;);"]))
+
+
+def test_iter_response_invalid():
+    with pytest.raises(ParseError, match="Error while parsing JSON"):
+        list(iter_response(['{"q0":{"data":1}}\r\n{"q1":']))
+
+
+def test_iter_response_graphql_error():
+    error = {"error": {"summary": "Oops", "message": "Something went wrong"}}
+    chunks = ['{"q0":{"data":1}}\n', json.dumps({"q1": error})]
+    results = iter_response(chunks)
+    assert (0, 1) == next(results)
+    with pytest.raises(GraphQLError, match="Oops"):
+        next(results)
+
+
+def test_iter_results_partial():
+    error = {"errors": [{"summary": "Oops", "message": "Something went wrong"}]}
+    chunks = [
+        '{"q0":{"data":1}}\n',
+        json.dumps({"q1": error}) + "\n",
+        '{"q2":{"data":3}}',
+    ]
+    first, second, third = iter_results(chunks)
+    assert QueryResult(index=0, data=1) == first
+    assert 1 == second.index
+    assert isinstance(second.error, GraphQLError)
+    assert QueryResult(index=2, data=3) == third
+    assert 3 == third.get()
+    with pytest.raises(GraphQLError, match="Oops"):
+        second.get()
+
+
+def test_iter_results_payload_error():
+    # Errors for the whole request are still raised
+    error = {"error": 1357001, "errorSummary": "Not logged in"}
+    with pytest.raises(NotLoggedIn):
+        list(iter_results([json.dumps(error)]))
@@ -0,0 +1,61 @@
+import pytest
+import json
+from fbchat import _json
+
+
+def test_loads(json_backend):
+    data = '{"a":["😍",1,2.5,null,true]}'
+    expected = {"a": ["😍", 1, 2.5, None, True]}
+    assert expected == _json.loads(data)
+    assert expected == _json.loads(data.encode("utf-8"))
+    assert expected == _json.loads(memoryview(data.encode("utf-8")))
+
+
+def test_loads_lenient(json_backend):
+    # Accepted by the json module, but not by all of the faster libraries
+    assert "\ud83d" == _json.loads('"\\ud83d"')
+    assert 2 ** 70 == _json.loads(str(2 ** 70))
+
+
+def test_loads_invalid(json_backend):
+    with pytest.raises(ValueError):
+        _json.loads("No JSON object here!")
+    with pytest.raises(ValueError):
+        _json.loads(b'"\xff"')
+
+
+def test_dumps(json_backend):
+    data = {"a": ["😍", "/", 1, None], "b": {"c": True}}
+    text = _json.dumps(data)
+    assert " " not in text
+    assert data == json.loads(text)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        '{"a":"b"}',
+        '{"a":"b"}{"b":"c"}',
+        ' \n{"a":  "b"  }     \n {  "b" \n\n : "c" }',
+        '{"q0":{"data":1}}\r\n{"q1":{"data":" "}}\r\n{\n  "a": 0,\n  "b": 1\n}',
+        "1\n2",
+        '{"a":\n' + "\n" * 20 + "1}",
+    ],
+)
+def test_loads_concat(json_backend, text):
+    assert json.loads(text, cls=_json.ConcatJSONDecoder) == _json.loads_concat(text)
+
+
+def test_loads_concat_invalid(json_backend):
+    with pytest.raises(ValueError):
+        _json.loads_concat('{"a":"b"}\n{"a":')
+
+
+def test_raw_decode():
+    assert ([1, 2], 6) == _json.raw_decode("[1, 2]);</script>")
+
+
+def test_set_backend_unknown():
+    with pytest.raises(ValueError, match="Unknown JSON backend"):
+        _json.set_backend("simplejson")
@@ -0,0 +1,332 @@
+import json
+import pytest
+import paho.mqtt.client
+from fbchat import (
+    Typing,
+    Connect,
+    User,
+    Group,
+    Session,
+    OverflowPolicy,
+    ListenerStats,
+    Checkpoint,
+    FileCheckpointStore,
+    EventFilter,
+    MessageEvent,
+    TopicPreset,
+    ParseError,
+)
+from fbchat._listen import Listener, PayloadQueue, TOPICS, parse_payload
+from fbchat._session import session_factory
+
+
+def test_payload_queue_fifo():
+    queue = PayloadQueue(maxsize=3, policy=OverflowPolicy.PAUSE)
+    queue.put("/a", b"1")
+    queue.put("/b", b"2")
+    assert ("/a", b"1") == queue.get()
+    assert ("/b", b"2") == queue.get()
+    assert queue.get() is None
+    assert ListenerStats(received=2, parsed=2, max_queue_depth=2) == queue.stats
+
+
+def test_payload_queue_pause():
+    queue = PayloadQueue(maxsize=2, policy=OverflowPolicy.PAUSE)
+    for i in range(3):
+        queue.put("/t_ms", str(i).encode())
+    assert queue.full()
+    assert 3 == len(queue)
+    assert ListenerStats(received=3, paused=1, queue_depth=3, max_queue_depth=3) == (
+        queue.stats
+    )
+
+
+def test_payload_queue_drop_oldest():
+    queue = PayloadQueue(maxsize=2, policy=OverflowPolicy.DROP_OLDEST)
+    for i in range(3):
+        queue.put("/orca_presence", str(i).encode())
+    assert [("/orca_presence", b"1"), ("/orca_presence", b"2")] == [
+        queue.get(),
+        queue.get(),
+    ]
+    assert 1 == queue.stats.dropped
+    assert not queue.overflowed
+
+
+def test_payload_queue_drop_newest():
+    queue = PayloadQueue(maxsize=2, policy=OverflowPolicy.DROP_NEWEST)
+    for i in range(3):
+        queue.put("/orca_presence", str(i).encode())
+    assert [("/orca_presence", b"0"), ("/orca_presence", b"1")] == [
+        queue.get(),
+        queue.get(),
+    ]
+    assert 1 == queue.stats.dropped
+    assert not queue.overflowed
+
+
+@pytest.mark.parametrize(
+    "policy,kept",
+    [
+        (OverflowPolicy.DROP_OLDEST, [b"0", b"2", b"4"]),
+        (OverflowPolicy.DROP_NEWEST, [b"0", b"1", b"4"]),
+    ],
+)
+def test_payload_queue_drops_lossy_topics(policy, kept):
+    queue = PayloadQueue(maxsize=3, policy=policy)
+    queue.put("/t_ms", b"0")
+    queue.put("/thread_typing", b"1")
+    queue.put("/thread_typing", b"2")
+    queue.put("/t_ms", b"4")
+    assert kept == [queue.get()[1] for _ in range(3)]
+    assert 1 == queue.stats.dropped
+    assert not queue.overflowed
+
+
+@pytest.mark.parametrize(
+    "policy,kept",
+    [
+        (OverflowPolicy.DROP_OLDEST, [b"1", b"2"]),
+        (OverflowPolicy.DROP_NEWEST, [b"0", b"1"]),
+    ],
+)
+def test_payload_queue_drop_t_ms(policy, kept):
+    queue = PayloadQueue(maxsize=2, policy=policy)
+    queue.put("/t_ms", b"0")
+    queue.put("/t_ms", b"1")
+    # A presence payload is dropped, rather than a message
+    queue.put("/orca_presence", b"2")
+    assert not queue.overflowed
+    # Messages are only dropped when there's nothing else to drop
+    queue.put("/t_ms", b"2")
+    assert queue.overflowed
+    assert 2 == queue.stats.dropped
+    assert kept == [queue.get()[1] for _ in range(2)]
+
+
+class Message:
+    def __init__(self, topic, payload):
+        self.topic = topic
+        self.payload = payload
+
+
+class FakeMQTT:
+    """Delivers a batch of messages on each call to `loop`."""
+
+    def __init__(self, batches):
+        self.batches = batches
+        self.calls = []
+        self._state = paho.mqtt.client.mqtt_cs_connected
+
+    def loop(self, timeout):
+        self.calls.append(("loop", timeout))
+        if not self.batches:
+            # Stop listening once everything has been parsed
+            if timeout:
+                self._state = paho.mqtt.client.mqtt_cs_disconnecting
+            return paho.mqtt.client.MQTT_ERR_SUCCESS
+        for message in self.batches.pop(0):
+            self.on_message(self, None, message)
+        return paho.mqtt.client.MQTT_ERR_SUCCESS
+
+    def publish(self, topic, payload, qos):
+        self.calls.append(("publish", topic))
+
+    def loop_misc(self):
+        self.calls.append(("loop_misc",))
+        return paho.mqtt.client.MQTT_ERR_SUCCESS
+
+
+class StubListener(Listener):
+    def _reconnect(self):
+        return True
+
+
+@pytest.fixture
+def typing_message():
+    payload = b'{"sender_fbid": 2345, "thread": 3456, "state": 1}'
+    return Message("/thread_typing", payload)
+
+
+def test_listen_keeps_all_messages_in_a_batch(session, typing_message):
+    mqtt = FakeMQTT([[typing_message] * 3])
+    listener = StubListener(
+        session=session, chat_on=False, foreground=False, mqtt=mqtt, sequence_id=1
+    )
+    typing = Typing(
+        author=User(session=session, id="2345"),
+        thread=Group(session=session, id="3456"),
+        status=True,
+    )
+    assert [Connect(), typing, typing, typing] == list(listener.listen())
+    # Only wait for network events when there's nothing left to parse
+    assert [("loop", 1.0), ("loop", 0), ("loop", 0), ("loop", 1.0)] == mqtt.calls
+    assert 3 == listener.stats.parsed
+
+
+def test_listen_pauses_reading(session, typing_message):
+    mqtt = FakeMQTT([[typing_message] * 3])
+    listener = StubListener(
+        session=session,
+        chat_on=False,
+        foreground=False,
+        mqtt=mqtt,
+        sequence_id=1,
+        max_queue_size=2,
+    )
+    assert 4 == len(list(listener.listen()))
+    assert ("loop_misc",) == mqtt.calls[1]
+    assert 1 == listener.stats.paused
+    assert 0 == listener.stats.dropped
+
+
+def test_listen_resumes_from_checkpoint(session, tmp_path):
+    store = FileCheckpointStore(path=str(tmp_path / "checkpoint.json"))
+    store.save(Checkpoint(sync_token="abc", sequence_id=10))
+
+    payload = b'{"deltas": [], "lastIssuedSeqId": 12}'
+    mqtt = FakeMQTT([[Message("/t_ms", payload)]])
+    listener = StubListener(
+        session=session,
+        chat_on=False,
+        foreground=False,
+        mqtt=mqtt,
+        checkpoint_store=store,
+    )
+    # Doesn't fetch the sequence ID, the session can't make requests
+    assert [Connect()] == list(listener.listen())
+    checkpoint = store.load()
+    assert ("abc", 12) == (checkpoint.sync_token, checkpoint.sequence_id)
+
+    listener._messenger_queue_publish()
+    assert ("publish", "/messenger_sync_get_diffs") == mqtt.calls[-1]
+
+
+def test_listen_clears_invalid_checkpoint(session, tmp_path, monkeypatch):
+    monkeypatch.setattr("fbchat._listen.fetch_sequence_id", lambda session: 20)
+    store = FileCheckpointStore(path=str(tmp_path / "checkpoint.json"))
+    store.save(Checkpoint(sync_token="abc", sequence_id=10))
+
+    payload = b'{"errorCode": "ERROR_QUEUE_NOT_FOUND"}'
+    mqtt = FakeMQTT([[Message("/t_ms", payload)]])
+    listener = StubListener(
+        session=session,
+        chat_on=False,
+        foreground=False,
+        mqtt=mqtt,
+        checkpoint_store=store,
+    )
+    assert [Connect()] == list(listener.listen())
+    assert store.load() is None
+    # A new queue is created
+    assert ("publish", "/messenger_sync_create_queue") in mqtt.calls
+
+
+def test_listen_backfills_lost_events(session, monkeypatch):
+    monkeypatch.setattr("fbchat._listen.fetch_sequence_id", lambda session: 20)
+    calls = []
+
+    def backfill(session, since, concurrency, poll):
+        calls.append((since, concurrency))
+        # The connection is serviced while backfilling
+        poll()
+        assert ("loop", 0) == mqtt.calls[-1]
+        yield Connect()  # Any event will do
+
+    monkeypatch.setattr("fbchat._backfill.backfill", backfill)
+
+    payload = b'{"errorCode": "ERROR_QUEUE_OVERFLOW"}'
+    mqtt = FakeMQTT([[Message("/t_ms", payload)]])
+    listener = StubListener(
+        session=session,
+        chat_on=False,
+        foreground=False,
+        mqtt=mqtt,
+        sync_token="abc",
+        sequence_id=10,
+        backfill=True,
+        backfill_concurrency=2,
+    )
+    assert [Connect(), Connect()] == list(listener.listen())
+    ((since, concurrency),) = calls
+    assert since is not None
+    assert concurrency == 2
+
+
+def test_listen_resyncs_after_dropping_t_ms(session, monkeypatch):
+    monkeypatch.setattr("fbchat._listen.fetch_sequence_id", lambda session: 20)
+    calls = []
+
+    def backfill(session, since, concurrency, poll):
+        calls.append(since)
+        return []
+
+    monkeypatch.setattr("fbchat._backfill.backfill", backfill)
+
+    payload = b'{"deltas": [], "lastIssuedSeqId": 12}'
+    mqtt = FakeMQTT([[Message("/t_ms", payload)] * 3])
+    listener = StubListener(
+        session=session,
+        chat_on=False,
+        foreground=False,
+        mqtt=mqtt,
+        sync_token="abc",
+        sequence_id=10,
+        max_queue_size=2,
+        overflow_policy=OverflowPolicy.DROP_NEWEST,
+        backfill=True,
+    )
+    assert [Connect()] == list(listener.listen())
+    assert 1 == listener.stats.dropped
+    # A new queue is created, and the lost messages are backfilled
+    assert ("publish", "/messenger_sync_create_queue") in mqtt.calls
+    assert 1 == len(calls)
+
+
+def test_listen_filter(session, typing_message):
+    invalid = Message("/orca_presence", b"invalid json")
+    mqtt = FakeMQTT([[typing_message, invalid]])
+    listener = StubListener(
+        session=session, chat_on=False, foreground=False, mqtt=mqtt, sequence_id=1
+    )
+    event_filter = EventFilter(events=[MessageEvent])
+    assert [Connect()] == list(listener.listen(filter=event_filter))
+    assert 2 == listener.stats.parsed
+
+
+class ConnectOptionsMQTT(FakeMQTT):
+    def username_pw_set(self, username):
+        self.username = json.loads(username)
+
+    def ws_set_options(self, path, headers):
+        self.headers = headers
+
+
+@pytest.mark.parametrize(
+    "topics,expected",
+    [
+        (TopicPreset.MESSAGES, ["/t_ms"]),
+        (
+            TopicPreset.MESSAGES_AND_TYPING,
+            ["/t_ms", "/thread_typing", "/orca_typing_notifications"],
+        ),
+        (TopicPreset.ALL, TOPICS),
+        (["/t_ms", "/orca_presence"], ["/t_ms", "/orca_presence"]),
+    ],
+)
+def test_listener_topics(topics, expected):
+    session = Session(
+        user_id="1234", fb_dtsg=None, revision=None, session=session_factory()
+    )
+    mqtt = ConnectOptionsMQTT([])
+    listener = Listener(
+        session=session, chat_on=False, foreground=False, mqtt=mqtt, topics=topics
+    )
+    listener._configure_connect_options()
+    assert expected == mqtt.username["st"]
+
+
+def test_parse_payload():
+    assert {"a": "😍"} == parse_payload("/t_ms", '{"a":"😍"}'.encode("utf-8"))
+    with pytest.raises(ParseError, match="Failed parsing MQTT data on /t_ms as JSON"):
+        parse_payload("/t_ms", b'{"a":"\xff"}')
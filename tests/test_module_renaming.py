@@ -1,3 +1,4 @@
+import pytest
 import fbchat
 
 
@@ -12,5 +13,14 @@ def test_module_renaming():
     assert fbchat.Session.__repr__.__module__ == "fbchat"
 
 
+def test_module_renaming_aio():
+    aio = pytest.importorskip("fbchat.aio")
+    assert aio.Session.__module__ == "fbchat.aio"
+    assert aio.Group.send_text.__module__ == "fbchat.aio"
+    assert aio.Session.from_cookies.__func__.__module__ == "fbchat.aio"
+    # Inherited from the synchronous session
+    assert aio.Session._get_params.__module__ == "fbchat"
+
+
 def test_did_not_rename():
     assert fbchat._graphql.queries_to_json.__module__ != "fbchat"
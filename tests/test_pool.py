@@ -0,0 +1,99 @@
+import http.server
+import threading
+import pytest
+import requests
+import fbchat
+from fbchat import PoolConfig, PoolStats
+from fbchat._pool import PoolAdapter, POOL_HOSTS
+from fbchat._session import session_factory
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield "http://127.0.0.1:{}/".format(server.server_address[1])
+    server.shutdown()
+    server.server_close()
+
+
+def test_session_factory_pools():
+    session = session_factory()
+    for host in POOL_HOSTS:
+        adapter = session.get_adapter("https://{}/abc".format(host))
+        assert isinstance(adapter, PoolAdapter)
+    default = session.get_adapter("https://scontent.xx.fbcdn.net/abc")
+    assert isinstance(default, PoolAdapter)
+    assert default is not session.get_adapter("https://www.messenger.com/abc")
+
+
+def test_session_factory_pool_config():
+    config = PoolConfig(size=20, block=True, keep_alive=False)
+    session = session_factory(config)
+    for url in ["https://www.messenger.com/abc", "https://scontent.xx.fbcdn.net/abc"]:
+        adapter = session.get_adapter(url)
+        assert adapter.pool_config == config
+        assert adapter._pool_maxsize == 20 and adapter._pool_block
+
+
+def test_from_cookies_pool_config(monkeypatch):
+    monkeypatch.setattr(
+        fbchat.Session,
+        "_from_session",
+        classmethod(lambda cls, session, timeout=None: session),
+    )
+    config = PoolConfig(size=20)
+    session = fbchat.Session.from_cookies({"c_user": "1234"}, pool=config)
+    assert session.get_adapter("https://upload.messenger.com/abc").pool_config == config
+
+
+def test_pool_adapter_stats(server):
+    with requests.Session() as session:
+        session.mount("http://", PoolAdapter(PoolConfig(size=2)))
+        for _ in range(5):
+            session.get(server).raise_for_status()
+        (stats,) = session.get_adapter(server).get_stats()
+    assert stats == PoolStats(
+        host="127.0.0.1", size=2, connections=1, requests=5, idle=1
+    )
+
+
+def test_pool_adapter_no_keep_alive(server):
+    with requests.Session() as session:
+        session.mount("http://", PoolAdapter(PoolConfig(keep_alive=False)))
+        for _ in range(3):
+            r = session.get(server)
+            assert r.request.headers["Connection"] == "close"
+        (stats,) = session.get_adapter(server).get_stats()
+    assert stats.requests == 3
+
+
+def test_session_set_pool_config():
+    session = fbchat.Session(
+        user_id="1234", fb_dtsg=None, revision=None, session=session_factory()
+    )
+    config = PoolConfig(size=20, block=True)
+    session.set_pool_config(config, host="www.messenger.com")
+    adapter = session._session.get_adapter("https://www.messenger.com/abc")
+    assert adapter.pool_config == config
+    assert adapter._pool_maxsize == 20 and adapter._pool_block
+
+    session.set_pool_config(PoolConfig(size=5))
+    adapter = session._session.get_adapter("https://scontent.xx.fbcdn.net/abc")
+    assert adapter.pool_config == PoolConfig(size=5)
+    # Nothing has been sent yet
+    assert session.get_pool_stats() == []
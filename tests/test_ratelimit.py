@@ -0,0 +1,52 @@
+import pytest
+from fbchat import RateLimiter, TokenBucket
+from fbchat._ratelimit import get_endpoint_family
+
+
+@pytest.mark.parametrize(
+    "url,family",
+    [
+        ("/messaging/send/", "send"),
+        ("/api/graphqlbatch/", "graphql"),
+        ("/ajax/mercury/mark_seen.php", "mercury"),
+        ("/mercury/attachments/photo/", "mercury"),
+        ("/messaging/set_thread_name/?dpr=1", "other"),
+        ("/chat/user_info/", "other"),
+        ("https://upload.messenger.com/ajax/mercury/upload.php", "mercury"),
+        ("https://www.messenger.com/messaging/send/?dpr=1", "send"),
+    ],
+)
+def test_get_endpoint_family(url, family):
+    assert get_endpoint_family(url) == family
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=10, burst=2)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    # Callers wait in line
+    assert 0.09 < bucket.reserve() <= 0.1
+    assert 0.19 < bucket.reserve() <= 0.2
+
+
+def test_token_bucket_max_delay():
+    bucket = TokenBucket(rate=10, burst=1)
+    assert bucket.reserve(max_delay=0.05) == 0
+    # Too long a wait, so the token isn't taken
+    assert 0.09 < bucket.reserve(max_delay=0.05) <= 0.1
+    assert 0.09 < bucket.reserve(max_delay=1) <= 0.1
+    assert 0.19 < bucket.reserve() <= 0.2
+
+
+def test_rate_limiter():
+    limiter = RateLimiter(rates={"send": (1, 1)})
+    assert limiter.reserve("/messaging/send/") == 0
+    assert 0.99 < limiter.reserve("/messaging/send/") <= 1
+    # Other families have separate buckets, with the default limits
+    assert limiter.reserve("/api/graphqlbatch/") == 0
+    assert limiter.reserve("/ajax/mercury/mark_seen.php") == 0
+
+
+def test_rate_limiter_unknown_family():
+    with pytest.raises(ValueError, match="sned"):
+        RateLimiter(rates={"sned": (1, 1)})
@@ -0,0 +1,99 @@
+import pytest
+from fbchat import (
+    HTTPError,
+    RequestTimeout,
+    ConnectionFailed,
+    ParseError,
+    NotLoggedIn,
+    InvalidParameters,
+    ExternalError,
+    GraphQLError,
+    PleaseRefresh,
+    Deadline,
+    RetryPolicy,
+    RetryBudget,
+)
+from fbchat._retry import is_retryable
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        ConnectionFailed("Connection error"),
+        HTTPError("Failed sending request", status_code=500),
+        HTTPError("Failed sending request", status_code=503),
+        HTTPError("Failed sending request", status_code=429),
+        RequestTimeout("Request timed out"),
+        GraphQLError("Unknown error", description="...", code=1),
+        ExternalError("Temporary Failure", description="...", code=1545012),
+    ],
+)
+def test_is_retryable(error):
+    assert is_retryable(error)
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        HTTPError("Failed sending request", status_code=404),
+        HTTPError("Failed sending request", status_code=400),
+        # E.g. too many redirects
+        HTTPError("Requests error"),
+        GraphQLError("Unknown error", description="...", code=None),
+        PleaseRefresh("Please refresh", description="..."),
+        NotLoggedIn("Not logged in"),
+        InvalidParameters("Invalid parameters", description="...", code=1357031),
+        ExternalError("Something went wrong", description="...", code=1234),
+        ParseError("Invalid JSON", data=None),
+        ValueError(),
+    ],
+)
+def test_is_not_retryable(error):
+    assert not is_retryable(error)
+
+
+def test_retry_budget():
+    budget = RetryBudget(ratio=0.5, reserve=2)
+    assert budget.balance == 2
+    assert budget.withdraw()
+    assert budget.withdraw()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert budget.withdraw()
+    # Never more than the reserve
+    for _ in range(10):
+        budget.deposit()
+    assert budget.balance == 2
+
+
+def test_retry_policy_get_delay():
+    policy = RetryPolicy(max_retries=3, base_delay=1, max_delay=3)
+    error = ConnectionFailed("Connection error")
+    assert 0 <= policy.get_delay(error, 0) <= 1
+    assert 0 <= policy.get_delay(error, 1) <= 2
+    assert 0 <= policy.get_delay(error, 2) <= 3
+    assert policy.get_delay(error, 3) is None
+
+
+def test_retry_policy_get_delay_not_retryable():
+    policy = RetryPolicy()
+    error = HTTPError("Failed sending request", status_code=404)
+    assert policy.get_delay(error, 0) is None
+    # The budget is untouched
+    assert policy.budget.balance == policy.budget.reserve
+
+
+def test_retry_policy_get_delay_deadline():
+    policy = RetryPolicy(base_delay=10, max_delay=10)
+    error = ConnectionFailed("Connection error")
+    assert policy.get_delay(error, 5, Deadline.after(-1)) is None
+    assert policy.get_delay(error, 0, Deadline.after(-1)) is None
+
+
+def test_retry_policy_get_delay_budget():
+    policy = RetryPolicy(budget=RetryBudget(ratio=0, reserve=1))
+    error = ConnectionFailed("Connection error")
+    assert policy.get_delay(error, 0) is not None
+    assert policy.get_delay(error, 0) is None
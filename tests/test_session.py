@@ -1,8 +1,27 @@
+import concurrent.futures
 import datetime
+import json
 import pytest
-from fbchat import ParseError, _util
+import requests
+import sys
+import threading
+import fbchat
+from fbchat import (
+    ParseError,
+    HTTPError,
+    NotLoggedIn,
+    RequestTimeout,
+    Timeout,
+    Deadline,
+    RetryPolicy,
+    RateLimiter,
+    _util,
+)
 from fbchat._session import (
     parse_server_js_define,
+    get_session_data,
+    parse_response,
+    get_message_id,
     base36encode,
     prefix_url,
     generate_message_id,
@@ -188,3 +207,306 @@ def test_get_error_data():
     """
     msg = "The password you entered is incorrect. Did you forget your password?"
     assert msg == get_error_data(html)
+
+
+def test_get_session_data():
+    html = """
+    require("ServerJSDefine")).handleDefines([["DTSGInitData",[],{"token":"123"},1]])
+    require("ServerJSDefine")).handleDefines([["SiteData",[],{"client_revision":42},2]])
+    """
+    assert ("123", 42) == get_session_data(html)
+
+
+def test_get_session_data_not_logged_in():
+    html = """
+    require("ServerJSDefine")).handleDefines([["DTSGInitData",[],{"token":""},1]])
+    require("ServerJSDefine")).handleDefines([["SiteData",[],{"client_revision":42},2]])
+    """
+    with pytest.raises(NotLoggedIn):
+        get_session_data(html)
+
+
+def test_parse_response():
+    assert {"a": 1} == parse_response('for (;;);{"a": 1}')
+    assert [{"b": "c"}] == parse_response('{"q0":{"data":{"b":"c"}}}', as_graphql=True)
+
+
+def test_parse_response_empty():
+    with pytest.raises(HTTPError, match="Got empty response"):
+        parse_response("")
+
+
+def test_get_message_id():
+    j = {
+        "payload": {
+            "actions": [
+                {"other": "data"},
+                {"message_id": "mid.$XYZ", "thread_fbid": "1234"},
+            ]
+        }
+    }
+    assert ("mid.$XYZ", "1234") == get_message_id(j)
+
+
+def test_get_message_id_error():
+    with pytest.raises(ParseError, match="No message IDs"):
+        get_message_id({"payload": {"actions": []}})
+
+
+class FakeRequestsSession:
+    """Records the arguments of requests, and returns canned responses."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def post(self, url, **kwargs):
+        self.calls.append((url, kwargs))
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    get = post
+
+
+def make_response(status_code, text="", headers=()):
+    r = requests.Response()
+    r.status_code = status_code
+    r._content = text.encode("utf-8")
+    r._content_consumed = True
+    r.headers.update(headers)
+    return r
+
+
+def make_session(responses, **kwargs):
+    return fbchat.Session(
+        user_id="1234",
+        fb_dtsg="ABC",
+        revision=1,
+        session=FakeRequestsSession(responses),
+        **kwargs,
+    )
+
+
+def test_session_post_timeout():
+    session = make_session([make_response(200, '{"a": 1}')])
+    assert {"a": 1} == session._post("/abc", {})
+    ((_, kwargs),) = session._session.calls
+    assert kwargs["timeout"] == (10.0, 60.0)
+
+    session.set_timeout(Timeout(connect=1, read=2))
+    assert session.timeout == Timeout(connect=1, read=2)
+    session._session.responses.append(make_response(200, "{}"))
+    session._post("/abc", {})
+    assert session._session.calls[-1][1]["timeout"] == (1, 2)
+
+
+def test_session_is_logged_in_timeout():
+    location = {"Location": "https://www.messenger.com/"}
+    session = make_session([make_response(302, headers=location)])
+    assert session.is_logged_in(timeout=Timeout(connect=3, read=4))
+    ((_, kwargs),) = session._session.calls
+    assert kwargs["timeout"] == (3, 4)
+
+
+def test_session_post_deadline():
+    session = make_session([make_response(200, "{}")])
+    session._post("/abc", {}, deadline=Deadline.after(5))
+    ((_, kwargs),) = session._session.calls
+    connect, read = kwargs["timeout"]
+    assert connect <= 5 and read <= 5
+
+    with pytest.raises(RequestTimeout, match="Deadline exceeded"):
+        session._post("/abc", {}, deadline=Deadline.after(-1))
+    # No request was sent
+    assert len(session._session.calls) == 1
+
+
+def test_session_stats():
+    session = make_session(
+        [
+            make_response(200, "{}"),
+            requests.ReadTimeout(),
+            make_response(500),
+            requests.ConnectionError(),
+        ]
+    )
+    session._post("/abc", {})
+    with pytest.raises(RequestTimeout):
+        session._post("/abc", {})
+    with pytest.raises(HTTPError):
+        session._post("/abc", {})
+    with pytest.raises(HTTPError):
+        session._post("/abc", {})
+    assert session.stats.requests == 4
+    assert session.stats.failures == 3
+    assert session.stats.timeouts == 1
+    assert session.stats.wait_time > 0
+
+
+def test_paginators_deadline():
+    session = make_session([])
+    deadline = Deadline.after(-1)
+    with pytest.raises(RequestTimeout):
+        list(fbchat.Client(session=session).fetch_threads(None, deadline=deadline))
+    group = fbchat.Group(session=session, id="2345")
+    with pytest.raises(RequestTimeout):
+        list(group.fetch_messages(None, deadline=deadline))
+    assert not session._session.calls
+
+
+def test_session_graphql_retries():
+    session = make_session(
+        [
+            requests.ConnectionError(),
+            make_response(503),
+            make_response(200, '{"q0": {"data": {"a": 1}}}'),
+        ]
+    )
+    session.set_retry_policy(RetryPolicy(base_delay=0))
+    assert [{"a": 1}] == session._graphql_requests(fbchat._graphql.from_query("", {}))
+    assert len(session._session.calls) == 3
+    assert session.stats.retries == 2
+    assert session.stats.failures == 2
+    assert session.stats.requests == 3
+
+
+def test_session_graphql_retries_transient_error():
+    error = '{"q0": {"errors": [{"code": 2, "summary": "Try again"}]}}'
+    session = make_session(
+        [make_response(200, error), make_response(200, '{"q0": {"data": {"a": 1}}}')]
+    )
+    session.set_retry_policy(RetryPolicy(base_delay=0))
+    assert [{"a": 1}] == session._graphql_requests(fbchat._graphql.from_query("", {}))
+    assert session.stats.retries == 1
+
+
+def test_session_graphql_not_retried():
+    session = make_session([requests.TooManyRedirects(), make_response(200, "{}")])
+    session.set_retry_policy(RetryPolicy(base_delay=0))
+    with pytest.raises(HTTPError, match="Requests error"):
+        session._graphql_requests(fbchat._graphql.from_query("", {}))
+    assert len(session._session.calls) == 1
+
+
+def test_session_graphql_retries_exhausted():
+    session = make_session([make_response(503)] * 3)
+    session.set_retry_policy(RetryPolicy(max_retries=2, base_delay=0))
+    with pytest.raises(HTTPError):
+        session._graphql_requests(fbchat._graphql.from_query("", {}))
+    assert len(session._session.calls) == 3
+
+
+def test_session_send_not_retried():
+    session = make_session([make_response(503), make_response(200, "{}")])
+    session.set_retry_policy(RetryPolicy(base_delay=0))
+    with pytest.raises(HTTPError):
+        session._do_send_request({"body": "abc"})
+    assert len(session._session.calls) == 1
+    assert session.stats.retries == 0
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+
+    def sleep(seconds):
+        now[0] += seconds
+
+    monkeypatch.setattr("time.monotonic", lambda: now[0])
+    monkeypatch.setattr("time.sleep", sleep)
+    return now
+
+
+def test_session_rate_limiter(clock):
+    session = make_session([make_response(200, "{}") for _ in range(3)])
+    assert session.rate_limiter is None
+    session.set_rate_limiter(RateLimiter(rates={"other": (4, 1)}))
+    for _ in range(3):
+        session._post("/abc", {})
+    assert session.stats.throttled == 2
+    assert session.stats.throttle_time == 0.5
+    assert clock[0] == 1000.5
+
+
+def test_session_rate_limiter_deadline(clock):
+    session = make_session([make_response(200, "{}") for _ in range(2)])
+    session.set_rate_limiter(RateLimiter(rates={"other": (1, 1)}))
+    session._post("/abc", {}, deadline=fbchat.Deadline.after(10))
+    # Fails without waiting, since the request couldn't be sent before the deadline
+    with pytest.raises(fbchat.RequestTimeout):
+        session._post("/abc", {}, deadline=fbchat.Deadline.after(0.5))
+    assert clock[0] == 1000
+    assert len(session._session.calls) == 1
+    # The request didn't take a turn from the others
+    session._post("/abc", {})
+    assert clock[0] == 1001
+
+
+class ConcurrentRequestsSession:
+    """Answers requests from many threads, with a new ``fb_dtsg`` in each response."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sent = []
+
+    def post(self, url, data, **kwargs):
+        with self.lock:
+            self.sent.append((data["__req"], data["fb_dtsg"]))
+        counter = int(data["__req"], 36)
+        token = {"token": "token{}".format(counter)}
+        j = {"payload": counter, "jsmods": {"define": [["DTSGInitData", [], token, 1]]}}
+        return make_response(200, "for (;;);" + json.dumps(j))
+
+
+def test_session_fb_dtsg_out_of_order():
+    session = fbchat.Session(user_id="1234", fb_dtsg="ABC", revision=1, session=None)
+
+    def response(token):
+        return {"payload": {}, "jsmods": {"define": [["DTSGInitData", [], token, 1]]}}
+
+    session._parse_payload(response({"token": "new"}), 2)
+    # The response to an older request arrives late
+    session._parse_payload(response({"token": "old"}), 1)
+    assert session._fb_dtsg == "new"
+    session._parse_payload(response({"token": "newer"}), 3)
+    assert session._fb_dtsg == "newer"
+
+
+@pytest.fixture
+def contention():
+    # Switch between threads as often as possible, to provoke races
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def test_session_concurrent_requests(contention):
+    session = fbchat.Session(
+        user_id="1234", fb_dtsg="ABC", revision=1, session=ConcurrentRequestsSession(),
+    )
+    workers, count = 16, 200
+    barrier = threading.Barrier(workers)
+
+    def work():
+        barrier.wait()
+        return [session._payload_post("/abc", {}) for _ in range(count)]
+
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        futures = [executor.submit(work) for _ in range(workers)]
+        results = [result for future in futures for result in future.result()]
+
+    total = workers * count
+    # Every request got a unique counter, and its own response
+    assert sorted(results) == list(range(1, total + 1))
+    sent = session._session.sent
+    assert len({counter for counter, _ in sent}) == total
+    # Only valid tokens were sent
+    issued = {"ABC"} | {"token{}".format(i) for i in range(1, total + 1)}
+    assert {fb_dtsg for _, fb_dtsg in sent} <= issued
+    # The token from the last request is kept, even if its response wasn't last
+    assert session._fb_dtsg == "token{}".format(total)
+    assert session.stats.requests == total
+    assert session.stats.failures == 0
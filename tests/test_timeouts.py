@@ -0,0 +1,33 @@
+import pytest
+from fbchat import Timeout, Deadline, RequestTimeout
+
+
+def test_timeout_to_requests():
+    assert Timeout()._to_requests() == (10.0, 60.0)
+    assert Timeout(connect=1, read=None)._to_requests() == (1, None)
+
+
+def test_deadline():
+    deadline = Deadline.after(60)
+    assert not deadline.expired
+    assert 59 < deadline.remaining() <= 60
+
+    deadline = Deadline.after(-1)
+    assert deadline.expired
+    assert deadline.remaining() == 0
+
+
+def test_deadline_limit():
+    deadline = Deadline.after(30)
+    timeout = deadline.limit(Timeout(connect=10, read=60))
+    assert timeout.connect == 10
+    assert 29 < timeout.read <= 30
+
+    timeout = deadline.limit(Timeout(connect=None, read=None))
+    assert 29 < timeout.connect <= 30
+    assert 29 < timeout.read <= 30
+
+
+def test_deadline_limit_expired():
+    with pytest.raises(RequestTimeout, match="Deadline exceeded"):
+        Deadline.after(-1).limit(Timeout())
@@ -3,6 +3,7 @@ import fbchat
 import datetime
 from fbchat._util import (
     strip_json_cruft,
+    iter_concurrently,
     parse_json,
     get_jsmods_require,
     get_jsmods_define,
@@ -15,6 +16,7 @@ from fbchat._util import (
     seconds_to_timedelta,
     millis_to_timedelta,
     timedelta_to_seconds,
+    LazyDatetime,
 )
 
 
@@ -34,9 +36,17 @@ def test_parse_json():
     assert parse_json('{"a":"b"}') == {"a": "b"}
 
 
+def test_parse_json_bytes():
+    assert parse_json('{"a":"😍"}'.encode("utf-8")) == {"a": "😍"}
+    assert parse_json(bytearray(b'{"a":"b"}')) == {"a": "b"}
+    assert parse_json(memoryview(b'{"a":"b"}')) == {"a": "b"}
+
+
 def test_parse_json_invalid():
     with pytest.raises(fbchat.ParseError, match="Error while parsing JSON"):
         parse_json("No JSON object here!")
+    with pytest.raises(fbchat.ParseError, match="Error while parsing JSON"):
+        parse_json(b'{"a":"\xff"}')
 
 
 def test_get_jsmods_require():
@@ -214,16 +224,63 @@ def test_millis_to_datetime():
     assert millis_to_datetime(1542333064162) != DT_NO_TIMEZONE
 
 
+def test_millis_to_datetime_lazy(session):
+    assert not isinstance(millis_to_datetime(1542333064162, session), LazyDatetime)
+    session.enable_lazy_timestamps()
+    dt = millis_to_datetime(1542333064162, session)
+    assert isinstance(dt, LazyDatetime)
+    assert dt._datetime is None
+    assert dt.millis == 1542333064162
+    assert dt == DT
+    assert dt.to_datetime() is dt.to_datetime()
+
+
+def test_lazy_datetime_attributes():
+    dt = LazyDatetime(1542333064162)
+    assert dt.year == 2018
+    assert dt.isoformat() == DT.isoformat()
+    assert str(dt) == str(DT)
+    assert "{:%Y-%m-%d}".format(dt) == "2018-11-16"
+    assert repr(dt) == "LazyDatetime(1542333064162)"
+    with pytest.raises(AttributeError):
+        dt.__missing__
+
+
+def test_lazy_datetime_compare():
+    a, b = LazyDatetime(1000), LazyDatetime(2000)
+    assert a < b and a <= b and b > a and b >= a and a != b
+    assert a == LazyDatetime(1000)
+    # Comparing lazy timestamps doesn't create datetimes
+    assert a._datetime is None and b._datetime is None
+    assert sorted([b, a]) == [a, b]
+
+    assert a == DT_0 + datetime.timedelta(seconds=1)
+    assert a > DT_0 and DT_0 < a
+    assert {a, DT_0 + datetime.timedelta(seconds=1)} == {a}
+    assert a != None  # noqa: E711
+
+
+def test_lazy_datetime_arithmetic():
+    a, b = LazyDatetime(1000), LazyDatetime(3000)
+    assert b - a == datetime.timedelta(seconds=2)
+    assert a - DT_0 == datetime.timedelta(seconds=1)
+    assert DT_0 - a == datetime.timedelta(seconds=-1)
+    assert a + datetime.timedelta(seconds=2) == b
+    assert datetime.timedelta(seconds=2) + a == b
+
+
 def test_datetime_to_seconds():
     assert datetime_to_seconds(DT_0) == 0
     assert datetime_to_seconds(DT) == 1542333064  # Rounded
     datetime_to_seconds(DT_NO_TIMEZONE)  # Depends on system timezone
+    assert datetime_to_seconds(LazyDatetime(1542333064162)) == 1542333064
 
 
 def test_datetime_to_millis():
     assert datetime_to_millis(DT_0) == 0
     assert datetime_to_millis(DT) == 1542333064162
     datetime_to_millis(DT_NO_TIMEZONE)  # Depends on system timezone
+    assert datetime_to_millis(LazyDatetime(1542333064162)) == 1542333064162
 
 
 def test_seconds_to_timedelta():
@@ -245,3 +302,24 @@ def test_timedelta_to_seconds():
     assert timedelta_to_seconds(datetime.timedelta(seconds=1)) == 1
     assert timedelta_to_seconds(datetime.timedelta(hours=1)) == 3600
     assert timedelta_to_seconds(datetime.timedelta(days=1)) == 86400
+
+
+def test_iter_concurrently():
+    def numbers(start):
+        return lambda: iter(range(start, start + 3))
+
+    funcs = [numbers(0), numbers(10), numbers(20)]
+    assert [0, 1, 2, 10, 11, 12, 20, 21, 22] == sorted(
+        iter_concurrently(funcs, workers=2)
+    )
+    # Without concurrency, the items are yielded in order
+    assert [0, 1, 2, 10, 11, 12] == list(iter_concurrently(funcs[:2], workers=1))
+
+
+def test_iter_concurrently_error():
+    def fail():
+        yield 1
+        raise ValueError("Oops")
+
+    with pytest.raises(ValueError, match="Oops"):
+        list(iter_concurrently([fail, lambda: iter(range(100))], workers=2))
@@ -1,6 +1,7 @@
 import pytest
 import fbchat
 from fbchat import ThreadABC, Thread, User, Group, Page
+from fbchat._threads import intern_thread
 
 
 def test_parse_color():
@@ -77,3 +78,24 @@ def test_thread_parse_participants(session):
 def test_thread_create_and_implements_thread_abc(session):
     thread = Thread(session=session, id="123")
     assert thread._parse_customization_info
+
+
+def test_intern_thread():
+    session = fbchat.Session(user_id="1", fb_dtsg=None, revision=None, session=None)
+    assert User(session=session, id="2") == intern_thread(User, session, "2")
+    assert intern_thread(User, session, "2") is not intern_thread(User, session, "2")
+
+    session.enable_thread_interning()
+    user = intern_thread(User, session, "2")
+    assert user is intern_thread(User, session, "2")
+    assert user is user._copy()
+    assert user is not intern_thread(Group, session, "2")
+    assert user is not intern_thread(User, session, "3")
+
+
+def test_intern_thread_weak():
+    session = fbchat.Session(user_id="1", fb_dtsg=None, revision=None, session=None)
+    session.enable_thread_interning()
+    intern_thread(User, session, "2")
+    # Unused threads are not kept alive
+    assert 0 == len(session._thread_handles)